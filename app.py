@@ -1,6 +1,6 @@
 import os
 from datetime import timedelta
-from flask import Flask, redirect, url_for, render_template # <--- Added render_template
+from flask import Flask, redirect, url_for, render_template, request, Response, abort # <--- Added render_template
 from flask_login import LoginManager
 from sqlalchemy import text
 from config import Config
@@ -12,18 +12,23 @@ from routes.admin_routes import admin_bp
 from routes.staff_routes import staff_bp
 from routes.hod_routes import hod_bp 
 from routes.public_routes import public_bp
+from services.notification_queue import init_notification_worker
+from services.purge_service import init_purge_worker
+from services.user_cache import load_cached_user
+from utils.assets import init_static_caching
+from services.upload_service import init_upload_worker
+from services.instrumentation import init_instrumentation
 
 app = Flask(__name__)
 app.config.from_object(Config)
 
 app.config['PERMANENT_SESSION_LIFETIME'] = timedelta(days=15)
 
-@app.after_request
-def add_header(response):
-    response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate, post-check=0, pre-check=0'
-    response.headers['Pragma'] = 'no-cache'
-    response.headers['Expires'] = '0'
-    return response
+# Per-endpoint latency, SQL counts and N+1 warnings (admin: /admin/metrics, Prometheus: /metrics)
+init_instrumentation(app)
+
+# Fingerprinted static files are cached for a year; logged-in pages are never stored
+init_static_caching(app)
 
 db.init_app(app)
 login_manager = LoginManager()
@@ -34,17 +39,8 @@ login_manager.login_view = 'auth.admin_login'
 def inject_user_types():
     return dict(isinstance=isinstance, Admin=Admin, Staff=Staff, HOD=HOD)
 
-@login_manager.user_loader
-def load_user(user_id_string):
-    try:
-        user_type, user_id = user_id_string.split('-')
-        user_id = int(user_id)
-    except (ValueError, AttributeError): return None
-
-    if user_type == 'admin': return Admin.query.get(user_id)
-    elif user_type == 'staff': return Staff.query.get(user_id)
-    elif user_type == 'hod': return HOD.query.get(user_id)
-    return None
+# Users come from a per-process snapshot cache instead of a query per request
+login_manager.user_loader(load_cached_user)
 
 app.register_blueprint(auth_bp, url_prefix='/auth')
 app.register_blueprint(admin_bp, url_prefix='/admin')
@@ -73,6 +69,13 @@ def index():
 @app.route('/healthz')
 def health_check(): return "OK", 200
 
+@app.route('/metrics')
+def prometheus_metrics():
+    token = app.config.get('METRICS_TOKEN')
+    if not token or request.headers.get('Authorization') != f'Bearer {token}':
+        abort(404)
+    return Response(app.extensions['metrics'].prometheus_text(), mimetype='text/plain; version=0.0.4')
+
 # ==========================================
 # === MYSQL DB FIX ROUTE ===
 # ==========================================
@@ -114,10 +117,18 @@ def fix_local_db():
 
     return f"<h1>DB Fix Results</h1><ul><li>{'</li><li>'.join(results)}</li></ul>"
 
+# Tables first: the workers below query them as soon as they start
+with app.app_context():
+    db.create_all()
+    print("Tables check complete.")
+
+# Background sender for the absentee SMS outbox
+init_notification_worker(app)
+# Background worker for chunked student/staff deletes
+init_purge_worker(app)
+# Background thumbnail generation for uploaded images
+init_upload_worker(app)
+
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
     app.run(host="0.0.0.0", port=port, debug=True)
-
-with app.app_context():
-    db.create_all()
-    print("Tables check complete.")
\ No newline at end of file
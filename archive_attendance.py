@@ -0,0 +1,28 @@
+import sys
+from datetime import datetime
+from app import app, db
+from services.archive_service import archive_before, academic_year_start, archive_boundary
+
+# Moves old academic years out of the live attendance table.
+# Usage: python archive_attendance.py [years_to_keep]      (default 1: only the current year stays live)
+#        python archive_attendance.py --before YYYY-MM-DD
+with app.app_context():
+    if len(sys.argv) > 2 and sys.argv[1] == '--before':
+        before = datetime.strptime(sys.argv[2], '%Y-%m-%d').date()
+    else:
+        keep = int(sys.argv[1]) if len(sys.argv) > 1 else 1
+        start = academic_year_start()
+        before = start.replace(year=start.year - (keep - 1))
+
+    current = archive_boundary()
+    if current and before < current:
+        print(f"Attendance before {current} is already archived; nothing to do for {before}.")
+        sys.exit(0)
+
+    print(f"--- ARCHIVING ATTENDANCE DATED BEFORE {before} ---")
+    try:
+        moved = archive_before(before, progress=lambda n: print(f"  moved {n} rows..."))
+        print(f"SUCCESS: {moved} attendance rows moved to attendance_archive.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR: {e}")
@@ -0,0 +1,75 @@
+"""
+Bytes transferred per dashboard view, with a minimal browser cache.
+
+"before" replays what the old global no-store header forced: every asset is
+downloaded again on every view. "after" honours the Cache-Control / ETag
+headers the app now sends (immutable fingerprinted assets, 304 revalidation).
+
+Usage: python benchmarks/asset_benchmark.py [--views 20]
+"""
+import argparse
+import os
+import re
+
+os.environ['NOTIFICATION_WORKER_ENABLED'] = 'false'
+os.environ['PURGE_WORKER_ENABLED'] = 'false'
+
+from common import create_benchmark_app, create_staff, login
+
+ASSET_URL = re.compile(r'(?:href|src)="(/static/[^"]+)"')
+
+class BrowserCache:
+    """Just enough of a browser cache: fresh entries are reused, others revalidated by ETag."""
+
+    def __init__(self, client):
+        self.client = client
+        self.entries = {}
+
+    def fetch(self, url):
+        entry = self.entries.get(url)
+        if entry and entry['fresh']:
+            return 0
+        headers = {'If-None-Match': entry['etag']} if entry and entry['etag'] else {}
+        response = self.client.get(url, headers=headers)
+        body = len(response.get_data())
+        cache_control = response.headers.get('Cache-Control', '')
+        if response.status_code == 200 and 'no-store' not in cache_control:
+            self.entries[url] = {'etag': response.headers.get('ETag'),
+                                 'fresh': 'immutable' in cache_control or 'max-age=31536000' in cache_control}
+        return body
+
+def dashboard_bytes(client, path, views):
+    cache = BrowserCache(client)
+    before = after = 0
+    for _ in range(views):
+        html = client.get(path).get_data(as_text=True)
+        assets = ASSET_URL.findall(html)
+        page = len(html.encode())
+        before += page + sum(len(client.get(url).get_data()) for url in assets)
+        after += page + sum(cache.fetch(url) for url in assets)
+    return before / views, after / views, len(assets)
+
+def run(views):
+    app = create_benchmark_app()
+    profiles = app.config['UPLOAD_FOLDER']
+    images = sorted(f for f in os.listdir(profiles) if f.endswith('.png')) if os.path.isdir(profiles) else []
+    with app.app_context():
+        from models.models import db
+        staff = create_staff()
+        if images:
+            # A real photo, so the navbar avatar is part of the page weight
+            staff.profile_image = images[0]
+            db.session.commit()
+
+    client = app.test_client()
+    login(client)
+    for path in ('/staff/dashboard', '/auth/profile'):
+        before, after, assets = dashboard_bytes(client, path, views)
+        print(f"{path}: {assets} local assets, before {before / 1024:.1f} KB/view, "
+              f"after {after / 1024:.1f} KB/view ({(1 - after / before) * 100:.0f}% less)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--views', type=int, default=20)
+    args = parser.parse_args()
+    run(args.views)
@@ -0,0 +1,115 @@
+"""Shared helpers for the offline benchmarks (SQLite app + seed data)."""
+import os
+import sys
+import tempfile
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+def create_benchmark_app(db_path=None, database_url=None):
+    """
+    Imports the Flask app against a throwaway SQLite database, or against
+    `database_url` (e.g. an empty local Postgres) when given.
+    """
+    if database_url is None:
+        if db_path is None:
+            db_path = os.path.join(tempfile.mkdtemp(prefix='attendance-bench-'), 'bench.db')
+        database_url = f'sqlite:///{db_path}'
+    os.environ['DATABASE_URL'] = database_url
+    from app import app
+    app.config['TESTING'] = True
+    return app
+
+def seed_section(branch, semester, size, roll_prefix=None):
+    """Creates `size` students for one section and returns their ids."""
+    from sqlalchemy import insert
+    from models.models import db, Student
+    roll_prefix = roll_prefix or f'{branch}{semester}'
+    rows = [{
+        'name': f'Student {i}',
+        'roll_no': f'{roll_prefix}-{i:05d}',
+        'branch': branch,
+        'semester': semester,
+        'parent_contact': f'9{i:09d}'
+    } for i in range(size)]
+    db.session.execute(insert(Student), rows)
+    db.session.commit()
+    return [s.student_id for s in Student.query.filter_by(branch=branch, semester=semester).order_by(Student.roll_no)]
+
+def create_staff(username='bench_staff', password='Bench@123', branch='General'):
+    from models.models import db, Staff
+    staff = Staff(name='Bench Staff', username=username, branch=branch, contact_no='9000000000')
+    staff.set_password(password)
+    db.session.add(staff)
+    db.session.commit()
+    return staff
+
+def login(client, username='bench_staff', password='Bench@123', role='staff'):
+    return client.post(f'/auth/{role}/login', data={'username': username, 'password': password})
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def seed_attendance_range(sections, staff_ids, start_date, days, periods=7, batch=50000):
+    """
+    Writes `days` school days of attendance for every section. `sections` maps a
+    label to its student ids; each (section, period) is taken by one staff id.
+    Returns the number of rows written.
+    """
+    from datetime import timedelta
+    from sqlalchemy import insert
+    from models.models import db, Attendance
+    buffer, written = [], 0
+    for d in range(days):
+        day = start_date + timedelta(days=d)
+        for s_idx, student_ids in enumerate(sections.values()):
+            for period in range(1, periods + 1):
+                staff_id = staff_ids[(s_idx * periods + period) % len(staff_ids)]
+                for sid in student_ids:
+                    buffer.append({'staff_id': staff_id, 'student_id': sid, 'date': day, 'period': period,
+                                   'subject': f'Subject {period}', 'status': 'Absent' if (sid * 7 + d + period) % 11 == 0 else 'Present'})
+        if len(buffer) >= batch:
+            db.session.execute(insert(Attendance), buffer)
+            db.session.commit()
+            written += len(buffer)
+            buffer = []
+    if buffer:
+        db.session.execute(insert(Attendance), buffer)
+        db.session.commit()
+        written += len(buffer)
+    return written
+
+def seed_campus(branches, semesters, section_size, password='Bench@123'):
+    """
+    Seeds a whole college: one section per (branch, semester), one staff member
+    per section, an HOD per branch plus General, and an admin. Returns
+    {'sections': {(branch, semester): [student ids]}, 'staff': [usernames],
+     'hods': [usernames], 'parents': [phone numbers]}.
+    """
+    from models.models import db, Staff, HOD, Admin, Setting, Student
+    sections, staff, hods = {}, [], []
+    for b_idx, branch in enumerate(branches):
+        for semester in semesters:
+            sections[(branch, semester)] = seed_section(branch, semester, section_size, roll_prefix=f'{branch}{semester}')
+            username = f'staff_{branch.lower()}_{semester}'
+            member = Staff(name=f'Staff {branch} {semester}', username=username, branch=branch, contact_no='9000000000')
+            member.set_password(password)
+            db.session.add(member)
+            staff.append(username)
+    for department in list(branches) + ['General']:
+        hod = HOD(name=f'HOD {department}', username=f'hod_{department.lower()}', department=department, contact_no='9000000001')
+        hod.set_password(password)
+        db.session.add(hod)
+        hods.append(hod.username)
+    admin = Admin(username='bench_admin')
+    admin.set_password(password)
+    db.session.add(admin)
+    db.session.add(Setting(setting_key='college_branches', setting_value=','.join(branches)))
+    db.session.commit()
+    parents = [phone for (phone,) in db.session.query(Student.parent_contact).limit(500)]
+    return {'sections': sections, 'staff': staff, 'hods': hods, 'parents': parents}
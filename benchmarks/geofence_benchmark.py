@@ -0,0 +1,72 @@
+"""
+Single-point latency and batch (audit) throughput of the geofence check, and
+its agreement with the old per-point haversine for a single circle.
+
+Usage: python benchmarks/geofence_benchmark.py [--points 1000000] [--polygons 4]
+"""
+import argparse
+import random
+import time
+from math import sin, cos, sqrt, atan2, radians
+
+import numpy as np
+
+from common import create_benchmark_app
+
+CENTRE = (12.9716, 77.5946)
+
+def haversine(lat1, lon1, lat2, lon2):
+    R = 6371e3; lat1_rad, lat2_rad = radians(lat1), radians(lat2); delta_lat, delta_lon = radians(lat2 - lat1), radians(lon2 - lon1)
+    a = sin(delta_lat / 2)**2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2)**2
+    return R * 2 * atan2(sqrt(a), sqrt(1 - a))
+
+def campus(polygons, rng):
+    """Main campus circle, two annex circles and some building outlines within ~5 km."""
+    circles = [('Main campus', *CENTRE, 300), ('Annex A', CENTRE[0] + 0.02, CENTRE[1], 150),
+               ('Annex B', CENTRE[0], CENTRE[1] + 0.03, 200)]
+    shapes = []
+    for n in range(polygons):
+        lat, lon = CENTRE[0] + rng.uniform(-0.04, 0.04), CENTRE[1] + rng.uniform(-0.04, 0.04)
+        corners = sorted(rng.uniform(0, 6.283) for _ in range(8))
+        shapes.append((f'Block {n}', [[lat + 0.002 * sin(a), lon + 0.002 * cos(a)] for a in corners]))
+    return circles, shapes
+
+def run(points, polygons):
+    create_benchmark_app()  # importing the service needs the models' app wiring
+    from services.geofence_service import CompiledFences
+
+    rng = random.Random(3)
+    circles, shapes = campus(polygons, rng)
+    fences = CompiledFences(circles, shapes)
+    lats = CENTRE[0] + np.random.default_rng(3).uniform(-0.05, 0.05, points)
+    lons = CENTRE[1] + np.random.default_rng(4).uniform(-0.05, 0.05, points)
+
+    start = time.perf_counter()
+    for i in range(1000):
+        fences.check(lats[i], lons[i])
+    single_us = (time.perf_counter() - start) * 1000
+    print(f"single check ({len(fences.names)} fences): {single_us:.1f} us per request")
+
+    start = time.perf_counter()
+    inside, _, _ = fences.check_many(lats, lons)
+    elapsed = time.perf_counter() - start
+    print(f"batch check: {points:,} points in {elapsed:.2f} s ({points / elapsed:,.0f} points/s), {inside.sum():,} inside")
+
+    # The old scalar path, one main-campus circle, on a sample
+    sample = min(points, 100000)
+    main_only = CompiledFences(circles[:1], [])
+    start = time.perf_counter()
+    scalar = np.array([haversine(*CENTRE, lats[i], lons[i]) <= 300 for i in range(sample)])
+    scalar_s = time.perf_counter() - start
+    start = time.perf_counter()
+    vector, _, _ = main_only.check_many(lats[:sample], lons[:sample])
+    vector_s = time.perf_counter() - start
+    print(f"main campus only, {sample:,} points: haversine loop {scalar_s:.2f} s, vectorised {vector_s:.3f} s, "
+          f"{int((scalar != vector).sum())} disagreements")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--points', type=int, default=1000000)
+    parser.add_argument('--polygons', type=int, default=4)
+    args = parser.parse_args()
+    run(args.points, args.polygons)
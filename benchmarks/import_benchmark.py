@@ -0,0 +1,44 @@
+"""
+Bulk student import throughput: a fresh 10k-row CSV, then the same file again as updates.
+
+Usage: python benchmarks/import_benchmark.py [--rows 10000]
+"""
+import argparse
+import io
+import os
+import time
+
+os.environ['NOTIFICATION_WORKER_ENABLED'] = 'false'
+
+from common import create_benchmark_app
+
+def build_csv(rows):
+    lines = ['name,roll_no,branch,semester,parent_contact']
+    for i in range(rows):
+        lines.append(f"Student {chr(65 + i % 26)},IMP-{i:06d},CSE,{i % 6 + 1},9{i:09d}")
+    # A few broken rows so the error path is exercised too
+    lines += ['Bad 1,IMP-BAD-1,CSE,9,9000000000', 'Bad2,IMP-BAD-2,CSE,1,12345']
+    return '\n'.join(lines).encode()
+
+def run(rows):
+    app = create_benchmark_app()
+    from services.student_import import import_students, read_rows
+
+    from models.models import db, Setting
+
+    payload = build_csv(rows)
+    with app.app_context():
+        # Rows are checked against the configured branches
+        db.session.add(Setting(setting_key='college_branches', setting_value='CSE'))
+        db.session.commit()
+        for label in ('insert', 'update'):
+            start = time.perf_counter()
+            result = import_students(read_rows(io.BytesIO(payload), 'students.csv'))
+            elapsed = time.perf_counter() - start
+            print(f"{label}: {rows} rows in {elapsed:.2f} s ({rows / elapsed:.0f} rows/s) -> "
+                  f"{result.inserted} added, {result.updated} updated, {len(result.errors)} rejected")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=10000)
+    run(parser.parse_args().rows)
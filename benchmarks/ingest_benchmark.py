@@ -0,0 +1,54 @@
+"""
+Per-submission latency of staff.submit_attendance for 60/120/240-student sections.
+
+Usage: python benchmarks/ingest_benchmark.py [--runs 20]
+"""
+import argparse
+import os
+import time
+
+# Absentee SMS stay queued in the outbox; nothing is sent during the benchmark
+os.environ['NOTIFICATION_WORKER_ENABLED'] = 'false'
+
+from common import create_benchmark_app, seed_section, create_staff, login, percentile
+
+SECTION_SIZES = (60, 120, 240)
+
+def run(runs):
+    app = create_benchmark_app()
+    from models.models import db, Attendance
+
+    with app.app_context():
+        create_staff()
+        sections = {size: seed_section('BENCH', idx + 1, size) for idx, size in enumerate(SECTION_SIZES)}
+
+    client = app.test_client()
+    login(client)
+
+    print(f"{'students':>8} | {'p50 ms':>8} | {'p99 ms':>8} | {'mean ms':>8}")
+    for idx, size in enumerate(SECTION_SIZES):
+        student_ids = sections[size]
+        form = {'period': '1', 'subject': 'Bench', 'branch': 'BENCH', 'semester': str(idx + 1), 'student_id': [str(s) for s in student_ids]}
+        for n, sid in enumerate(student_ids):
+            form[f'status_{sid}'] = 'Absent' if n % 10 == 0 else 'Present'
+
+        samples = []
+        for run_no in range(runs):
+            # A new period each run: a claimed (submitted) period would turn the post into a no-op retry,
+            # and summaries/rollups stay on their normal incremental path
+            form['period'] = str(run_no + 1)
+            with app.app_context():
+                before = db.session.query(db.func.count(Attendance.id)).scalar()
+            start = time.perf_counter()
+            client.post('/staff/submit-attendance', data=form)
+            samples.append((time.perf_counter() - start) * 1000)
+            with app.app_context():
+                inserted = db.session.query(db.func.count(Attendance.id)).scalar() - before
+            assert inserted == size, f'expected {size} attendance rows, the submission wrote {inserted}'
+
+        print(f"{size:>8} | {percentile(samples, 50):>8.2f} | {percentile(samples, 99):>8.2f} | {sum(samples) / len(samples):>8.2f}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--runs', type=int, default=20)
+    run(parser.parse_args().runs)
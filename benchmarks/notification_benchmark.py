@@ -0,0 +1,50 @@
+"""
+Offline throughput of the absentee SMS outbox against the local fake sink.
+
+Usage: python benchmarks/notification_benchmark.py [--messages 1000] [--latency 0.2] [--workers 8]
+"""
+import argparse
+import os
+import time
+from datetime import date
+
+os.environ['NOTIFICATION_WORKER_ENABLED'] = 'false'
+
+from common import create_benchmark_app
+
+def run(messages, latency, workers, failure_rate):
+    app = create_benchmark_app()
+    from collections import namedtuple
+    from services.notification_queue import enqueue_absent_notifications, NotificationDispatcher
+    from services.sms_service import FakeSmsSink
+
+    Absentee = namedtuple('Absentee', 'name parent_contact')
+    absentees = [Absentee(f'Student {i}', f'9{i:09d}') for i in range(messages)]
+
+    with app.app_context():
+        start = time.perf_counter()
+        # Two periods for every parent: the second one must merge, not double the SMS count
+        enqueue_absent_notifications(absentees, date.today(), 1, 'Maths', '09:00 AM')
+        enqueue_absent_notifications(absentees, date.today(), 2, 'Physics', '10:00 AM')
+        enqueue_ms = (time.perf_counter() - start) * 1000
+
+    sink = FakeSmsSink(latency=latency, failure_rate=failure_rate)
+    dispatcher = NotificationDispatcher(app, sender=sink, max_workers=workers, base_backoff=0)
+
+    start = time.perf_counter()
+    while dispatcher.run_once():
+        pass
+    elapsed = time.perf_counter() - start
+
+    print(f"enqueued {messages} parents x 2 periods in {enqueue_ms:.1f} ms")
+    print(f"sent {len(sink.messages)} SMS in {elapsed:.2f} s -> {len(sink.messages) / elapsed:.1f} msg/s "
+          f"(latency {latency * 1000:.0f} ms, {workers} workers)")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--messages', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0.2)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--failure-rate', type=float, default=0.0)
+    args = parser.parse_args()
+    run(args.messages, args.latency, args.workers, args.failure_rate)
@@ -0,0 +1,76 @@
+"""
+Seeds a large attendance table in SQLite and checks that the hot queries are
+served by the Attendance indexes (EXPLAIN QUERY PLAN). Exits 1 on a table scan.
+
+Usage: python benchmarks/query_plan_check.py [--rows 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+os.environ['NOTIFICATION_WORKER_ENABLED'] = 'false'
+
+from common import create_benchmark_app, seed_section, create_staff
+
+def seed_attendance(rows, students, staff_ids, batch=50000):
+    from sqlalchemy import insert
+    from models.models import db, Attendance
+    day, period, buffer, written = date(2020, 1, 1), 1, [], 0
+    while written < rows:
+        for sid in students:
+            buffer.append({'staff_id': staff_ids[(day.toordinal() + period) % len(staff_ids)], 'student_id': sid, 'date': day, 'period': period,
+                           'subject': 'Maths', 'status': 'Absent' if (sid + period) % 9 == 0 else 'Present'})
+        written += len(students)
+        period += 1
+        if period > 7:
+            period, day = 1, day + timedelta(days=1)
+        if len(buffer) >= batch:
+            db.session.execute(insert(Attendance), buffer)
+            db.session.commit()
+            buffer = []
+    if buffer:
+        db.session.execute(insert(Attendance), buffer)
+        db.session.commit()
+
+def hot_queries(student_id, staff_id, probe_day):
+    from sqlalchemy import func
+    from models.models import db, Attendance, Student
+    return {
+        'staff.dashboard duplicate check': Attendance.query.join(Student).filter(
+            Student.branch == 'PLAN', Student.semester == 1, Attendance.date == probe_day, Attendance.period == 3),
+        'per-student history': Attendance.query.filter_by(student_id=student_id).order_by(
+            Attendance.date.desc(), Attendance.period.desc()),
+        'hod.staff_details aggregation': db.session.query(
+            Attendance.date, Attendance.period, Attendance.subject, func.count(Attendance.id)
+        ).filter_by(staff_id=staff_id).group_by(Attendance.date, Attendance.period, Attendance.subject),
+    }
+
+def run(rows):
+    app = create_benchmark_app()
+    from sqlalchemy import text
+    from models.models import db
+
+    with app.app_context():
+        staff_ids = [create_staff(username=f'plan_staff_{i}').staff_id for i in range(20)]
+        students = seed_section('PLAN', 1, 120)
+        start = time.perf_counter()
+        seed_attendance(rows, students, staff_ids)
+        db.session.execute(text('ANALYZE'))
+        print(f"seeded {rows} attendance rows in {time.perf_counter() - start:.1f} s")
+
+        failed = False
+        for name, query in hot_queries(students[0], staff_ids[0], date(2020, 2, 1)).items():
+            sql = str(query.statement.compile(db.engine, compile_kwargs={'literal_binds': True}))
+            plan = [r[-1] for r in db.session.execute(text(f'EXPLAIN QUERY PLAN {sql}'))]
+            # A full walk of the table, or of an unrelated index, is a scan either way
+            full_scan = any(p.startswith('SCAN attendance') for p in plan)
+            failed |= full_scan
+            print(f"[{'FAIL' if full_scan else ' OK '}] {name}: {' | '.join(plan)}")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1000000)
+    sys.exit(run(parser.parse_args().rows))
@@ -0,0 +1,46 @@
+"""
+Latency of the staff attendance-history report over a full academic year.
+
+Usage: python benchmarks/report_benchmark.py [--days 200] [--sections 6] [--size 60]
+"""
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+os.environ['NOTIFICATION_WORKER_ENABLED'] = 'false'
+
+from common import create_benchmark_app, seed_section, create_staff, login, percentile, seed_attendance_range
+
+def run(days, sections, size, runs):
+    app = create_benchmark_app()
+
+    start_day = date(2024, 6, 1)
+    with app.app_context():
+        staff_ids = [create_staff(username='bench_staff' if i == 0 else f'bench_staff_{i}').staff_id for i in range(20)]
+        roster = {f'S{s}': seed_section('BENCH', s + 1, size) for s in range(sections)}
+        start = time.perf_counter()
+        rows = seed_attendance_range(roster, staff_ids, start_day, days)
+        print(f"seeded {rows} attendance rows in {time.perf_counter() - start:.1f} s")
+
+    client = app.test_client()
+    login(client)
+    form = {'start_date': start_day.isoformat(), 'end_date': (start_day + timedelta(days=days)).isoformat()}
+
+    samples, size_kb = [], 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        response = client.post('/staff/attendance-history', data=form)
+        body = response.get_data()
+        samples.append((time.perf_counter() - start) * 1000)
+        size_kb = len(body) / 1024
+    print(f"year report for one staff: p50 {percentile(samples, 50):.1f} ms, p99 {percentile(samples, 99):.1f} ms, {size_kb:.0f} KB")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=200)
+    parser.add_argument('--sections', type=int, default=6)
+    parser.add_argument('--size', type=int, default=60)
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+    run(args.days, args.sections, args.size, args.runs)
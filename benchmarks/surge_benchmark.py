@@ -0,0 +1,131 @@
+"""
+Period-change surge: every staff member opens the marking sheet and submits it
+at the same moment, while parents look up attendance and HODs open their
+dashboards. Reports p50/p99 latency and throughput per flow, and exits with
+status 1 when a p99 exceeds --budget-ms or any request fails, so it can gate a
+deployment. A submission only counts as successful when its section's rows
+were written; the route redirects whether or not they were.
+
+Usage: python benchmarks/surge_benchmark.py [--branches CSE,ECE,ME,CIVIL] [--size 60]
+           [--bells 3] [--parents 40] [--budget-ms 2000] [--database-url postgresql://...]
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ['NOTIFICATION_WORKER_ENABLED'] = 'false'
+os.environ['PURGE_WORKER_ENABLED'] = 'false'
+os.environ['THUMBNAIL_WORKER_ENABLED'] = 'false'
+
+from common import create_benchmark_app, seed_campus, login, percentile
+
+PASSWORD = 'Bench@123'
+
+class Recorder:
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def timed(self, flow, call, ok_statuses=(200,)):
+        start = time.perf_counter()
+        try:
+            response = call()
+            response.get_data()
+            failed = response.status_code not in ok_statuses
+        except Exception:
+            failed = True
+        elapsed = (time.perf_counter() - start) * 1000
+        with self._lock:
+            self.samples[flow].append(elapsed)
+            if failed:
+                self.errors[flow] += 1
+
+    def fail(self, flow, count):
+        with self._lock:
+            self.errors[flow] += count
+
+def staff_bell(app, recorder, username, branch, semester, student_ids, period):
+    """One staff member's surge: open the sheet, then submit it."""
+    client = app.test_client()
+    login(client, username, PASSWORD, 'staff')
+    selection = {'branch': branch, 'semester': str(semester), 'period': str(period), 'subject': f'Subject {period}'}
+    recorder.timed('staff: open sheet', lambda: client.post('/staff/dashboard', data=selection))
+
+    form = dict(selection, student_id=[str(s) for s in student_ids])
+    for n, sid in enumerate(student_ids):
+        form[f'status_{sid}'] = 'Absent' if (n + period) % 12 == 0 else 'Present'
+    recorder.timed('staff: submit', lambda: client.post('/staff/submit-attendance', data=form), ok_statuses=(302,))
+
+def verify_bell(app, recorder, sections, period):
+    """Counts each section's rows for the period; a section short of its roster is a failed submit."""
+    from models.models import db, Attendance, Student
+    with app.app_context():
+        written = {(branch, semester): count for branch, semester, count in
+                   db.session.query(Student.branch, Student.semester, db.func.count(Attendance.id))
+                   .join(Student, Attendance.student_id == Student.student_id)
+                   .filter(Attendance.period == period)
+                   .group_by(Student.branch, Student.semester)}
+    recorder.fail('staff: submit', sum(1 for section, ids in sections.items() if written.get(section, 0) != len(ids)))
+
+def parent_lookup(app, recorder, phone):
+    client = app.test_client()
+    recorder.timed('public: parent view', lambda: client.post('/view/parent', data={'phone_no': phone}))
+
+def hod_views(app, recorder, username):
+    client = app.test_client()
+    login(client, username, PASSWORD, 'hod')
+    recorder.timed('hod: dashboard', lambda: client.get('/hod/dashboard'))
+    recorder.timed('hod: student list', lambda: client.get('/hod/dashboard/students?page=1'))
+
+def run(branches, size, bells, parents, workers, budget_ms, database_url):
+    app = create_benchmark_app(database_url=database_url)
+    with app.app_context():
+        start = time.perf_counter()
+        campus = seed_campus(branches, range(1, 7), size, PASSWORD)
+        print(f"seeded {len(campus['sections'])} sections x {size} students, "
+              f"{len(campus['staff'])} staff in {time.perf_counter() - start:.1f} s")
+
+    recorder = Recorder()
+    wall_start = time.perf_counter()
+    requests_sent = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for bell in range(bells):
+            period = bell + 1
+            jobs = [pool.submit(staff_bell, app, recorder, username, branch, semester, ids, period)
+                    for username, ((branch, semester), ids) in zip(campus['staff'], campus['sections'].items())]
+            jobs += [pool.submit(parent_lookup, app, recorder, phone) for phone in campus['parents'][:parents]]
+            jobs += [pool.submit(hod_views, app, recorder, username) for username in campus['hods']]
+            for job in jobs:
+                job.result()
+            verify_bell(app, recorder, campus['sections'], period)
+            requests_sent += 2 * len(campus['staff']) + min(parents, len(campus['parents'])) + 2 * len(campus['hods'])
+    wall = time.perf_counter() - wall_start
+
+    print(f"\n{bells} bell(s), {workers} concurrent clients, {requests_sent} requests in {wall:.1f} s "
+          f"({requests_sent / wall:.1f} req/s)")
+    print(f"{'flow':<22} | {'n':>5} | {'p50 ms':>8} | {'p99 ms':>8} | {'errors':>6}")
+    over_budget = False
+    for flow, samples in sorted(recorder.samples.items()):
+        p99 = percentile(samples, 99)
+        flag = ' <-- over budget' if budget_ms and p99 > budget_ms else ''
+        over_budget |= bool(flag) or recorder.errors[flow] > 0
+        print(f"{flow:<22} | {len(samples):>5} | {percentile(samples, 50):>8.1f} | {p99:>8.1f} | {recorder.errors[flow]:>6}{flag}")
+    return 1 if over_budget else 0
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--branches', default='CSE,ECE,ME,CIVIL')
+    parser.add_argument('--size', type=int, default=60, help='students per section')
+    parser.add_argument('--bells', type=int, default=3, help='periods to simulate')
+    parser.add_argument('--parents', type=int, default=40, help='parent lookups per bell')
+    parser.add_argument('--workers', type=int, default=16, help='concurrent clients')
+    parser.add_argument('--budget-ms', type=float, default=0, help='fail when any flow p99 exceeds this')
+    parser.add_argument('--database-url', help='run against this (empty) database instead of SQLite')
+    args = parser.parse_args()
+    sys.exit(run([b.strip() for b in args.branches.split(',') if b.strip()], args.size, args.bells,
+                 args.parents, args.workers, args.budget_ms, args.database_url))
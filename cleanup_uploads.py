@@ -0,0 +1,19 @@
+import os
+import sys
+from app import app
+from services.upload_service import find_orphans
+
+# Lists (or with --delete, removes) uploaded photos, timetables and thumbnails
+# that no admin/staff/HOD row references any more.
+# Usage: python cleanup_uploads.py [--delete]
+with app.app_context():
+    delete = '--delete' in sys.argv
+    print("--- CHECKING FOR ORPHANED UPLOADS ---")
+    orphans = find_orphans()
+    total = 0
+    for path in orphans:
+        total += os.path.getsize(path)
+        if delete:
+            os.remove(path)
+        print(f"{'DELETED' if delete else 'ORPHAN'}: {os.path.relpath(path, app.static_folder)}")
+    print(f"{len(orphans)} file(s), {total / 1024:.0f} KB{'' if delete else ' (run with --delete to remove)'}.")
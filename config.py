@@ -29,7 +29,56 @@ class Config:
     # Max upload size: 16 Megabytes
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024
 
+    # Background WebP thumbnails for profile photos and timetable images
+    THUMBNAIL_WORKER_ENABLED = os.environ.get('THUMBNAIL_WORKER_ENABLED', 'true') == 'true'
+
     # Twilio (SMS) Configuration
     TWILIO_ACCOUNT_SID = os.environ.get('TWILIO_ACCOUNT_SID')
     TWILIO_AUTH_TOKEN = os.environ.get('TWILIO_AUTH_TOKEN')
-    TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER')
\ No newline at end of file
+    TWILIO_PHONE_NUMBER = os.environ.get('TWILIO_PHONE_NUMBER')
+
+    # Seconds before a process re-checks the settings version stamp
+    SETTINGS_CACHE_TTL = int(os.environ.get('SETTINGS_CACHE_TTL', 300))
+
+    # Seconds a department dashboard snapshot (grouped counts) is reused
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 60))
+
+    # Upper bound in seconds on a cached section roster; student writes invalidate it sooner
+    ROSTER_CACHE_TTL = int(os.environ.get('ROSTER_CACHE_TTL', 3600))
+
+    # SMS backend: 'twilio' for production, 'fake' to record messages locally
+    SMS_BACKEND = os.environ.get('SMS_BACKEND', 'twilio')
+
+    # Absentee SMS outbox worker
+    NOTIFICATION_WORKER_ENABLED = os.environ.get('NOTIFICATION_WORKER_ENABLED', 'true') == 'true'
+    NOTIFICATION_MAX_WORKERS = int(os.environ.get('NOTIFICATION_MAX_WORKERS', 4))
+    NOTIFICATION_BATCH_SIZE = int(os.environ.get('NOTIFICATION_BATCH_SIZE', 50))
+    NOTIFICATION_MAX_ATTEMPTS = int(os.environ.get('NOTIFICATION_MAX_ATTEMPTS', 5))
+    # Seconds a new message waits so more absences for the same parent can be merged into it
+    NOTIFICATION_BATCH_WINDOW = int(os.environ.get('NOTIFICATION_BATCH_WINDOW', 60))
+
+    # Seconds a submission may hold its section period's claim before it counts as dead
+    # (taken over by the next submit, deleted by the purge worker)
+    ATTENDANCE_CLAIM_TTL = int(os.environ.get('ATTENDANCE_CLAIM_TTL', 120))
+
+    # Offline sync: sheets per request, and how many days back a queued sheet may be dated
+    ATTENDANCE_SYNC_MAX_SHEETS = int(os.environ.get('ATTENDANCE_SYNC_MAX_SHEETS', 20))
+    ATTENDANCE_SYNC_MAX_AGE_DAYS = int(os.environ.get('ATTENDANCE_SYNC_MAX_AGE_DAYS', 2))
+
+    # Background student/staff deletes: attendance rows removed per transaction
+    PURGE_WORKER_ENABLED = os.environ.get('PURGE_WORKER_ENABLED', 'true') == 'true'
+    PURGE_CHUNK_SIZE = int(os.environ.get('PURGE_CHUNK_SIZE', 1000))
+
+    # Upper bound on a logged-in user's snapshot; account changes drop it everywhere via version stamps,
+    # which each process reads at most once per USER_CACHE_CHECK_INTERVAL seconds
+    USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 300))
+    USER_CACHE_CHECK_INTERVAL = int(os.environ.get('USER_CACHE_CHECK_INTERVAL', 10))
+
+    # Request timing / SQL counting; /metrics (Prometheus) needs METRICS_TOKEN as a Bearer token
+    METRICS_ENABLED = os.environ.get('METRICS_ENABLED', 'true') == 'true'
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+    # A request running the same statement this many times is flagged as a likely N+1
+    N_PLUS_ONE_THRESHOLD = int(os.environ.get('N_PLUS_ONE_THRESHOLD', 10))
+
+    # Academic years start on the 1st of this month; archive_attendance.py moves whole years
+    ACADEMIC_YEAR_START_MONTH = int(os.environ.get('ACADEMIC_YEAR_START_MONTH', 6))
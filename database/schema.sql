@@ -59,9 +59,138 @@ CREATE TABLE IF NOT EXISTS attendance (
     subject VARCHAR(100) NOT NULL,
     status ENUM('Present', 'Absent') NOT NULL,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    session_id INT,
     FOREIGN KEY (staff_id) REFERENCES staff(staff_id) ON DELETE SET NULL,
     FOREIGN KEY (student_id) REFERENCES student(student_id) ON DELETE CASCADE,
-    UNIQUE KEY `unique_period_attendance` (`student_id`, `date`, `period`)
+    UNIQUE KEY `unique_period_attendance` (`student_id`, `date`, `period`),
+    KEY `ix_attendance_staff_date` (`staff_id`, `date`),
+    KEY `ix_attendance_date_period` (`date`, `period`)
+);
+
+-- 7b. Archived Attendance (past academic years, moved by archive_attendance.py)
+-- Kept as a plain table: MySQL cannot partition a table that has foreign keys.
+CREATE TABLE IF NOT EXISTS attendance_archive (
+    id INT PRIMARY KEY,
+    staff_id INT,
+    student_id INT,
+    date DATE NOT NULL,
+    period INT NOT NULL,
+    subject VARCHAR(100) NOT NULL,
+    status VARCHAR(10) NOT NULL,
+    timestamp DATETIME,
+    session_id INT,
+    archived_at DATETIME,
+    KEY `ix_attendance_archive_student` (`student_id`, `date`, `period`),
+    KEY `ix_attendance_archive_date` (`date`)
+);
+
+-- 7c. Attendance Sessions (one claim per section period; the unique key is the lock)
+CREATE TABLE IF NOT EXISTS attendance_session (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    branch VARCHAR(50) NOT NULL,
+    semester INT NOT NULL,
+    date DATE NOT NULL,
+    period INT NOT NULL,
+    subject VARCHAR(100),
+    staff_id INT,
+    status VARCHAR(10) NOT NULL DEFAULT 'claimed',
+    token VARCHAR(32) NOT NULL,
+    claimed_at DATETIME,
+    submitted_at DATETIME,
+    client_id VARCHAR(36) UNIQUE,
+    UNIQUE KEY `unique_section_period` (`branch`, `semester`, `date`, `period`),
+    FOREIGN KEY (staff_id) REFERENCES staff(staff_id) ON DELETE SET NULL
+);
+
+-- 7d. Geofences (extra campuses/annexes; the main campus circle is in settings)
+CREATE TABLE IF NOT EXISTS geofence (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    name VARCHAR(100) NOT NULL,
+    kind VARCHAR(10) NOT NULL,
+    center_lat DOUBLE,
+    center_lon DOUBLE,
+    radius_m DOUBLE,
+    points TEXT,
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+-- 7e. Location Audit (append-only trail of submission locations; see location_outliers.py)
+CREATE TABLE IF NOT EXISTS location_audit (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    month INT NOT NULL,
+    staff_id INT NOT NULL,
+    submitted_at DATETIME NOT NULL,
+    latitude DOUBLE NOT NULL,
+    longitude DOUBLE NOT NULL,
+    distance_m DOUBLE,
+    accepted BOOLEAN NOT NULL,
+    KEY `ix_location_audit_month_staff` (`month`, `staff_id`)
+);
+
+-- 7f. Section Rollups (one row per submitted section period; rebuild_section_rollups.py)
+CREATE TABLE IF NOT EXISTS section_rollup (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    branch VARCHAR(50) NOT NULL,
+    semester INT NOT NULL,
+    date DATE NOT NULL,
+    period INT NOT NULL,
+    subject VARCHAR(100),
+    staff_id INT,
+    present INT NOT NULL DEFAULT 0,
+    absent INT NOT NULL DEFAULT 0,
+    UNIQUE KEY `unique_section_rollup` (`branch`, `semester`, `date`, `period`),
+    KEY `ix_section_rollup_date_branch` (`date`, `branch`)
+);
+
+-- 7g. Notification Outbox (queued absentee SMS, one row per parent per day while pending)
+CREATE TABLE IF NOT EXISTS notification_outbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    to_number VARCHAR(15) NOT NULL,
+    notify_date DATE NOT NULL,
+    details TEXT NOT NULL,
+    status VARCHAR(10) NOT NULL DEFAULT 'pending',
+    attempts INT NOT NULL DEFAULT 0,
+    next_attempt_at DATETIME,
+    last_error VARCHAR(255),
+    claim_token VARCHAR(32),
+    created_at DATETIME,
+    sent_at DATETIME,
+    KEY `ix_outbox_parent_day` (`to_number`, `notify_date`, `status`),
+    KEY `ix_outbox_due` (`status`, `next_attempt_at`)
+);
+
+-- 7h. Attendance Summaries (precomputed totals per student and per student subject)
+CREATE TABLE IF NOT EXISTS student_attendance_summary (
+    student_id INT PRIMARY KEY,
+    total INT NOT NULL DEFAULT 0,
+    present INT NOT NULL DEFAULT 0,
+    updated_at DATETIME,
+    FOREIGN KEY (student_id) REFERENCES student(student_id)
+);
+
+CREATE TABLE IF NOT EXISTS student_subject_summary (
+    student_id INT NOT NULL,
+    subject VARCHAR(100) NOT NULL,
+    total INT NOT NULL DEFAULT 0,
+    present INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (student_id, subject),
+    FOREIGN KEY (student_id) REFERENCES student(student_id)
+);
+
+-- 7i. Purge Jobs (background student/staff deletes, run in chunks by the purge worker)
+CREATE TABLE IF NOT EXISTS purge_jobs (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    kind VARCHAR(20) NOT NULL,
+    target_id INT,
+    target_label VARCHAR(150),
+    archive BOOLEAN NOT NULL DEFAULT FALSE,
+    status VARCHAR(10) NOT NULL DEFAULT 'queued',
+    total INT NOT NULL DEFAULT 0,
+    deleted INT NOT NULL DEFAULT 0,
+    error VARCHAR(255),
+    created_at DATETIME,
+    updated_at DATETIME,
+    finished_at DATETIME
 );
 
 -- 8. Insert Default Settings (Only if they don't exist yet)
@@ -0,0 +1,36 @@
+from app import app, db
+from sqlalchemy import text
+
+# Run once on databases created before the Attendance model declared its indexes
+# (db.create_all() never alters an existing table).
+with app.app_context():
+    print("--- ADDING ATTENDANCE INDEXES ---")
+
+    duplicates = db.session.execute(text(
+        "SELECT COUNT(*) FROM (SELECT student_id, date, period FROM attendance "
+        "GROUP BY student_id, date, period HAVING COUNT(*) > 1) d"
+    )).scalar()
+
+    commands = [
+        "CREATE INDEX ix_attendance_staff_date ON attendance (staff_id, date)",
+        "CREATE INDEX ix_attendance_date_period ON attendance (date, period)",
+    ]
+    if duplicates:
+        print(f"SKIPPED unique_period_attendance: {duplicates} (student, date, period) groups have duplicate rows. Clean them up and re-run.")
+    else:
+        commands.insert(0, "CREATE UNIQUE INDEX unique_period_attendance ON attendance (student_id, date, period)")
+
+    for sql in commands:
+        try:
+            db.session.execute(text(sql))
+            db.session.commit()
+            print(f"SUCCESS: {sql}")
+        except Exception as e:
+            db.session.rollback()
+            # MySQL 1061 / Postgres / SQLite all report an existing index name
+            if "1061" in str(e) or "Duplicate key" in str(e) or "already exists" in str(e):
+                print(f"SKIPPED (Already exists): {sql}")
+            else:
+                print(f"ERROR: {str(e)}")
+
+    print("--- INDEX UPDATE COMPLETE ---")
@@ -0,0 +1,55 @@
+from app import app, db
+from sqlalchemy import text
+from services.rollup_service import rebuild_rollups
+
+# Run once on databases created before attendance rows carried their claim
+# (db.create_all() never alters an existing table). Links existing rows to the
+# submitted claim of their class where exactly one matches, then rebuilds the
+# section rollups and adds their unique key.
+with app.app_context():
+    print("--- LINKING ATTENDANCE TO ITS CLAIMS ---")
+
+    for table in ('attendance', 'attendance_archive'):
+        try:
+            db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN session_id INT DEFAULT NULL"))
+            db.session.commit()
+            print(f"Updated {table} table.")
+        except Exception as e:
+            db.session.rollback()
+            if "Duplicate column" in str(e) or "1060" in str(e) or "already exists" in str(e) or "duplicate column" in str(e):
+                print(f"{table}: Column already exists.")
+            else:
+                print(f"Error updating {table}: {e}")
+
+    # Ambiguous rows (one staff member with two sections in a period) stay unlinked
+    # and keep using the student's current semester
+    linked = db.session.execute(text(
+        "UPDATE attendance SET session_id = ("
+        " SELECT MIN(s.id) FROM attendance_session s, student st"
+        " WHERE st.student_id = attendance.student_id AND s.branch = st.branch"
+        " AND s.date = attendance.date AND s.period = attendance.period"
+        " AND s.staff_id = attendance.staff_id AND s.status = 'submitted'"
+        " HAVING COUNT(*) = 1"
+        ") WHERE session_id IS NULL"
+    )).rowcount
+    db.session.commit()
+    print(f"Checked {linked:,} attendance rows for a claim.")
+
+    print("Rebuilding section rollups...")
+    rows = rebuild_rollups()
+    db.session.commit()
+    print(f"Wrote {rows:,} rollup rows.")
+
+    sql = "CREATE UNIQUE INDEX unique_section_rollup ON section_rollup (branch, semester, date, period)"
+    try:
+        db.session.execute(text(sql))
+        db.session.commit()
+        print(f"SUCCESS: {sql}")
+    except Exception as e:
+        db.session.rollback()
+        if "1061" in str(e) or "Duplicate key" in str(e) or "already exists" in str(e):
+            print(f"SKIPPED (Already exists): {sql}")
+        else:
+            print(f"ERROR: {str(e)}")
+
+    print("--- DB FIX COMPLETE ---")
@@ -0,0 +1,263 @@
+"""
+Synthetic college data for testing at production scale.
+
+Creates staff, HODs, students for every (branch, semester) cohort and years of
+attendance following a realistic pattern:
+- each student has their own absence rate (most rarely miss class, a few are chronic absentees);
+- whole-day absences and multi-day sick spells, not just random periods;
+- more absences on Mondays/Saturdays, in the first/last period and in festival months;
+- holidays and Sundays have no classes.
+Every period also gets its submitted attendance_session claim, as a staff
+submission would leave it, and its marks are linked to it, so reports and
+rollups see each class's semester.
+Students who finished Semester 6 inside the window become alumni (semester None).
+
+Usage: python generate_data.py [--years 3] [--size 60] [--branches CSE,ECE] [--prefix GEN] [--seed 7]
+       (branches default to the college_branches setting)
+"""
+import argparse
+import random
+import sys
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from sqlalchemy import insert
+from app import app, db
+from models.models import Attendance, AttendanceSession, Staff, HOD, Student, Semester
+from services.settings_service import get_settings
+from services.summary_service import rebuild_summaries
+from services.rollup_service import rebuild_rollups
+from services.dashboard_service import invalidate_department_snapshots
+from services.roster_cache import invalidate_rosters
+from services.archive_service import academic_year_start
+
+FINAL_SEMESTER = 6
+SUBJECTS_PER_SEMESTER = 5
+FESTIVAL_MONTHS = (10, 11)
+
+# =========================================================
+# === 1. CALENDAR ===
+# =========================================================
+def terms_for(years, end_date):
+    """(start, end) of the odd and even term of each academic year, oldest first."""
+    first = academic_year_start(end_date)
+    first = first.replace(year=first.year - (years - 1))
+    terms = []
+    for y in range(years):
+        odd_start = first.replace(year=first.year + y, day=15)
+        odd_end = odd_start + timedelta(days=150)
+        even_start = odd_end + timedelta(days=30)
+        terms += [(odd_start, odd_end), (even_start, even_start + timedelta(days=135))]
+    return [(start, min(end, end_date)) for start, end in terms if start <= end_date]
+
+def school_days(start, end, rng):
+    """Mon-Sat between the dates, minus about one random holiday a fortnight."""
+    day = start
+    while day <= end:
+        if day.weekday() != 6 and rng.random() > 0.07:
+            yield day
+        day += timedelta(days=1)
+
+# =========================================================
+# === 2. PEOPLE ===
+# =========================================================
+def create_staff_and_hods(branches, staff_per_branch, prefix, password):
+    """Returns {branch: [staff_id, ...]}; 'General' staff teach Semesters 1-2."""
+    staff_ids = {}
+    for branch in branches + ['General']:
+        members = []
+        for n in range(staff_per_branch):
+            member = Staff(name=f'{branch} Lecturer {n + 1}', username=f'{prefix.lower()}_{branch.lower()}_{n + 1}',
+                           branch=branch, contact_no=f'98{n:08d}')
+            member.set_password(password)
+            members.append(member)
+        hod = HOD(name=f'{branch} HOD', username=f'{prefix.lower()}_hod_{branch.lower()}', department=branch, contact_no='9700000000')
+        hod.set_password(password)
+        db.session.add_all(members + [hod])
+        db.session.flush()
+        staff_ids[branch] = [m.staff_id for m in members]
+    db.session.commit()
+    return staff_ids
+
+def create_cohorts(branches, admissions, current_term, size, prefix, rng):
+    """
+    One cohort per branch per admission term. Returns
+    [(branch, admitted_term, [(student_id, absence_rate), ...])].
+    """
+    cohorts = []
+    for branch in branches:
+        for admitted in admissions:
+            semester = current_term - admitted + 1
+            rows = [{
+                'name': f'Student {admitted}-{i}',
+                'roll_no': f'{prefix}{branch[:4]}{admitted % 100:02d}{i:04d}'[:20],
+                'branch': branch,
+                'semester': semester if semester <= FINAL_SEMESTER else None,
+                'parent_contact': f'9{rng.randrange(10**8, 10**9)}'
+            } for i in range(max(1, int(size * rng.uniform(0.9, 1.1))))]
+            db.session.execute(insert(Student), rows)
+            ids = [sid for (sid,) in db.session.query(Student.student_id)
+                   .filter(Student.roll_no.in_([r['roll_no'] for r in rows])).order_by(Student.student_id)]
+            # 90% regular attenders (about 7% absent), 10% chronic (about 30%)
+            rates = [rng.betavariate(2, 26) if rng.random() < 0.9 else rng.betavariate(3, 7) for _ in ids]
+            cohorts.append((branch, admitted, list(zip(ids, rates))))
+    db.session.commit()
+    return cohorts
+
+def create_semesters(branches, term, current_term, admissions):
+    """Active Semester records for the running term, so registers and end_semester work."""
+    start, end = term
+    for branch in branches:
+        for admitted in admissions:
+            semester = current_term - admitted + 1
+            if 1 <= semester <= FINAL_SEMESTER:
+                db.session.add(Semester(branch=branch, semester_num=semester, start_date=start, end_date=end, is_active=True))
+    db.session.commit()
+
+# =========================================================
+# === 3. ATTENDANCE ===
+# =========================================================
+def section_rows(day, periods, staff, subjects, students, sick_until, rng):
+    """All marks of one section for one day."""
+    weekday_bump = 1.5 if day.weekday() in (0, 5) else 1.0
+    season_bump = 1.4 if day.month in FESTIVAL_MONTHS else 1.0
+    rows = []
+    for student_id, rate in students:
+        if sick_until.get(student_id, day) > day:
+            away_all_day = True
+        else:
+            away_all_day = rng.random() < rate * 0.6 * weekday_bump * season_bump
+            if away_all_day and rng.random() < 0.15:
+                sick_until[student_id] = day + timedelta(days=rng.randint(2, 5))
+        for period in range(1, periods + 1):
+            edge = 1.6 if period in (1, periods) else 1.0
+            absent = away_all_day or rng.random() < rate * 0.4 * edge
+            rows.append({'staff_id': staff[period - 1], 'student_id': student_id, 'date': day, 'period': period,
+                         'subject': subjects[period - 1], 'status': 'Absent' if absent else 'Present'})
+    return rows
+
+def section_claims(day, periods, staff, subjects, branch, semester, taken):
+    """The submitted attendance_session claim of each period, as the staff dashboard leaves them."""
+    claims = []
+    for period in range(1, periods + 1):
+        if (branch, semester, day, period) in taken:
+            continue
+        at = datetime.combine(day, datetime.min.time()) + timedelta(hours=8 + period)
+        claims.append({'branch': branch, 'semester': semester, 'date': day, 'period': period,
+                       'subject': subjects[period - 1], 'staff_id': staff[period - 1], 'status': 'submitted',
+                       'token': uuid.uuid4().hex, 'claimed_at': at, 'submitted_at': at})
+    return claims
+
+def generate_attendance(terms, cohorts, staff_ids, periods, batch_size, rng):
+    table, claim_table = Attendance.__table__, AttendanceSession.__table__
+    buffer, claims, written, started = [], [], 0, time.perf_counter()
+    sick_until = {}
+    # Periods already claimed in the window (an earlier run on the same branches) keep their claim
+    taken = set(db.session.query(AttendanceSession.branch, AttendanceSession.semester,
+                                 AttendanceSession.date, AttendanceSession.period)
+                .filter(AttendanceSession.date >= terms[0][0]))
+
+    def flush():
+        # Claims first, so every mark can carry the id of the claim it was recorded under
+        claim_ids = {}
+        if claims:
+            db.session.execute(insert(claim_table), claims)
+            keys = {(c['branch'], c['semester'], c['date'], c['period']) for c in claims}
+            claim_ids = {(b, s, d, p): i for i, b, s, d, p in
+                         db.session.query(AttendanceSession.id, AttendanceSession.branch, AttendanceSession.semester,
+                                          AttendanceSession.date, AttendanceSession.period)
+                         .filter(AttendanceSession.date.between(claims[0]['date'], claims[-1]['date']))
+                         if (b, s, d, p) in keys}
+        for row in buffer:
+            row['session_id'] = claim_ids.get(row.pop('claim'))
+        db.session.execute(insert(table), buffer)
+        db.session.commit()
+
+    for term_index, term in enumerate(terms):
+        sections = []
+        for branch, admitted, students in cohorts:
+            semester = term_index - admitted + 1
+            if 1 <= semester <= FINAL_SEMESTER:
+                teachers = staff_ids['General' if semester <= 2 else branch]
+                codes = [f'{branch[:4]}{semester}{k + 1:02d}' for k in range(SUBJECTS_PER_SEMESTER)]
+                sections.append((branch, semester, teachers, codes, students))
+        for day in school_days(*term, rng):
+            for branch, semester, teachers, codes, students in sections:
+                # Timetable: the subject (and its teacher) of each period rotates by weekday
+                order = [(day.weekday() + p) % SUBJECTS_PER_SEMESTER for p in range(periods)]
+                subjects = [codes[k] for k in order]
+                staff = [teachers[k % len(teachers)] for k in order]
+                marks = section_rows(day, periods, staff, subjects, students, sick_until, rng)
+                for row in marks:
+                    row['claim'] = (branch, semester, day, row['period'])
+                buffer += marks
+                claims += section_claims(day, periods, staff, subjects, branch, semester, taken)
+                if len(buffer) >= batch_size:
+                    flush()
+                    written += len(buffer)
+                    buffer, claims = [], []
+                    rate = written / (time.perf_counter() - started)
+                    print(f"  {written:,} rows ({rate:,.0f} rows/s), at {day}")
+    if buffer:
+        flush()
+        written += len(buffer)
+    return written
+
+# =========================================================
+# === 4. CLI ===
+# =========================================================
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--years', type=int, default=3, help='academic years of attendance')
+    parser.add_argument('--size', type=int, default=60, help='students per cohort (about +/-10%%)')
+    parser.add_argument('--branches', help='comma separated; default: college_branches setting')
+    parser.add_argument('--staff-per-branch', type=int, default=6)
+    parser.add_argument('--periods', type=int, default=7)
+    parser.add_argument('--end-date', help='YYYY-MM-DD, default today')
+    parser.add_argument('--prefix', default='GEN', help='roll number / username prefix, must be unused')
+    parser.add_argument('--password', default='Generated@123')
+    parser.add_argument('--batch-size', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=7)
+    parser.add_argument('--skip-summaries', action='store_true', help='do not rebuild attendance summaries and section rollups')
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        if args.branches:
+            branches = [b.strip() for b in args.branches.split(',') if b.strip()]
+        else:
+            branches = [b for b in get_settings().branches if b != 'General'] or ['CSE', 'ECE', 'ME', 'CIVIL']
+        if Staff.query.filter(Staff.username.startswith(f'{args.prefix.lower()}_', autoescape=True)).first():
+            print(f"Data with prefix '{args.prefix}' already exists. Choose another --prefix.")
+            sys.exit(1)
+
+        end_date = date.fromisoformat(args.end_date) if args.end_date else date.today()
+        terms = terms_for(args.years, end_date)
+        current_term = len(terms) - 1
+        # Odd-term admissions: everyone who sits at least one generated term
+        admissions = [t for t in range(-(FINAL_SEMESTER - 1), len(terms)) if t % 2 == 0]
+
+        print(f"--- GENERATING {len(branches)} BRANCHES, {args.years} YEAR(S) ({terms[0][0]} to {end_date}) ---")
+        started = time.perf_counter()
+        staff_ids = create_staff_and_hods(branches, args.staff_per_branch, args.prefix, args.password)
+        cohorts = create_cohorts(branches, admissions, current_term, args.size, args.prefix, rng)
+        create_semesters(branches, terms[-1], current_term, admissions)
+        students = sum(len(c[2]) for c in cohorts)
+        print(f"Created {students:,} students in {len(cohorts)} cohorts and {sum(map(len, staff_ids.values()))} staff.")
+
+        rows = generate_attendance(terms, cohorts, staff_ids, args.periods, args.batch_size, rng)
+        print(f"Inserted {rows:,} attendance rows.")
+
+        if not args.skip_summaries:
+            print("Rebuilding attendance summaries...")
+            rebuild_summaries()
+            db.session.commit()
+            print("Rebuilding section rollups...")
+            rebuild_rollups()
+            db.session.commit()
+        invalidate_department_snapshots()
+        invalidate_rosters()
+        print(f"--- DONE in {time.perf_counter() - started:.0f} s (log in with password {args.password}) ---")
+
+if __name__ == '__main__':
+    main()
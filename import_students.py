@@ -0,0 +1,24 @@
+import sys
+from app import app, db
+from services.student_import import import_students, read_rows
+
+# Usage: python import_students.py students.csv [--no-update]
+if len(sys.argv) < 2:
+    print("Usage: python import_students.py <file.csv|file.xlsx> [--no-update]")
+    sys.exit(1)
+
+path = sys.argv[1]
+with app.app_context():
+    print(f"--- IMPORTING STUDENTS FROM {path} ---")
+    try:
+        with open(path, 'rb') as stream:
+            result = import_students(read_rows(stream, path), update_existing='--no-update' not in sys.argv)
+    except Exception as e:
+        # Batches committed before the error are kept; the roster caches were refreshed
+        db.session.rollback()
+        print(f"Error importing students: {e}")
+        sys.exit(1)
+
+    for row_number, roll_no, message in result.errors:
+        print(f"Row {row_number} ({roll_no or 'no roll no'}): {message}")
+    print(f"--- DONE: {result.inserted} added, {result.updated} updated, {result.skipped} skipped, {len(result.errors)} rejected ---")
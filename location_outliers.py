@@ -0,0 +1,36 @@
+import sys
+import time
+from datetime import datetime, timedelta
+from app import app
+from models.models import Staff
+from services.location_audit import load_columns, staff_outliers
+from services.geofence_service import get_geofences
+
+# Scans the location audit log for proxy-attendance signs per staff member.
+# Usage: python location_outliers.py [--from YYYY-MM-DD] [--to YYYY-MM-DD] [--staff ID] [--limit 20]
+#        (default: the last 180 days)
+def arg(name, default=None):
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+with app.app_context():
+    end = datetime.strptime(arg('--to'), '%Y-%m-%d').date() if arg('--to') else datetime.now().date()
+    start = datetime.strptime(arg('--from'), '%Y-%m-%d').date() if arg('--from') else end - timedelta(days=180)
+    staff_id, limit = arg('--staff'), int(arg('--limit', 20))
+
+    print(f"--- LOCATION AUDIT {start} TO {end} ---")
+    started = time.perf_counter()
+    columns = load_columns(start, end, int(staff_id) if staff_id else None)
+    loaded = time.perf_counter() - started
+    report = staff_outliers(columns, fences=get_geofences())
+    print(f"Scanned {len(columns['staff_id']):,} submissions of {len(report)} staff "
+          f"(load {loaded:.2f} s, analysis {time.perf_counter() - started - loaded:.2f} s).")
+    if not report:
+        sys.exit(0)
+
+    names = dict(Staff.query.with_entities(Staff.staff_id, Staff.name).filter(Staff.staff_id.in_([r['staff_id'] for r in report[:limit]])))
+    print(f"{'staff':<28} | {'subs':>5} | {'refused':>7} | {'far':>4} | {'outside now':>11} | {'max spread m':>12} | last far submission")
+    for r in report[:limit]:
+        name = f"{names.get(r['staff_id'], '(deleted)')} #{r['staff_id']}"
+        outside = '-' if r['outside_fences_now'] is None else r['outside_fences_now']
+        print(f"{name[:28]:<28} | {r['submissions']:>5} | {r['refused']:>7} | {r['far_from_usual']:>4} | {outside:>11} | "
+              f"{r['max_spread_m']:>12.0f} | {r['last_far_at'] or '-'}")
@@ -1,3 +1,4 @@
+import json
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
@@ -71,10 +72,20 @@ class Attendance(db.Model):
     subject = db.Column(db.String(100), nullable=False)
     status = db.Column(db.Enum('Present', 'Absent', name='attendance_status'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
+    # attendance_session claim the sheet was recorded under (NULL for older rows); gives the class's semester
+    session_id = db.Column(db.Integer)
     
     student = db.relationship('Student', backref='attendances')
     staff = db.relationship('Staff', backref='attendances')
 
+    # Mirrors database/schema.sql and covers the hot lookups:
+    # per-student history, per-staff history and the "already taken" check
+    __table_args__ = (
+        db.UniqueConstraint('student_id', 'date', 'period', name='unique_period_attendance'),
+        db.Index('ix_attendance_staff_date', 'staff_id', 'date'),
+        db.Index('ix_attendance_date_period', 'date', 'period'),
+    )
+
 # --- 6. SEMESTER MODEL ---
 class Semester(db.Model):
     __tablename__ = 'semesters'
@@ -90,4 +101,170 @@ class Setting(db.Model):
     __tablename__ = 'settings'
     id = db.Column(db.Integer, primary_key=True)
     setting_key = db.Column(db.String(50), unique=True, nullable=False)
-    setting_value = db.Column(db.String(255))
\ No newline at end of file
+    setting_value = db.Column(db.String(255))
+
+# --- 8. NOTIFICATION OUTBOX (Queued SMS) ---
+class NotificationOutbox(db.Model):
+    __tablename__ = 'notification_outbox'
+    id = db.Column(db.Integer, primary_key=True)
+    to_number = db.Column(db.String(15), nullable=False)
+    notify_date = db.Column(db.Date, nullable=False)
+    # One line per absence, merged while the message is still pending
+    details = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(10), nullable=False, default='pending')  # pending / sending / sent / failed
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, default=datetime.utcnow)
+    last_error = db.Column(db.String(255))
+    claim_token = db.Column(db.String(32))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_outbox_parent_day', 'to_number', 'notify_date', 'status'),
+        db.Index('ix_outbox_due', 'status', 'next_attempt_at'),
+    )
+
+# --- 9. STUDENT ATTENDANCE SUMMARY (Precomputed percentages) ---
+class StudentAttendanceSummary(db.Model):
+    __tablename__ = 'student_attendance_summary'
+    student_id = db.Column(db.Integer, db.ForeignKey('student.student_id'), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    present = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    @property
+    def percentage(self):
+        return (self.present / self.total * 100) if self.total else 0
+
+class StudentSubjectSummary(db.Model):
+    __tablename__ = 'student_subject_summary'
+    student_id = db.Column(db.Integer, db.ForeignKey('student.student_id'), primary_key=True)
+    subject = db.Column(db.String(100), primary_key=True)
+    total = db.Column(db.Integer, nullable=False, default=0)
+    present = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def percentage(self):
+        return (self.present / self.total * 100) if self.total else 0
+
+# --- 10. ATTENDANCE ARCHIVE (Rows moved out of the live table) ---
+class AttendanceArchive(db.Model):
+    __tablename__ = 'attendance_archive'
+    # Keeps the original attendance id; no foreign keys so rows survive student/staff deletion
+    id = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    staff_id = db.Column(db.Integer)
+    student_id = db.Column(db.Integer)
+    date = db.Column(db.Date, nullable=False)
+    period = db.Column(db.Integer, nullable=False)
+    subject = db.Column(db.String(100), nullable=False)
+    status = db.Column(db.String(10), nullable=False)
+    timestamp = db.Column(db.DateTime)
+    session_id = db.Column(db.Integer)
+    archived_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Read-only link so archived history renders like live rows (staff may be deleted)
+    staff = db.relationship('Staff', primaryjoin='foreign(AttendanceArchive.staff_id) == Staff.staff_id', viewonly=True)
+
+    __table_args__ = (
+        db.Index('ix_attendance_archive_student', 'student_id', 'date', 'period'),
+        db.Index('ix_attendance_archive_date', 'date'),
+    )
+
+# --- 11. PURGE JOBS (Background chunked deletes) ---
+class PurgeJob(db.Model):
+    __tablename__ = 'purge_jobs'
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # student / staff / all_students
+    target_id = db.Column(db.Integer)
+    target_label = db.Column(db.String(150))
+    archive = db.Column(db.Boolean, nullable=False, default=False)
+    status = db.Column(db.String(10), nullable=False, default='queued')  # queued / running / done / failed
+    total = db.Column(db.Integer, nullable=False, default=0)
+    deleted = db.Column(db.Integer, nullable=False, default=0)
+    error = db.Column(db.String(255))
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+
+    @property
+    def progress(self):
+        return int(self.deleted / self.total * 100) if self.total else (100 if self.status == 'done' else 0)
+
+# --- 12. ATTENDANCE SESSION (One claim per section period) ---
+class AttendanceSession(db.Model):
+    __tablename__ = 'attendance_session'
+    id = db.Column(db.Integer, primary_key=True)
+    branch = db.Column(db.String(50), nullable=False)
+    semester = db.Column(db.Integer, nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    period = db.Column(db.Integer, nullable=False)
+    subject = db.Column(db.String(100))
+    staff_id = db.Column(db.Integer, db.ForeignKey('staff.staff_id', ondelete='SET NULL'))
+    status = db.Column(db.String(10), nullable=False, default='claimed')  # claimed / submitted
+    # Changes on every takeover, so two staff racing for a stale claim cannot both win
+    token = db.Column(db.String(32), nullable=False)
+    claimed_at = db.Column(db.DateTime, default=datetime.utcnow)
+    submitted_at = db.Column(db.DateTime)
+    # Id generated by the browser for an offline-queued sheet; a re-sync with it is a no-op
+    client_id = db.Column(db.String(36), unique=True)
+
+    staff = db.relationship('Staff')
+
+    # The unique key is the lock: the first INSERT wins, everyone else gets IntegrityError
+    __table_args__ = (
+        db.UniqueConstraint('branch', 'semester', 'date', 'period', name='unique_section_period'),
+    )
+
+# --- 13. GEOFENCE (Extra campuses / annexes; the main campus circle stays in settings) ---
+class Geofence(db.Model):
+    __tablename__ = 'geofence'
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    kind = db.Column(db.String(10), nullable=False)  # circle / polygon
+    center_lat = db.Column(db.Float)
+    center_lon = db.Column(db.Float)
+    radius_m = db.Column(db.Float)
+    # Polygon vertices as JSON [[lat, lon], ...]
+    points = db.Column(db.Text)
+    is_active = db.Column(db.Boolean, default=True)
+
+    @property
+    def point_count(self):
+        return len(json.loads(self.points)) if self.points else 0
+
+# --- 14. LOCATION AUDIT (Append-only; one narrow row per submission attempt) ---
+class LocationAudit(db.Model):
+    __tablename__ = 'location_audit'
+    id = db.Column(db.Integer, primary_key=True)
+    # YYYYMM: scans of a term read a contiguous slice of the (month, staff_id) index
+    month = db.Column(db.Integer, nullable=False)
+    staff_id = db.Column(db.Integer, nullable=False)  # no FK: the trail outlives deleted staff
+    submitted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    # Metres outside the nearest geofence (0 inside); NULL when no fence was configured
+    distance_m = db.Column(db.Float)
+    accepted = db.Column(db.Boolean, nullable=False)  # passed the location check
+
+    __table_args__ = (
+        db.Index('ix_location_audit_month_staff', 'month', 'staff_id'),
+    )
+
+# --- 15. SECTION ROLLUP (One row per submitted section period; feeds the trend charts) ---
+class SectionRollup(db.Model):
+    __tablename__ = 'section_rollup'
+    id = db.Column(db.Integer, primary_key=True)
+    branch = db.Column(db.String(50), nullable=False)
+    semester = db.Column(db.Integer, nullable=False)
+    date = db.Column(db.Date, nullable=False)
+    period = db.Column(db.Integer, nullable=False)
+    subject = db.Column(db.String(100))
+    staff_id = db.Column(db.Integer)  # no FK: history stays when staff are deleted
+    present = db.Column(db.Integer, nullable=False, default=0)
+    absent = db.Column(db.Integer, nullable=False, default=0)
+
+    # One row per section period, like its attendance_session claim
+    __table_args__ = (
+        db.UniqueConstraint('branch', 'semester', 'date', 'period', name='unique_section_rollup'),
+        db.Index('ix_section_rollup_date_branch', 'date', 'branch'),
+    )
@@ -0,0 +1,15 @@
+import sys
+from app import app, db
+from services.summary_service import rebuild_summaries
+
+# Usage: python rebuild_attendance_summary.py [student_id ...]
+with app.app_context():
+    student_ids = [int(arg) for arg in sys.argv[1:]] or None
+    print("--- REBUILDING ATTENDANCE SUMMARIES ---")
+    try:
+        rebuild_summaries(student_ids)
+        db.session.commit()
+        print(f"Rebuilt summaries for {'all students' if student_ids is None else f'{len(student_ids)} student(s)'}.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"Error rebuilding summaries: {e}")
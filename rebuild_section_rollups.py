@@ -0,0 +1,20 @@
+import sys
+from datetime import datetime
+from app import app, db
+from services.rollup_service import rebuild_rollups
+
+# Recomputes the section rollups behind the HOD/admin trend charts from raw attendance.
+# Usage: python rebuild_section_rollups.py [--from YYYY-MM-DD] [--to YYYY-MM-DD]   (default: all history)
+def arg(name):
+    return datetime.strptime(sys.argv[sys.argv.index(name) + 1], '%Y-%m-%d').date() if name in sys.argv else None
+
+with app.app_context():
+    start, end = arg('--from'), arg('--to')
+    print(f"--- REBUILDING SECTION ROLLUPS ({start or 'beginning'} to {end or 'today'}) ---")
+    try:
+        rows = rebuild_rollups(start, end)
+        db.session.commit()
+        print(f"SUCCESS: {rows} section periods rolled up.")
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR: {e}")
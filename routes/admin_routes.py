@@ -1,9 +1,22 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+import json
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, current_app
 from flask_login import login_required, current_user
-from models.models import db, Student, Staff, Admin, HOD, Semester, Setting, Attendance
+from models.models import db, Student, Staff, Admin, HOD, Semester, Setting, PurgeJob, Geofence
 from functools import wraps
-from sqlalchemy import or_, func
+from sqlalchemy import or_
 from datetime import datetime
+from services.settings_service import get_settings, bump_settings_version, invalidate_settings
+from services.geofence_service import parse_points
+from services.summary_service import get_student_summary
+from services.history_service import fetch_history_page, history_page_json
+from services.dashboard_service import department_snapshot, department_students_page, invalidate_department_snapshots
+from services.roster_cache import invalidate_rosters
+from services.rollup_service import department_trends
+from services.student_import import import_students, read_rows
+from services.semester_service import promote_cohort, promotion_plan, promote_all
+from services.export_service import register_response, resolve_register_dates
+from services.purge_service import queue_purge
+from services.user_cache import invalidate_user
 
 admin_bp = Blueprint('admin', __name__)
 
@@ -18,18 +31,8 @@ def admin_required(f):
 
 # --- HELPER FUNCTION: Get Branches from Settings ---
 def get_college_branches():
-    """Fetch branches defined in Settings, ensuring General always exists."""
-    setting = Setting.query.filter_by(setting_key='college_branches').first()
-    branches = []
-    if setting and setting.setting_value:
-        # Split string by comma, strip whitespace, remove empty strings
-        branches = [b.strip() for b in setting.setting_value.split(',') if b.strip()]
-    
-    # Ensure 'General' always exists for First Year/Science staff
-    if "General" not in branches:
-        branches.append("General")
-    
-    return sorted(branches)
+    """Branches defined in Settings (cached), ensuring General always exists."""
+    return list(get_settings().branches)
 
 # --- Core Admin Routes ---
 @admin_bp.route('/dashboard')
@@ -60,11 +63,36 @@ def add_student():
         )
         db.session.add(new_student)
         db.session.commit()
+        invalidate_department_snapshots()
+        invalidate_rosters()
         flash(f'Student "{new_student.name}" added successfully!', 'success')
         return redirect(url_for('admin.view_students'))
     
     return render_template('admin/add_student.html', branches=branches)
 
+@admin_bp.route('/import-students', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def import_students_view():
+    result = None
+    if request.method == 'POST':
+        file = request.files.get('students_file')
+        if not file or file.filename == '':
+            flash('No selected file', 'danger'); return redirect(url_for('admin.import_students_view'))
+        if not file.filename.lower().endswith(('.csv', '.xlsx')):
+            flash('Invalid file type. Allowed: CSV, Excel (.xlsx)', 'danger'); return redirect(url_for('admin.import_students_view'))
+        try:
+            result = import_students(read_rows(file.stream, file.filename), update_existing=request.form.get('update_existing') == 'on')
+        except ImportError:
+            flash('Excel import needs the openpyxl package. Please upload a CSV.', 'danger'); return redirect(url_for('admin.import_students_view'))
+        except Exception as e:
+            db.session.rollback()
+            flash(f'Error importing students: {str(e)} Batches saved before the error were kept.', 'danger')
+            return redirect(url_for('admin.import_students_view'))
+        flash(f'Import finished: {result.inserted} added, {result.updated} updated, {result.skipped} skipped, {len(result.errors)} rejected.',
+              'success' if not result.errors else 'warning')
+    return render_template('admin/import_students.html', result=result)
+
 @admin_bp.route('/edit-student/<int:student_id>', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -79,6 +107,8 @@ def edit_student(student_id):
         student.parent_contact = request.form.get('parent_contact')
         
         db.session.commit()
+        invalidate_department_snapshots()
+        invalidate_rosters()
         flash('Student details updated successfully!', 'success')
         return redirect(url_for('admin.view_students'))
     return render_template('admin/edit_student.html', student=student, branches=branches)
@@ -88,25 +118,24 @@ def edit_student(student_id):
 @admin_required
 def delete_student(student_id):
     student = Student.query.get_or_404(student_id)
-    Attendance.query.filter_by(student_id=student.student_id).delete()
-    db.session.delete(student)
-    db.session.commit()
-    flash(f'Student "{student.name}" and their attendance history have been deleted.', 'success')
-    return redirect(url_for('admin.view_students'))
+    queue_purge('student', student.student_id, f"{student.name} ({student.roll_no})",
+                archive=request.form.get('archive') == 'on')
+    _wake_purge_worker()
+    flash(f'Deletion of "{student.name}" and their attendance history has been scheduled.', 'success')
+    return redirect(url_for('admin.purge_jobs'))
 
 @admin_bp.route('/delete-all-students', methods=['POST'])
 @login_required
 @admin_required
 def delete_all_students():
     try:
-        num_attendance = db.session.query(Attendance).delete()
-        num_students = db.session.query(Student).delete()
-        db.session.commit()
-        flash(f'Database Reset: Deleted {num_students} students and {num_attendance} attendance records.', 'success')
+        queue_purge('all_students', target_label='All students', archive=request.form.get('archive') == 'on')
+        _wake_purge_worker()
+        flash('Database Reset scheduled: all students and attendance records will be deleted in the background.', 'success')
     except Exception as e:
         db.session.rollback()
         flash(f'Error deleting students: {str(e)}', 'danger')
-    return redirect(url_for('admin.view_students'))
+    return redirect(url_for('admin.purge_jobs'))
 
 # --- STAFF MANAGEMENT ---
 @admin_bp.route('/add-staff', methods=['GET', 'POST'])
@@ -151,6 +180,7 @@ def edit_staff(staff_id):
         if new_password:
             staff.set_password(new_password)
         db.session.commit()
+        invalidate_user(staff)
         flash('Staff details updated successfully!', 'success')
         return redirect(url_for('admin.view_staff'))
     return render_template('admin/edit_staff.html', staff=staff, branches=branches)
@@ -160,11 +190,39 @@ def edit_staff(staff_id):
 @admin_required
 def delete_staff(staff_id):
     staff = Staff.query.get_or_404(staff_id)
-    Attendance.query.filter_by(staff_id=staff.staff_id).delete()
-    db.session.delete(staff)
-    db.session.commit()
-    flash(f'Staff member "{staff.name}" and their attendance logs have been deleted.', 'success')
-    return redirect(url_for('admin.view_staff'))
+    queue_purge('staff', staff.staff_id, f"{staff.name} ({staff.username})",
+                archive=request.form.get('archive') == 'on')
+    _wake_purge_worker()
+    flash(f'Deletion of staff member "{staff.name}" and their attendance logs has been scheduled.', 'success')
+    return redirect(url_for('admin.purge_jobs'))
+
+# --- BACKGROUND DELETES ---
+def _wake_purge_worker():
+    worker = current_app.extensions.get('purge_worker')
+    if worker:
+        worker.notify()
+
+# --- REQUEST METRICS ---
+@admin_bp.route('/metrics', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def metrics():
+    registry = current_app.extensions['metrics']
+    if request.method == 'POST':
+        registry.reset()
+        flash('Metrics reset.', 'success')
+        return redirect(url_for('admin.metrics'))
+    endpoints, n_plus_one_events = registry.snapshot()
+    return render_template('admin/metrics.html', endpoints=endpoints, n_plus_one_events=n_plus_one_events,
+                           started_at=registry.started_at, enabled=current_app.config['METRICS_ENABLED'])
+
+@admin_bp.route('/purge-jobs')
+@login_required
+@admin_required
+def purge_jobs():
+    jobs = PurgeJob.query.order_by(PurgeJob.id.desc()).limit(50).all()
+    active = any(job.status in ('queued', 'running') for job in jobs)
+    return render_template('admin/purge_jobs.html', jobs=jobs, active=active)
 
 # =========================================================
 # === HOD MANAGEMENT ROUTES ===
@@ -219,6 +277,7 @@ def edit_hod(hod_id):
                 hod.set_password(new_password)
             
             db.session.commit()
+            invalidate_user(hod)
             flash('HOD details updated successfully!', 'success')
             return redirect(url_for('admin.view_hods'))
 
@@ -239,6 +298,7 @@ def delete_hod(hod_id):
     hod = HOD.query.get_or_404(hod_id)
     db.session.delete(hod)
     db.session.commit()
+    invalidate_user(hod)
     flash('HOD account deleted.', 'success')
     return redirect(url_for('admin.view_hods'))
 
@@ -248,39 +308,33 @@ def delete_hod(hod_id):
 @admin_required
 def hod_details(hod_id):
     hod = HOD.query.get_or_404(hod_id)
-    
-    if hod.department == 'General':
-        # General HOD Stats
-        staff_count = Staff.query.filter_by(branch='General').count()
-        students = Student.query.filter(Student.semester <= 4).order_by(Student.roll_no).all()
-        student_count = len(students)
-        
-        # Graph Logic for Sem 1-4
-        semester_stats = db.session.query(Student.semester, func.count(Student.student_id))\
-            .filter(Student.semester <= 4)\
-            .group_by(Student.semester)\
-            .order_by(Student.semester).all()
-    else:
-        # Normal HOD Stats
-        staff_count = Staff.query.filter_by(branch=hod.department).count()
-        students = Student.query.filter_by(branch=hod.department).order_by(Student.roll_no).all()
-        student_count = len(students)
-        
-        semester_stats = db.session.query(Student.semester, func.count(Student.student_id))\
-            .filter_by(branch=hod.department)\
-            .group_by(Student.semester)\
-            .order_by(Student.semester).all()
+
+    # General HOD: 'General' staff + Sem 1-4 students (see department_student_filter)
+    snapshot = department_snapshot(hod.department)
+    semester_stats = sorted((sem, n) for sem, n in snapshot['semester_counts'].items() if sem is not None)
     
     sem_labels = [f"Sem {s[0]}" for s in semester_stats]
     sem_data = [s[1] for s in semester_stats]
 
     return render_template('admin/hod_details.html', 
                            hod=hod, 
-                           staff_count=staff_count, 
-                           student_count=student_count,
+                           staff_count=snapshot['staff_count'], 
+                           student_count=snapshot['student_count'],
                            sem_labels=sem_labels, 
                            sem_data=sem_data,
-                           students=students)
+                           trends=department_trends(hod.department))
+
+@admin_bp.route('/hod/<int:hod_id>/students')
+@login_required
+@admin_required
+def hod_students(hod_id):
+    """Paginated student list fragment for the HOD details page."""
+    hod = HOD.query.get_or_404(hod_id)
+    students = department_students_page(hod.department,
+                                        page=request.args.get('page', 1, type=int),
+                                        search=request.args.get('q', '').strip(),
+                                        semester=request.args.get('semester', type=int))
+    return render_template('admin/_hod_student_rows.html', students=students)
 
 # --- VIEW STUDENTS ---
 @admin_bp.route('/view-students')
@@ -332,11 +386,37 @@ def view_staff():
 @admin_required
 def student_details(student_id):
     student = Student.query.get_or_404(student_id)
-    records = db.session.query(Attendance).filter_by(student_id=student.student_id).order_by(Attendance.date.desc(), Attendance.period.desc()).all()
-    total = len(records)
-    present = len([r for r in records if r.status == 'Present'])
-    percentage = (present / total * 100) if total > 0 else 0
-    return render_template('admin/student_details.html', student=student, records=records, percentage=percentage)
+    records, next_cursor = fetch_history_page(student.student_id)
+    total, present, percentage = get_student_summary(student.student_id)
+    return render_template('admin/student_details.html', student=student, records=records, percentage=percentage,
+                           next_cursor=next_cursor, history_url=url_for('admin.student_history', student_id=student.student_id))
+
+@admin_bp.route('/student/<int:student_id>/history')
+@login_required
+@admin_required
+def student_history(student_id):
+    student = Student.query.get_or_404(student_id)
+    return jsonify(history_page_json(student.student_id, request.args.get('cursor')))
+
+@admin_bp.route('/export-register', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def export_register():
+    if request.method == 'POST':
+        branch, semester = request.form.get('branch'), request.form.get('semester', type=int)
+        try:
+            start_date, end_date = resolve_register_dates(branch, semester, request.form.get('start_date'), request.form.get('end_date'))
+        except ValueError:
+            flash('Invalid date format.', 'danger'); return redirect(url_for('admin.export_register'))
+        if not start_date:
+            flash('Choose a date range, or create this semester with start and end dates first.', 'warning')
+            return redirect(url_for('admin.export_register'))
+        try:
+            return register_response(branch, semester, start_date, end_date, request.form.get('format', 'csv'))
+        except ImportError:
+            flash('Excel export needs the openpyxl package. Please use CSV.', 'danger')
+    return render_template('export_register.html', action_url=url_for('admin.export_register'),
+                           branches=get_college_branches(), semesters=range(1, 7))
 
 @admin_bp.route('/manage-semesters', methods=['GET', 'POST'])
 @login_required
@@ -360,27 +440,38 @@ def manage_semesters():
 @admin_required
 def end_semester(sem_id):
     sem = Semester.query.get_or_404(sem_id)
-    sem.is_active = False
-    students = Student.query.filter_by(branch=sem.branch, semester=sem.semester_num).all()
-    promoted_count = 0
-    graduated_count = 0
-    for student in students:
-        try:
-            if student.semester is None: continue
-            current_sem = int(student.semester)
-            if current_sem < 6:
-                student.semester = current_sem + 1
-                promoted_count += 1
-            elif current_sem == 6:
-                student.semester = None
-                graduated_count += 1
-        except: continue
-    db.session.commit()
+    try:
+        sem.is_active = False
+        promoted_count, graduated_count = promote_cohort(sem.branch, int(sem.semester_num))
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        flash(f'Error ending semester: {str(e)}', 'danger')
+        return redirect(url_for('admin.manage_semesters'))
+    invalidate_department_snapshots()
+    invalidate_rosters()
     msg = f'Semester ended. {promoted_count} promoted.'
     if graduated_count > 0: msg += f' {graduated_count} graduates archived.'
     flash(msg, 'success')
     return redirect(url_for('admin.manage_semesters'))
 
+@admin_bp.route('/promote-all', methods=['GET', 'POST'])
+@login_required
+@admin_required
+def promote_all_branches():
+    # GET is the dry run: what would move, per branch and semester
+    if request.method == 'GET':
+        return render_template('admin/promote_all.html', plan=promotion_plan())
+    try:
+        promoted_count, graduated_count = promote_all()
+    except Exception as e:
+        flash(f'Error promoting students: {str(e)}', 'danger')
+        return redirect(url_for('admin.promote_all_branches'))
+    invalidate_department_snapshots()
+    invalidate_rosters()
+    flash(f'All branches rolled over. {promoted_count} promoted, {graduated_count} graduates archived.', 'success')
+    return redirect(url_for('admin.manage_semesters'))
+
 @admin_bp.route('/settings', methods=['GET', 'POST'])
 @login_required
 @admin_required
@@ -412,11 +503,54 @@ def settings():
                     new_setting = Setting(setting_key=key, setting_value=value)
                     db.session.add(new_setting)
 
+        bump_settings_version()
         db.session.commit()
+        invalidate_settings()
         flash('Settings updated successfully!', 'success')
         return redirect(url_for('admin.settings'))
     
     # GET Request: Display Settings
-    settings_list = Setting.query.all()
-    settings = {s.setting_key: s.setting_value for s in settings_list}
-    return render_template('admin/settings.html', settings=settings)
\ No newline at end of file
+    settings = get_settings().raw
+    geofences = Geofence.query.order_by(Geofence.name).all()
+    return render_template('admin/settings.html', settings=settings, geofences=geofences)
+
+@admin_bp.route('/settings/geofences', methods=['POST'])
+@login_required
+@admin_required
+def add_geofence():
+    name, kind = request.form.get('name', '').strip(), request.form.get('kind')
+    try:
+        if not name:
+            raise ValueError('A name is required.')
+        if kind == 'circle':
+            lat, lon, radius = float(request.form['center_lat']), float(request.form['center_lon']), float(request.form['radius_m'])
+            if not (-90 <= lat <= 90 and -180 <= lon <= 180) or radius <= 0:
+                raise ValueError('Latitude, longitude or radius is out of range.')
+            fence = Geofence(name=name, kind='circle', center_lat=lat, center_lon=lon, radius_m=radius)
+        elif kind == 'polygon':
+            fence = Geofence(name=name, kind='polygon', points=json.dumps(parse_points(request.form.get('points', ''))))
+        else:
+            raise ValueError('Unknown geofence type.')
+    except (KeyError, ValueError) as e:
+        flash(f'Geofence not saved: {e}', 'danger')
+        return redirect(url_for('admin.settings'))
+
+    db.session.add(fence)
+    # Location checks recompile their fences when the settings version changes
+    bump_settings_version()
+    db.session.commit()
+    invalidate_settings()
+    flash(f'Geofence "{name}" added.', 'success')
+    return redirect(url_for('admin.settings'))
+
+@admin_bp.route('/settings/geofences/<int:fence_id>/delete', methods=['POST'])
+@login_required
+@admin_required
+def delete_geofence(fence_id):
+    fence = Geofence.query.get_or_404(fence_id)
+    db.session.delete(fence)
+    bump_settings_version()
+    db.session.commit()
+    invalidate_settings()
+    flash(f'Geofence "{fence.name}" removed.', 'success')
+    return redirect(url_for('admin.settings'))
\ No newline at end of file
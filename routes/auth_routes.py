@@ -1,12 +1,12 @@
-import os
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session
 from flask_login import login_user, logout_user, login_required, current_user
 from models.models import db, Admin, Staff, HOD
 import random
 from datetime import datetime, timedelta
 from werkzeug.security import generate_password_hash, check_password_hash
-from werkzeug.utils import secure_filename
 from services.sms_service import send_otp_sms
+from services.user_cache import invalidate_user
+from services.upload_service import save_upload, remove_upload, queue_thumbnails, PROFILE_DIR
 from utils.validators import is_valid_username, is_valid_password
 
 auth_bp = Blueprint('auth', __name__)
@@ -145,6 +145,7 @@ def profile():
                 current_user.email = request.form.get('email')
 
             db.session.commit()
+            invalidate_user(current_user)
             flash('Profile updated successfully.', 'success')
             return redirect(url_for('auth.profile'))
 
@@ -157,12 +158,15 @@ def profile():
                 flash('No selected file', 'danger'); return redirect(request.url)
             
             if file and allowed_file(file.filename):
-                filename = secure_filename(f"{current_user.get_id()}_{file.filename}")
-                if not os.path.exists(current_app.config['UPLOAD_FOLDER']):
-                    os.makedirs(current_app.config['UPLOAD_FOLDER'])
-                file.save(os.path.join(current_app.config['UPLOAD_FOLDER'], filename))
+                # Streamed to disk under a content-hashed name; thumbnails follow in the background
+                filename = save_upload(file, PROFILE_DIR)
+                old_image = current_user.profile_image
                 current_user.profile_image = filename
                 db.session.commit()
+                invalidate_user(current_user)
+                if old_image != filename:
+                    remove_upload(PROFILE_DIR, old_image)
+                queue_thumbnails(PROFILE_DIR, filename)
                 flash('Photo updated!', 'success')
                 return redirect(url_for('auth.profile'))
             else:
@@ -174,8 +178,11 @@ def profile():
 @login_required
 def delete_profile_photo():
     if current_user.profile_image != 'default.png':
+        old_image = current_user.profile_image
         current_user.profile_image = 'default.png'
         db.session.commit()
+        invalidate_user(current_user)
+        remove_upload(PROFILE_DIR, old_image)
         flash('Photo removed.', 'info')
     return redirect(url_for('auth.profile'))
 
@@ -219,6 +226,7 @@ def change_password_verify():
                 current_user.otp_hash = None
                 current_user.otp_expiry = None
                 db.session.commit()
+                invalidate_user(current_user)
                 flash('Password changed!', 'success')
                 return redirect(url_for('auth.profile'))
             flash('Invalid OTP.', 'danger')
@@ -308,6 +316,7 @@ def reset_password():
             user.otp_hash = None
             user.otp_expiry = None
             db.session.commit()
+            invalidate_user(user)
             session.clear()
             flash('Password reset. Login now.', 'success')
             return redirect(url_for(f'auth.{user_type}_login'))
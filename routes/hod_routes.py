@@ -1,10 +1,16 @@
-import os
-from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
+from flask import Blueprint, render_template, redirect, url_for, flash, request, jsonify
 from flask_login import login_required, current_user
-from werkzeug.utils import secure_filename
 from sqlalchemy import func
-from models.models import db, HOD, Staff, Student, Attendance
+from models.models import db, HOD, Staff, Student
 from functools import wraps
+from services.summary_service import get_student_summary, get_subject_summaries
+from services.history_service import fetch_history_page, history_page_json
+from services.dashboard_service import department_snapshot, department_students_page
+from services.rollup_service import department_trends
+from services.export_service import register_response, resolve_register_dates
+from services.settings_service import get_settings
+from services.archive_service import attendance_source
+from services.upload_service import save_upload, remove_upload, queue_thumbnails, TIMETABLE_DIR, PREVIEW_SIZE
 
 hod_bp = Blueprint('hod', __name__)
 
@@ -24,84 +30,114 @@ def hod_required(f):
 @hod_required
 def dashboard():
     dept = current_user.department
-    
-    # --- GENERAL HOD LOGIC ---
-    if dept == 'General':
-        # See only 'General' Staff
-        staff_count = Staff.query.filter_by(branch='General').count()
-        
-        # See ALL Students but ONLY Sem <= 4
-        students = Student.query.filter(Student.semester <= 4).order_by(Student.roll_no).all()
-    else:
-        # Normal HOD Logic
-        staff_count = Staff.query.filter_by(branch=dept).count()
-        students = Student.query.filter_by(branch=dept).order_by(Student.roll_no).all()
 
-    student_count = len(students)
-
-    # Graph Data (Based on the 'students' list fetched above)
-    sem_counts = [0] * 8 
-    for s in students:
-        try:
-            sem = int(s.semester) 
-            if 1 <= sem <= 8:
-                sem_counts[sem - 1] += 1
-        except: continue
+    # General HOD: 'General' staff + all students in Sem <= 4 (see department_student_filter)
+    snapshot = department_snapshot(dept)
 
+    # Graph Data (grouped counts, the student list itself is loaded lazily)
+    sem_counts = [snapshot['semester_counts'].get(sem, 0) for sem in range(1, 9)]
     sem_labels = [f"Sem {i}" for i in range(1, 9)]
     
     return render_template('hod/dashboard.html', 
                            dept=dept, 
-                           student_count=student_count, 
-                           staff_count=staff_count,
-                           students=students,      
+                           student_count=snapshot['student_count'], 
+                           staff_count=snapshot['staff_count'],
                            sem_labels=sem_labels,  
-                           sem_data=sem_counts)
+                           sem_data=sem_counts,
+                           trends=department_trends(dept))
 
-# --- 2. STUDENT DETAILS (Updated Security) ---
-@hod_bp.route('/student_details/<int:student_id>')
+@hod_bp.route('/dashboard/students')
 @login_required
 @hod_required
-def student_details(student_id):
-    student = Student.query.get_or_404(student_id)
+def dashboard_students():
+    """Paginated student list fragment for the dashboard."""
+    students = department_students_page(current_user.department,
+                                        page=request.args.get('page', 1, type=int),
+                                        search=request.args.get('q', '').strip(),
+                                        semester=request.args.get('semester', type=int))
+    return render_template('hod/_student_rows.html', students=students)
+
+def _can_view_student(student, flash_reason=False):
+    """General HOD sees Semesters 1-4 of every branch; other HODs see their own branch."""
     hod_dept = current_user.department
-
-    # --- AUTHORIZATION CHECK ---
-    authorized = False
     if hod_dept == 'General':
-        # General HOD can see any student as long as they are in Sem 1, 2, 3, or 4
         if student.semester and student.semester <= 4:
-            authorized = True
-        else:
-            flash("Access Denied: General HOD can only view students in Semesters 1-4.", "danger")
-    else:
-        # Normal HOD check
-        if hod_dept == student.branch:
-            authorized = True
-        else:
-            flash(f"Access Denied: You represent {hod_dept}, but student is in {student.branch}.", "danger")
+            return True
+        if flash_reason: flash("Access Denied: General HOD can only view students in Semesters 1-4.", "danger")
+        return False
+    if hod_dept == student.branch:
+        return True
+    if flash_reason: flash(f"Access Denied: You represent {hod_dept}, but student is in {student.branch}.", "danger")
+    return False
 
-    if not authorized:
+# --- 2. STUDENT DETAILS (Updated Security) ---
+@hod_bp.route('/student_details/<int:student_id>')
+@login_required
+@hod_required
+def student_details(student_id):
+    student = Student.query.get_or_404(student_id)
+    if not _can_view_student(student, flash_reason=True):
         return redirect(url_for('hod.dashboard'))
 
-    # Fetch Attendance
+    # Fetch Attendance (percentages come from the precomputed summary)
     try:
-        attendance_records = Attendance.query.filter_by(student_id=student.student_id).order_by(Attendance.date.desc()).all()
-        total_classes = len(attendance_records)
-        present_count = sum(1 for a in attendance_records if a.status == 'Present')
-        percentage = (present_count / total_classes * 100) if total_classes > 0 else 0
+        attendance_records, next_cursor = fetch_history_page(student.student_id)
+        total_classes, present_count, percentage = get_student_summary(student.student_id)
+        subject_summaries = get_subject_summaries(student.student_id)
     except:
-        attendance_records = []
+        attendance_records, next_cursor = [], None
         total_classes = 0
         present_count = 0
         percentage = 0
+        subject_summaries = []
 
     return render_template('hod/student_details.html', 
                            student=student,
                            attendance=attendance_records,
                            total=total_classes,
                            present=present_count,
-                           percentage=round(percentage, 2))
+                           percentage=round(percentage, 2),
+                           subject_summaries=subject_summaries,
+                           next_cursor=next_cursor,
+                           history_url=url_for('hod.student_history', student_id=student.student_id))
+
+@hod_bp.route('/student_details/<int:student_id>/history')
+@login_required
+@hod_required
+def student_history(student_id):
+    student = Student.query.get_or_404(student_id)
+    if not _can_view_student(student):
+        return jsonify({'error': 'Access denied.'}), 403
+    return jsonify(history_page_json(student.student_id, request.args.get('cursor')))
+
+# --- EXPORT REGISTER (own department only) ---
+@hod_bp.route('/export-register', methods=['GET', 'POST'])
+@login_required
+@hod_required
+def export_register():
+    dept = current_user.department
+    # General HOD exports Sem 1-4 of any branch; other HODs their own branch
+    branches = list(get_settings().branches) if dept == 'General' else [dept]
+    semesters = range(1, 5) if dept == 'General' else range(1, 7)
+
+    if request.method == 'POST':
+        branch, semester = request.form.get('branch'), request.form.get('semester', type=int)
+        if branch not in branches or semester not in semesters:
+            flash('Access Denied: You can only export registers for your department.', 'danger')
+            return redirect(url_for('hod.export_register'))
+        try:
+            start_date, end_date = resolve_register_dates(branch, semester, request.form.get('start_date'), request.form.get('end_date'))
+        except ValueError:
+            flash('Invalid date format.', 'danger'); return redirect(url_for('hod.export_register'))
+        if not start_date:
+            flash('Choose a date range, or ask the admin to create this semester with start and end dates.', 'warning')
+            return redirect(url_for('hod.export_register'))
+        try:
+            return register_response(branch, semester, start_date, end_date, request.form.get('format', 'csv'))
+        except ImportError:
+            flash('Excel export needs the openpyxl package. Please use CSV.', 'danger')
+    return render_template('export_register.html', action_url=url_for('hod.export_register'),
+                           branches=branches, semesters=semesters)
 
 # --- 3. VIEW STAFF LIST ---
 @hod_bp.route('/my-staff')
@@ -136,14 +172,16 @@ def staff_details(staff_id):
         flash("Access Denied: This staff member is not in your department.", "danger")
         return redirect(url_for('hod.view_dept_staff'))
 
+    # Includes archived years when there are any
+    source = attendance_source(staff_id=staff.staff_id)
     attendance_history = db.session.query(
-        Attendance.date, 
-        Attendance.period, 
-        Attendance.subject, 
-        func.count(Attendance.id).label('student_count')
-    ).filter_by(staff_id=staff.staff_id)\
-     .group_by(Attendance.date, Attendance.period, Attendance.subject)\
-     .order_by(Attendance.date.desc()).all()
+        source.c.date, 
+        source.c.period, 
+        source.c.subject, 
+        func.count(source.c.id).label('student_count')
+    ).filter(source.c.staff_id == staff.staff_id)\
+     .group_by(source.c.date, source.c.period, source.c.subject)\
+     .order_by(source.c.date.desc()).all()
 
     return render_template('hod/staff_details.html', staff=staff, history=attendance_history)
 
@@ -165,22 +203,19 @@ def upload_timetable(staff_id):
         return redirect(url_for('hod.staff_details', staff_id=staff_id))
 
     if file:
-        ext = file.filename.rsplit('.', 1)[1].lower()
+        ext = file.filename.rsplit('.', 1)[1].lower() if '.' in file.filename else ''
         if ext not in ['png', 'jpg', 'jpeg', 'pdf', 'doc', 'docx', 'xls', 'xlsx']:
             flash('Invalid file type. Allowed: Images, PDF, Word, Excel', 'danger')
             return redirect(url_for('hod.staff_details', staff_id=staff_id))
 
-        if staff.timetable_file:
-            old_path = os.path.join(current_app.root_path, 'static', 'uploads', 'timetables', staff.timetable_file)
-            if os.path.exists(old_path): os.remove(old_path)
-
-        filename = secure_filename(f"staff_{staff.staff_id}_timetable.{ext}")
-        upload_folder = os.path.join(current_app.root_path, 'static', 'uploads', 'timetables')
-        os.makedirs(upload_folder, exist_ok=True)
-        file.save(os.path.join(upload_folder, filename))
-        
+        # Streamed to disk under a content-hashed name; image previews are resized in the background
+        filename = save_upload(file, TIMETABLE_DIR)
+        old_file = staff.timetable_file
         staff.timetable_file = filename
         db.session.commit()
+        if old_file and old_file != filename:
+            remove_upload(TIMETABLE_DIR, old_file)
+        queue_thumbnails(TIMETABLE_DIR, filename, sizes=(PREVIEW_SIZE,))
         flash('Timetable uploaded successfully!', 'success')
         
     return redirect(url_for('hod.staff_details', staff_id=staff_id))
@@ -192,10 +227,10 @@ def upload_timetable(staff_id):
 def delete_timetable(staff_id):
     staff = Staff.query.get_or_404(staff_id)
     if staff.timetable_file:
-        file_path = os.path.join(current_app.root_path, 'static', 'uploads', 'timetables', staff.timetable_file)
-        if os.path.exists(file_path): os.remove(file_path)
+        old_file = staff.timetable_file
         staff.timetable_file = None
         db.session.commit()
+        remove_upload(TIMETABLE_DIR, old_file)
         flash('Timetable deleted successfully.', 'success')
     else:
         flash('No timetable found.', 'warning')
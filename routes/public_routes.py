@@ -1,11 +1,13 @@
-from flask import Blueprint, render_template, request, flash
-from models.models import Student, Attendance
+from flask import Blueprint, render_template, request, flash, jsonify, url_for
+from models.models import Student
+from services.summary_service import get_student_summary
+from services.history_service import fetch_history_page, history_page_json
 
 public_bp = Blueprint('public', __name__)
 
 @public_bp.route('/student', methods=['GET', 'POST'])
 def view_student_attendance():
-    student, records, percentage = None, [], 0
+    student, records, percentage, next_cursor = None, [], 0, None
     if request.method == 'POST':
         roll_no = request.form.get('roll_no', '').strip()
         if not roll_no:
@@ -13,17 +15,16 @@ def view_student_attendance():
         else:
             student = Student.query.filter_by(roll_no=roll_no).first()
             if student:
-                records = Attendance.query.filter_by(student_id=student.student_id).order_by(Attendance.date.desc(), Attendance.period.desc()).all()
-                total = len(records)
-                present = len([r for r in records if r.status == 'Present'])
-                percentage = (present / total * 100) if total > 0 else 0
+                records, next_cursor = fetch_history_page(student.student_id)
+                total, present, percentage = get_student_summary(student.student_id)
             else:
                 flash(f'No student found with Roll Number "{roll_no}".', 'danger')
-    return render_template('public/student_view.html', student=student, records=records, percentage=percentage)
+    return render_template('public/student_view.html', student=student, records=records, percentage=percentage,
+                           next_cursor=next_cursor, history_url=url_for('public.student_history', roll_no=student.roll_no) if student else None)
 
 @public_bp.route('/parent', methods=['GET', 'POST'])
 def view_parent_attendance():
-    student, records, percentage = None, [], 0
+    student, records, percentage, next_cursor = None, [], 0, None
     if request.method == 'POST':
         phone_no = request.form.get('phone_no', '').strip()
         if not phone_no:
@@ -32,10 +33,17 @@ def view_parent_attendance():
             # We search the student table directly for the parent's contact number
             student = Student.query.filter_by(parent_contact=phone_no).first()
             if student:
-                records = Attendance.query.filter_by(student_id=student.student_id).order_by(Attendance.date.desc(), Attendance.period.desc()).all()
-                total = len(records)
-                present = len([r for r in records if r.status == 'Present'])
-                percentage = (present / total * 100) if total > 0 else 0
+                records, next_cursor = fetch_history_page(student.student_id)
+                total, present, percentage = get_student_summary(student.student_id)
             else:
                 flash(f'No student record found for the Parent Phone Number "{phone_no}".', 'danger')
-    return render_template('public/parent_view.html', student=student, records=records, percentage=percentage)
\ No newline at end of file
+    return render_template('public/parent_view.html', student=student, records=records, percentage=percentage,
+                           next_cursor=next_cursor, history_url=url_for('public.student_history', roll_no=student.roll_no) if student else None)
+
+@public_bp.route('/history')
+def student_history():
+    """JSON 'load more' for the student and parent views (keyset on date, period)."""
+    student = Student.query.filter_by(roll_no=request.args.get('roll_no', '').strip()).first()
+    if not student:
+        return jsonify({'error': 'Student not found.'}), 404
+    return jsonify(history_page_json(student.student_id, request.args.get('cursor')))
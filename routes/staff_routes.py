@@ -1,12 +1,16 @@
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, stream_template, request, redirect, url_for, flash, current_app, jsonify
 from flask_login import login_required, current_user
-from models.models import db, Student, Attendance, Staff, Setting
-from datetime import datetime
+from models.models import Staff
+from datetime import datetime, timedelta
+from werkzeug.datastructures import MultiDict
 import pytz # <--- Import pytz for Timezone conversion
-from sqlalchemy import distinct
 from functools import wraps
-from math import sin, cos, sqrt, atan2, radians
-from services.sms_service import send_absent_notification_sms
+from services.settings_service import get_settings
+from services.geofence_service import get_geofences
+from services.location_audit import record_location
+from services.roster_cache import get_roster, get_catalogue
+from services.period_service import open_conflict, record_sheet, CONFLICT, ALREADY_SUBMITTED, REJECTED
+from services.report_service import clamp_range, staff_sessions_report, staff_session_detail, staff_report_filters
 
 staff_bp = Blueprint('staff', __name__)
 
@@ -25,11 +29,6 @@ def staff_required(f):
         return f(*args, **kwargs)
     return decorated_function
 
-def calculate_distance(lat1, lon1, lat2, lon2):
-    R = 6371e3; lat1_rad, lat2_rad = radians(lat1), radians(lat2); delta_lat, delta_lon = radians(lat2 - lat1), radians(lon2 - lon1)
-    a = sin(delta_lat / 2)**2 + cos(lat1_rad) * cos(lat2_rad) * sin(delta_lon / 2)**2
-    c = 2 * atan2(sqrt(a), sqrt(1 - a)); return R * c
-
 @staff_bp.route('/dashboard', methods=['GET', 'POST'])
 @login_required
 @staff_required
@@ -44,82 +43,190 @@ def dashboard():
         if not all([branch, semester, period, subject]):
             flash('All fields are required.', 'danger'); return redirect(url_for('staff.dashboard'))
         
-        existing = Attendance.query.join(Student).filter(Student.branch == branch, Student.semester == semester, Attendance.date == today, Attendance.period == period).first()
-        if existing:
-            flash(f'Attendance for {branch} (Sem {semester}) for period {period} has already been taken by {existing.staff.name}.', 'warning'); return redirect(url_for('staff.dashboard'))
-        
-        students = Student.query.filter_by(branch=branch, semester=semester).order_by(Student.roll_no).all()
+        students = get_roster(branch, semester)
         if not students:
             flash('No students found for the selected criteria.', 'warning'); return redirect(url_for('staff.dashboard'))
+
+        # Nothing is reserved while the sheet is open; the period is claimed when it is submitted
+        conflict = open_conflict(current_user.staff_id, branch, semester, today, period,
+                                 claim_ttl=current_app.config['ATTENDANCE_CLAIM_TTL'])
+        if conflict:
+            flash(conflict, 'warning'); return redirect(url_for('staff.dashboard'))
         
-        return render_template('staff/mark_attendance.html', students=students, date=today.strftime('%d-%m-%Y'), period=period, subject=subject)
+        return render_template('staff/mark_attendance.html', students=students, date=today.strftime('%d-%m-%Y'), sheet_date=today.isoformat(), period=period, subject=subject, branch=branch, semester=semester)
     
-    branches = [b[0] for b in db.session.query(distinct(Student.branch)).order_by(Student.branch).all()]
-    semesters = [s[0] for s in db.session.query(distinct(Student.semester)).order_by(Student.semester).all()]
+    branches, semesters = get_catalogue()
     return render_template('staff/dashboard.html', branches=branches, semesters=semesters)
 
+def location_error(settings, user_lat, user_lon):
+    """
+    Why a submission from (user_lat, user_lon) is refused, or None when it may go
+    ahead. Every reported location is written to the audit log, refused or not.
+    """
+    if user_lat is None or user_lon is None:
+        return 'Location data not provided. Please enable location services.' if settings.geolocation_enabled else None
+    fences = get_geofences()
+    inside, nearest, distance = fences.check(user_lat, user_lon) if not fences.empty else (True, None, None)
+
+    error = None
+    if settings.geolocation_enabled:
+        if fences.empty:
+            error = 'Geolocation settings are not fully configured by the admin.'
+        elif not inside:
+            error = f'Attendance submission failed. You are {int(distance)} meters away from {nearest}.'
+    record_location(current_user.staff_id, user_lat, user_lon, None if fences.empty else distance, accepted=error is None)
+    return error
+
 @staff_bp.route('/submit-attendance', methods=['POST'])
 @login_required
 @staff_required
 def submit_attendance():
-    settings = {s.setting_key: s.setting_value for s in Setting.query.all()}
-    if settings.get('geolocation_enabled') == 'true':
-        user_lat, user_lon = request.form.get('latitude', type=float), request.form.get('longitude', type=float)
-        if user_lat is None or user_lon is None:
-            flash('Location data not provided. Please enable location services.', 'danger'); return redirect(url_for('staff.dashboard'))
-        if not all(k in settings for k in ['college_latitude', 'college_longitude', 'allowed_radius_meters']):
-            flash('Geolocation settings are not fully configured by the admin.', 'danger'); return redirect(url_for('staff.dashboard'))
-        college_lat, college_lon = float(settings.get('college_latitude')), float(settings.get('college_longitude'))
-        allowed_radius = int(settings.get('allowed_radius_meters'))
-        distance = calculate_distance(college_lat, college_lon, user_lat, user_lon)
-        if distance > allowed_radius:
-            flash(f'Attendance submission failed. You are {int(distance)} meters away from campus.', 'danger'); return redirect(url_for('staff.dashboard'))
+    settings = get_settings()
+    error = location_error(settings, request.form.get('latitude', type=float), request.form.get('longitude', type=float))
+    if error:
+        flash(error, 'danger'); return redirect(url_for('staff.dashboard'))
     
-    student_ids, period, subject = request.form.getlist('student_id'), request.form.get('period'), request.form.get('subject')
+    period, subject = request.form.get('period'), request.form.get('subject')
+    branch, semester = request.form.get('branch'), request.form.get('semester')
     
     # GET EXACT IST TIME
     ist_now = get_ist_time()
     attendance_date = ist_now.date()
     time_str = ist_now.strftime('%I:%M %p') # e.g., "10:30 AM"
 
-    if not all([period, subject]):
+    if not all([period, subject, branch, semester]):
         flash('Error: Period or Subject information was missing.', 'danger'); return redirect(url_for('staff.dashboard'))
 
-    for student_id in student_ids:
-        status = request.form.get(f'status_{student_id}')
-        if status:
-            record = Attendance(staff_id=current_user.staff_id, student_id=student_id, date=attendance_date, period=int(period), subject=subject, status=status)
-            db.session.add(record)
-            if status == 'Absent':
-                student = Student.query.get(student_id)
-                if student and student.parent_contact:
-                    # Pass the IST Time string to the SMS service
-                    send_absent_notification_sms(
-                        to_number=student.parent_contact, 
-                        student_name=student.name, 
-                        date_str=attendance_date.strftime('%d-%b-%Y'), 
-                        period=period,
-                        subject=subject,
-                        time_str=time_str # <--- This is now IST time
-                    )
-    
-    db.session.commit()
+    # The section-period claim decides whether this sheet is new, a retry or someone else's
+    outcome, conflict = record_sheet(current_user.staff_id, request.form, attendance_date, period, subject, branch, semester, time_str)
+    if outcome == CONFLICT:
+        flash(conflict, 'warning'); return redirect(url_for('staff.dashboard'))
+    if outcome == ALREADY_SUBMITTED:
+        flash(f'Attendance for period {period} was already recorded.', 'info'); return redirect(url_for('staff.dashboard'))
+    if outcome == REJECTED:
+        flash(conflict, 'danger'); return redirect(url_for('staff.dashboard'))
+
     success_message = f'Attendance for period {period} submitted successfully at {time_str}!'
-    if settings.get('geolocation_enabled') == 'true':
+    if settings.geolocation_enabled:
         success_message = "Location Verified! " + success_message
     flash(success_message, 'success')
     return redirect(url_for('staff.dashboard'))
 
+# =========================================================
+# === JSON API (offline capture: the page queues sheets locally and syncs them) ===
+# =========================================================
+def staff_api_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated or not isinstance(current_user, Staff):
+            return jsonify({'error': 'Staff login required.'}), 401
+        return f(*args, **kwargs)
+    return decorated_function
+
+@staff_bp.route('/api/roster')
+@staff_api_required
+def api_roster():
+    branch, semester = request.args.get('branch'), request.args.get('semester', type=int)
+    if not branch or semester is None:
+        return jsonify({'error': 'branch and semester are required.'}), 400
+    students = get_roster(branch, semester)
+    return jsonify({'branch': branch, 'semester': semester,
+                    'students': [student._asdict() for student in students]})
+
+SYNC_FLASH_CATEGORIES = {'recorded': 'success', 'duplicate': 'info', 'conflict': 'warning', 'rejected': 'danger'}
+
+def _sync_one(sheet, settings, today):
+    """Records one queued sheet; returns its result entry for the sync response."""
+    client_id = str(sheet.get('client_id') or '')[:36]
+    result = {'client_id': client_id}
+    try:
+        branch, semester = sheet['branch'], int(sheet['semester'])
+        period, subject = int(sheet['period']), sheet['subject']
+        sheet_date = datetime.strptime(sheet.get('date') or today.isoformat(), '%Y-%m-%d').date()
+        statuses = {int(sid): status for sid, status in sheet['statuses'].items()}
+    except (KeyError, TypeError, ValueError, AttributeError):
+        return dict(result, status='rejected', message='Incomplete sheet.')
+    if not client_id or not subject or not statuses:
+        return dict(result, status='rejected', message='Incomplete sheet.')
+    # A queued sheet keeps the day it was taken, but cannot be back- or forward-dated freely
+    if not today - timedelta(days=current_app.config['ATTENDANCE_SYNC_MAX_AGE_DAYS']) <= sheet_date <= today:
+        return dict(result, status='rejected', message=f'Sheets dated {sheet_date} can no longer be synced.')
+
+    try:
+        user_lat, user_lon = float(sheet['latitude']), float(sheet['longitude'])
+    except (KeyError, TypeError, ValueError):
+        user_lat = user_lon = None
+    error = location_error(settings, user_lat, user_lon)
+    if error:
+        return dict(result, status='rejected', message=error)
+
+    form = MultiDict([('student_id', str(sid)) for sid in statuses])
+    form.update({f'status_{sid}': status for sid, status in statuses.items()})
+    outcome, conflict = record_sheet(current_user.staff_id, form, sheet_date, period, subject, branch, semester,
+                                     sheet.get('taken_at') or get_ist_time().strftime('%I:%M %p'), client_id=client_id)
+    if outcome == CONFLICT:
+        return dict(result, status='conflict', message=conflict)
+    if outcome == ALREADY_SUBMITTED:
+        return dict(result, status='duplicate', message=f'Attendance for period {period} was already recorded.')
+    if outcome == REJECTED:
+        return dict(result, status='rejected', message=conflict)
+    return dict(result, status='recorded', message=f'Attendance for {branch} (Sem {semester}) period {period} on {sheet_date} saved.')
+
+@staff_bp.route('/api/attendance/sync', methods=['POST'])
+@staff_api_required
+def api_sync_attendance():
+    """
+    Body: {"sheets": [{"client_id", "branch", "semester", "period", "subject", "date",
+    "taken_at", "latitude", "longitude", "statuses": {"<student_id>": "Present"|"Absent"}}]}.
+    Every sheet gets a final result (recorded, duplicate, conflict or rejected), so the
+    client can drop it from its queue; re-sending a sheet is always safe.
+    """
+    payload = request.get_json(silent=True) or {}
+    sheets = payload.get('sheets')
+    if not isinstance(sheets, list) or not sheets:
+        return jsonify({'error': 'No sheets to sync.'}), 400
+    limit = current_app.config['ATTENDANCE_SYNC_MAX_SHEETS']
+    if len(sheets) > limit:
+        return jsonify({'error': f'At most {limit} sheets per request.'}), 413
+
+    settings, today = get_settings(), get_ist_time().date()
+    results = [_sync_one(sheet if isinstance(sheet, dict) else {}, settings, today) for sheet in sheets]
+    # Shown on the next page the browser loads after syncing
+    for result in results:
+        flash(result['message'], SYNC_FLASH_CATEGORIES[result['status']])
+    return jsonify({'results': results})
+
 @staff_bp.route('/attendance-history', methods=['GET', 'POST'])
 @login_required
 @staff_required
 def attendance_history():
-    records, search_date = None, ""
-    if request.method == 'POST':
-        search_date = request.form.get('date')
-        if search_date:
-            try:
-                date_obj = datetime.strptime(search_date, '%Y-%m-%d').date()
-                records = Attendance.query.filter(Attendance.date == date_obj).join(Student).order_by(Attendance.period, Student.roll_no).all()
-            except ValueError: flash('Invalid date format.', 'danger')
-    return render_template('staff/attendance-history.html', records=records, search_date=search_date)
\ No newline at end of file
+    form = request.form if request.method == 'POST' else request.args
+    start_str = form.get('start_date') or form.get('date')
+    end_str = form.get('end_date') or start_str
+    filters = {'branch': form.get('branch') or None, 'semester': form.get('semester', type=int), 'subject': form.get('subject') or None}
+    subjects = staff_report_filters(current_user.staff_id)
+
+    sessions, start_date, end_date = None, None, None
+    if start_str:
+        try:
+            start_date, end_date = clamp_range(datetime.strptime(start_str, '%Y-%m-%d').date(),
+                                               datetime.strptime(end_str, '%Y-%m-%d').date())
+            # Only classes taken by the logged-in staff member, streamed in batches
+            sessions = staff_sessions_report(current_user.staff_id, start_date, end_date, **filters)
+        except ValueError: flash('Invalid date format.', 'danger')
+
+    return stream_template('staff/attendance-history.html', sessions=sessions, subjects=subjects, filters=filters,
+                           start_date=start_date.isoformat() if start_date else '', end_date=end_date.isoformat() if end_date else '')
+
+@staff_bp.route('/attendance-history/<date_str>/<int:period>')
+@login_required
+@staff_required
+def attendance_session_detail(date_str, period):
+    try:
+        date_obj = datetime.strptime(date_str, '%Y-%m-%d').date()
+    except ValueError:
+        flash('Invalid date format.', 'danger'); return redirect(url_for('staff.attendance_history'))
+    records = staff_session_detail(current_user.staff_id, date_obj, period)
+    if not records:
+        flash('No attendance taken by you was found for that class.', 'warning'); return redirect(url_for('staff.attendance_history'))
+    return render_template('staff/attendance-session.html', records=records, date=date_obj, period=period)
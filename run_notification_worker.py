@@ -0,0 +1,14 @@
+import os
+
+# The web processes must not compete with this dedicated worker
+os.environ['NOTIFICATION_WORKER_ENABLED'] = 'false'
+
+from app import app
+
+with app.app_context():
+    print("--- STARTING NOTIFICATION WORKER ---")
+    dispatcher = app.extensions['notification_dispatcher']
+    try:
+        dispatcher._loop()
+    except KeyboardInterrupt:
+        print("--- NOTIFICATION WORKER STOPPED ---")
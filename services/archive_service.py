@@ -0,0 +1,101 @@
+import time
+from datetime import date, datetime
+from flask import current_app
+from sqlalchemy import select, insert, union_all, literal
+from models.models import db, Attendance, AttendanceArchive, Setting
+from services.settings_service import get_settings, bump_settings_version, invalidate_settings, ARCHIVE_BEFORE_KEY
+
+COLUMNS = ('id', 'staff_id', 'student_id', 'date', 'period', 'subject', 'status', 'timestamp', 'session_id')
+
+# =========================================================
+# === 1. WHERE DOES A RANGE LIVE? ===
+# =========================================================
+def archive_boundary():
+    """First date still in the live table, or None if nothing has been archived."""
+    return get_settings().archive_before
+
+def reaches_archive(start_date=None):
+    """True when a range starting at start_date (None = all history) needs archived rows."""
+    boundary = archive_boundary()
+    return boundary is not None and (start_date is None or start_date < boundary)
+
+def attendance_source(start_date=None, end_date=None, **equals):
+    """
+    Selectable with the attendance columns (use `.c.<name>`) for the range.
+    It is the live table unless the range reaches the archive: wholly archived
+    ranges read attendance_archive alone, ranges across the boundary read a
+    UNION ALL of both with the range and `equals` filters inside each half.
+    """
+    live, archive = Attendance.__table__, AttendanceArchive.__table__
+    if not reaches_archive(start_date):
+        return live
+    if end_date is not None and end_date < archive_boundary():
+        return archive
+
+    def part(table):
+        query = select(*[table.c[name] for name in COLUMNS])
+        if start_date is not None: query = query.where(table.c.date >= start_date)
+        if end_date is not None: query = query.where(table.c.date <= end_date)
+        for name, value in equals.items():
+            query = query.where(table.c[name] == value)
+        return query
+
+    return union_all(part(live), part(archive)).subquery('attendance_all')
+
+def model_for_date(day):
+    """ORM model holding a single day's attendance."""
+    boundary = archive_boundary()
+    return AttendanceArchive if boundary is not None and day < boundary else Attendance
+
+# =========================================================
+# === 2. MOVING ROWS (archive_attendance.py, purge jobs) ===
+# =========================================================
+def copy_to_archive(ids):
+    """Copies live attendance rows into the archive, keeping their ids. Caller deletes and commits."""
+    db.session.execute(insert(AttendanceArchive.__table__).from_select(
+        list(COLUMNS) + ['archived_at'],
+        select(*[Attendance.__table__.c[name] for name in COLUMNS], literal(datetime.utcnow()))
+        .where(Attendance.id.in_(ids))
+    ))
+
+def academic_year_start(day=None):
+    """First day of the academic year containing `day` (today by default)."""
+    day = day or date.today()
+    month = current_app.config.get('ACADEMIC_YEAR_START_MONTH', 6)
+    year = day.year if day.month >= month else day.year - 1
+    return date(year, month, 1)
+
+def _set_boundary(before):
+    row = Setting.query.filter_by(setting_key=ARCHIVE_BEFORE_KEY).first()
+    if row:
+        row.setting_value = before.isoformat()
+    else:
+        db.session.add(Setting(setting_key=ARCHIVE_BEFORE_KEY, setting_value=before.isoformat()))
+    bump_settings_version()
+    db.session.commit()
+    invalidate_settings()
+
+def archive_before(before, chunk_size=5000, pause=0.05, progress=None):
+    """
+    Moves every live row dated before `before` into the archive in short
+    transactions. The boundary is published first, so while rows are moving
+    reads of the old range already look at both tables. Returns rows moved.
+    """
+    current = archive_boundary()
+    if current is None or before > current:
+        _set_boundary(before)
+
+    moved = 0
+    while True:
+        ids = [i for (i,) in db.session.query(Attendance.id).filter(Attendance.date < before)
+               .order_by(Attendance.id).limit(chunk_size)]
+        if not ids:
+            break
+        copy_to_archive(ids)
+        Attendance.query.filter(Attendance.id.in_(ids)).delete(synchronize_session=False)
+        db.session.commit()
+        moved += len(ids)
+        if progress:
+            progress(moved)
+        time.sleep(pause)
+    return moved
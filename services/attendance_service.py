@@ -0,0 +1,53 @@
+from sqlalchemy import insert
+from models.models import db, Student, Attendance
+from services.summary_service import apply_submission
+from services.rollup_service import apply_rollup
+
+VALID_STATUSES = ('Present', 'Absent')
+
+def load_roster(student_ids, branch=None, semester=None):
+    """Loads the section roster in a single query, keyed by student_id."""
+    query = db.session.query(Student.student_id, Student.name, Student.parent_contact)
+    if branch and semester:
+        query = query.filter(Student.branch == branch, Student.semester == semester)
+    else:
+        query = query.filter(Student.student_id.in_(student_ids))
+    return {row.student_id: row for row in query.all()}
+
+def ingest_period(staff_id, form, attendance_date, period, subject, branch=None, semester=None, session_id=None):
+    """
+    Validates a submitted attendance sheet in memory and writes the whole period
+    with one multi-row INSERT, each row linked to the claim it was recorded
+    under. Returns the rows and the roster rows of the absent students.
+    """
+    student_ids = []
+    for raw_id in form.getlist('student_id'):
+        try:
+            student_ids.append(int(raw_id))
+        except (TypeError, ValueError):
+            continue
+
+    roster = load_roster(student_ids, branch, semester)
+
+    rows, absentees = [], []
+    for student_id in student_ids:
+        status = form.get(f'status_{student_id}')
+        if status not in VALID_STATUSES or student_id not in roster:
+            continue
+        rows.append({
+            'staff_id': staff_id,
+            'student_id': student_id,
+            'date': attendance_date,
+            'period': int(period),
+            'subject': subject,
+            'status': status,
+            'session_id': session_id
+        })
+        if status == 'Absent':
+            absentees.append(roster[student_id])
+
+    if rows:
+        db.session.execute(insert(Attendance), rows)
+        apply_submission(rows)
+        apply_rollup(rows, branch, semester)
+    return rows, absentees
@@ -0,0 +1,44 @@
+from flask import current_app
+from sqlalchemy import func, or_
+from models.models import db, Staff, Student
+from utils.cache import TTLCache
+
+STUDENTS_PER_PAGE = 25
+
+_snapshots = TTLCache(maxsize=64)
+
+def department_student_filter(dept):
+    """General HOD covers Semesters 1-4 of every branch; others their own branch."""
+    if dept == 'General':
+        return Student.semester <= 4
+    return Student.branch == dept
+
+def _build_snapshot(dept):
+    staff_count = db.session.query(func.count(Staff.staff_id)).filter(Staff.branch == dept).scalar()
+    semester_counts = dict(
+        db.session.query(Student.semester, func.count(Student.student_id))
+        .filter(department_student_filter(dept))
+        .group_by(Student.semester).order_by(Student.semester).all()
+    )
+    # Alumni (semester None) count as students but are not charted
+    return {
+        'staff_count': staff_count,
+        'student_count': sum(semester_counts.values()),
+        'semester_counts': semester_counts
+    }
+
+def department_snapshot(dept):
+    """Grouped COUNT queries for a department dashboard, cached for DASHBOARD_CACHE_TTL seconds."""
+    return _snapshots.get_or_set(dept, lambda: _build_snapshot(dept), ttl=current_app.config.get('DASHBOARD_CACHE_TTL', 60))
+
+def invalidate_department_snapshots():
+    _snapshots.invalidate()
+
+def department_students_page(dept, page=1, search='', semester=None, per_page=STUDENTS_PER_PAGE):
+    """One page of the department's student list for the lazily loaded fragment."""
+    query = Student.query.filter(department_student_filter(dept))
+    if search:
+        query = query.filter(or_(Student.name.ilike(f'%{search}%'), Student.roll_no.ilike(f'%{search}%')))
+    if semester:
+        query = query.filter(Student.semester == semester)
+    return query.order_by(Student.roll_no).paginate(page=page, per_page=per_page, error_out=False)
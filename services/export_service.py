@@ -0,0 +1,118 @@
+import csv
+import io
+import tempfile
+from datetime import datetime
+from itertools import groupby
+from flask import Response, send_file, stream_with_context
+from sqlalchemy import select, func, and_, or_
+from models.models import db, Student, Semester, AttendanceSession
+from services.archive_service import attendance_source
+
+STREAM_BATCH = 1000
+
+def _section_marks(branch, semester, start_date, end_date):
+    """
+    Marks taken for the section in the range. A mark belongs to the section on
+    the submitted attendance_session claim it was recorded under, so students
+    promoted since stay in the register of the class they sat in; rows older
+    than the claims fall back to the student's current branch/semester.
+    """
+    source = attendance_source(start_date, end_date)
+    claim = AttendanceSession.__table__
+    student = Student.__table__
+    return select(source.c.student_id, source.c.date, source.c.period, source.c.status).select_from(
+        source.join(student, student.c.student_id == source.c.student_id)
+        .outerjoin(claim, and_(claim.c.id == source.c.session_id, claim.c.status == 'submitted'))
+    ).where(func.coalesce(claim.c.branch, student.c.branch) == branch,
+            func.coalesce(claim.c.semester, student.c.semester) == semester,
+            source.c.date.between(start_date, end_date)).subquery('section_marks')
+
+def register_slots(branch, semester, start_date, end_date):
+    """Distinct (date, period) classes held for the section in the range: the register columns."""
+    marks = _section_marks(branch, semester, start_date, end_date)
+    return db.session.query(marks.c.date, marks.c.period)\
+        .distinct().order_by(marks.c.date, marks.c.period).all()
+
+def _student_marks(branch, semester, start_date, end_date):
+    """
+    Every student who sat the section's classes in the range, plus its current
+    students without marks, with their marks: one row per mark, streamed.
+    """
+    marks = _section_marks(branch, semester, start_date, end_date)
+    return db.session.query(Student.student_id, Student.roll_no, Student.name,
+                            marks.c.date, marks.c.period, marks.c.status)\
+        .outerjoin(marks, marks.c.student_id == Student.student_id)\
+        .filter(or_(and_(Student.branch == branch, Student.semester == semester),
+                    Student.student_id.in_(select(marks.c.student_id))))\
+        .order_by(Student.roll_no, Student.student_id, marks.c.date, marks.c.period)\
+        .yield_per(STREAM_BATCH)
+
+def iter_register(branch, semester, start_date, end_date):
+    """
+    Yields the register as plain rows: a header, then one row per student with
+    P/A per (date, period) slot and totals. Only one student is held at a time.
+    """
+    slots = register_slots(branch, semester, start_date, end_date)
+    slot_index = {slot: i for i, slot in enumerate(slots)}
+    yield ['Roll No', 'Name'] + [f"{d.strftime('%d-%b-%Y')} P{p}" for d, p in slots] + ['Present', 'Total', 'Percentage']
+
+    for (_, roll_no, name), marks in groupby(_student_marks(branch, semester, start_date, end_date),
+                                             key=lambda r: (r.student_id, r.roll_no, r.name)):
+        cells, present, total = [''] * len(slots), 0, 0
+        for mark in marks:
+            if mark.date is None:
+                continue
+            cells[slot_index[(mark.date, mark.period)]] = 'P' if mark.status == 'Present' else 'A'
+            total += 1
+            present += mark.status == 'Present'
+        percentage = f"{present / total * 100:.2f}" if total else '0.00'
+        yield [roll_no, name] + cells + [present, total, percentage]
+
+def stream_register_csv(branch, semester, start_date, end_date):
+    """Generator of CSV text chunks for a streaming Flask response."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in iter_register(branch, semester, start_date, end_date):
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate(0)
+
+def write_register_xlsx(branch, semester, start_date, end_date):
+    """
+    Writes the register with openpyxl's write-only workbook (rows go straight to
+    disk) and returns the temporary file, rewound for sending.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=f"{branch} Sem {semester}"[:31])
+    for row in iter_register(branch, semester, start_date, end_date):
+        sheet.append(row)
+
+    output = tempfile.TemporaryFile(suffix='.xlsx')
+    workbook.save(output)
+    output.seek(0)
+    return output
+
+def register_response(branch, semester, start_date, end_date, file_format='csv'):
+    """Flask response for the register: streamed CSV, or an XLSX file."""
+    filename = f"register_{branch}_sem{semester}_{start_date.isoformat()}_{end_date.isoformat()}"
+    if file_format == 'xlsx':
+        return send_file(write_register_xlsx(branch, semester, start_date, end_date),
+                         mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+                         as_attachment=True, download_name=f"{filename}.xlsx")
+    return Response(stream_with_context(stream_register_csv(branch, semester, start_date, end_date)),
+                    mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename="{filename}.csv"'})
+
+def resolve_register_dates(branch, semester, start_str, end_str):
+    """Dates from the form, falling back to the Semester record's start/end dates."""
+    if start_str and end_str:
+        start_date = datetime.strptime(start_str, '%Y-%m-%d').date()
+        end_date = datetime.strptime(end_str, '%Y-%m-%d').date()
+        return (start_date, end_date) if start_date <= end_date else (end_date, start_date)
+    sem = Semester.query.filter_by(branch=branch, semester_num=semester).order_by(Semester.id.desc()).first()
+    if sem and sem.start_date and sem.end_date:
+        return sem.start_date, sem.end_date
+    return None, None
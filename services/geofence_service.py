@@ -0,0 +1,145 @@
+import json
+import threading
+import numpy as np
+from models.models import Geofence
+from services.settings_service import get_settings
+
+EARTH_RADIUS_M = 6371e3
+# Points per block in batch checks, bounds the points x edges matrices
+BLOCK_SIZE = 4096
+
+def parse_points(text):
+    """'lat, lon' per line -> [[lat, lon], ...]; raises ValueError on bad input."""
+    points = []
+    for line in text.strip().splitlines():
+        if not line.strip():
+            continue
+        lat, lon = (float(v) for v in line.replace(';', ',').split(','))
+        if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+            raise ValueError(f'Coordinate out of range: {line.strip()}')
+        points.append([lat, lon])
+    if len(points) < 3:
+        raise ValueError('A polygon needs at least 3 points.')
+    return points
+
+class CompiledFences:
+    """
+    All active fences projected once onto a local plane (equirectangular around
+    their common centre, accurate to well under a metre across a city), so a
+    check is a few array operations instead of trigonometry per fence.
+    """
+
+    def __init__(self, circles, polygons):
+        # circles: [(name, lat, lon, radius_m)], polygons: [(name, [[lat, lon], ...])]
+        self.names = [c[0] for c in circles] + [p[0] for p in polygons]
+        anchors = [(c[1], c[2]) for c in circles] + [pt for p in polygons for pt in p[1]]
+        self.empty = not anchors
+        if self.empty:
+            return
+        self.lat0, self.lon0 = np.mean(np.radians(anchors), axis=0)
+        self.cos_lat0 = np.cos(self.lat0)
+
+        self.circle_xy = self.project(np.array([c[1] for c in circles]), np.array([c[2] for c in circles])) \
+            if circles else np.empty((0, 2))
+        self.circle_r = np.array([c[3] for c in circles], dtype=float)
+
+        # Every polygon edge in one array; edge_owner maps an edge to its polygon
+        starts, ends, owners = [], [], []
+        for index, (_, points) in enumerate(polygons):
+            xy = self.project(*np.array(points, dtype=float).T)
+            starts.append(xy)
+            ends.append(np.roll(xy, -1, axis=0))
+            owners.append(np.full(len(xy), index))
+        self.edge_a = np.concatenate(starts) if polygons else np.empty((0, 2))
+        self.edge_b = np.concatenate(ends) if polygons else np.empty((0, 2))
+        self.edge_owner = np.concatenate(owners) if polygons else np.empty(0, dtype=int)
+        self.polygon_count = len(polygons)
+
+    def project(self, lats, lons):
+        """Degrees -> metres east/north of the fences' centre, shape (n, 2)."""
+        lats, lons = np.radians(np.asarray(lats, dtype=float)), np.radians(np.asarray(lons, dtype=float))
+        return np.column_stack(((lons - self.lon0) * self.cos_lat0 * EARTH_RADIUS_M, (lats - self.lat0) * EARTH_RADIUS_M))
+
+    def _block(self, xy):
+        """(signed distance to every fence, negative inside) for a block of points, shape (n, fences)."""
+        circle = np.linalg.norm(xy[:, None, :] - self.circle_xy[None, :, :], axis=2) - self.circle_r
+        if not self.polygon_count:
+            return circle
+
+        px, py = xy[:, 0:1], xy[:, 1:2]
+        ax, ay = self.edge_a[:, 0], self.edge_a[:, 1]
+        bx, by = self.edge_b[:, 0], self.edge_b[:, 1]
+        # Even-odd ray casting: count edges crossed by a ray going east from each point
+        straddles = (ay > py) != (by > py)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            cross_x = ax + (py - ay) * (bx - ax) / (by - ay)
+        crossings = straddles & (px < cross_x)
+        # Distance to each edge segment
+        ex, ey = bx - ax, by - ay
+        length2 = np.where(ex * ex + ey * ey == 0, 1, ex * ex + ey * ey)
+        t = np.clip(((px - ax) * ex + (py - ay) * ey) / length2, 0, 1)
+        edge_dist = np.hypot(px - (ax + t * ex), py - (ay + t * ey))
+
+        inside = np.zeros((len(xy), self.polygon_count), dtype=int)
+        nearest = np.full((len(xy), self.polygon_count), np.inf)
+        for index in range(self.polygon_count):
+            mask = self.edge_owner == index
+            inside[:, index] = crossings[:, mask].sum(axis=1) % 2
+            nearest[:, index] = edge_dist[:, mask].min(axis=1)
+        polygon = np.where(inside == 1, -nearest, nearest)
+        return np.hstack([circle, polygon])
+
+    def check_many(self, lats, lons):
+        """
+        Vectorised check of many points. Returns (inside, fence, distance): bool
+        array, index into self.names of the nearest fence, and metres outside it
+        (0 when inside).
+        """
+        xy = self.project(lats, lons)
+        inside = np.zeros(len(xy), dtype=bool)
+        fence = np.full(len(xy), -1)
+        distance = np.full(len(xy), np.inf)
+        if self.empty:
+            return inside, fence, distance
+        for start in range(0, len(xy), BLOCK_SIZE):
+            signed = self._block(xy[start:start + BLOCK_SIZE])
+            best = signed.argmin(axis=1)
+            best_value = signed[np.arange(len(signed)), best]
+            inside[start:start + BLOCK_SIZE] = best_value <= 0
+            fence[start:start + BLOCK_SIZE] = best
+            distance[start:start + BLOCK_SIZE] = np.maximum(best_value, 0)
+        return inside, fence, distance
+
+    def check(self, lat, lon):
+        """(inside, name of the nearest fence, metres outside it) for one point."""
+        inside, fence, distance = self.check_many([lat], [lon])
+        name = self.names[fence[0]] if fence[0] >= 0 else None
+        return bool(inside[0]), name, float(distance[0])
+
+# --- Compiled once per settings version (saving a fence bumps it) ---
+_lock = threading.Lock()
+_compiled = (None, None)
+
+def _build(settings):
+    circles, polygons = [], []
+    if settings.geolocation_configured:
+        circles.append(('Main campus', settings.college_latitude, settings.college_longitude, settings.allowed_radius_meters))
+    for fence in Geofence.query.filter_by(is_active=True).order_by(Geofence.id):
+        if fence.kind == 'circle':
+            circles.append((fence.name, fence.center_lat, fence.center_lon, fence.radius_m))
+        else:
+            polygons.append((fence.name, json.loads(fence.points)))
+    return CompiledFences(circles, polygons)
+
+def get_geofences():
+    """The compiled fences for the current settings; rebuilt only after a settings change."""
+    global _compiled
+    settings = get_settings()
+    with _lock:
+        version, fences = _compiled
+    if fences is not None and version == settings.version:
+        return fences
+    fences = _build(settings)
+    with _lock:
+        _compiled = (settings.version, fences)
+    return fences
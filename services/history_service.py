@@ -0,0 +1,59 @@
+from datetime import datetime
+from sqlalchemy import or_, and_
+from sqlalchemy.orm import joinedload
+from models.models import Attendance, AttendanceArchive
+from services.archive_service import archive_boundary
+
+PAGE_SIZE = 50
+
+def encode_cursor(record):
+    """Keyset cursor for (date desc, period desc), e.g. '2025-01-31_3'."""
+    return f"{record.date.isoformat()}_{record.period}"
+
+def decode_cursor(cursor):
+    try:
+        date_part, period_part = cursor.split('_')
+        return datetime.strptime(date_part, '%Y-%m-%d').date(), int(period_part)
+    except (AttributeError, ValueError):
+        return None
+
+def _page(model, student_id, position, limit):
+    query = model.query.options(joinedload(model.staff)).filter(model.student_id == student_id)
+    if position:
+        last_date, last_period = position
+        query = query.filter(or_(model.date < last_date,
+                                 and_(model.date == last_date, model.period < last_period)))
+    return query.order_by(model.date.desc(), model.period.desc()).limit(limit).all()
+
+def fetch_history_page(student_id, cursor=None, limit=PAGE_SIZE):
+    """
+    Returns (records, next_cursor) for one page of a student's history, newest
+    first. Only limit + 1 rows are read, whatever the length of the history.
+    Archived rows are all older than live ones, so the archive is read only
+    once a page runs past the end of the live table.
+    """
+    position = decode_cursor(cursor) if cursor else None
+    boundary = archive_boundary()
+
+    records = []
+    if not (position and boundary and position[0] < boundary):
+        records = _page(Attendance, student_id, position, limit + 1)
+    if len(records) <= limit and boundary:
+        records += _page(AttendanceArchive, student_id, position, limit + 1 - len(records))
+
+    next_cursor = encode_cursor(records[limit - 1]) if len(records) > limit else None
+    return records[:limit], next_cursor
+
+def serialize_record(record):
+    return {
+        'date': record.date.isoformat(),
+        'date_display': record.date.strftime('%d-%b-%Y'),
+        'period': record.period,
+        'subject': record.subject,
+        'status': record.status,
+        'staff': record.staff.name if record.staff else 'N/A'
+    }
+
+def history_page_json(student_id, cursor=None, limit=PAGE_SIZE):
+    records, next_cursor = fetch_history_page(student_id, cursor, limit)
+    return {'records': [serialize_record(r) for r in records], 'next_cursor': next_cursor}
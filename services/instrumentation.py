@@ -0,0 +1,181 @@
+import re
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
+from flask import g, request, has_request_context
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Upper bounds of the latency histogram, in milliseconds
+BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf'))
+
+_WHITESPACE = re.compile(r'\s+')
+_IN_LIST = re.compile(r'\((?:\s*(?:\?|%s|%\(\w+\)s)\s*,)+\s*(?:\?|%s|%\(\w+\)s)\s*\)')
+
+def normalize_statement(statement):
+    """Collapses whitespace and IN-lists so repeats of one query compare equal."""
+    return _IN_LIST.sub('(?, ...)', _WHITESPACE.sub(' ', statement).strip())
+
+class EndpointStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.buckets = [0] * len(BUCKETS_MS)
+        self.queries = 0
+        self.max_queries = 0
+        self.db_ms = 0.0
+        self.n_plus_one = 0
+        self.statuses = Counter()
+
+    def observe(self, elapsed_ms, queries, db_ms, status, n_plus_one):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[next(i for i, bound in enumerate(BUCKETS_MS) if elapsed_ms <= bound)] += 1
+        self.queries += queries
+        self.max_queries = max(self.max_queries, queries)
+        self.db_ms += db_ms
+        self.n_plus_one += bool(n_plus_one)
+        self.statuses[f'{status // 100}xx'] += 1
+
+    def percentile(self, pct):
+        """Upper bound of the bucket holding the pct-th request (histogram estimate)."""
+        target, seen = self.count * pct / 100, 0
+        for bound, hits in zip(BUCKETS_MS, self.buckets):
+            seen += hits
+            if hits and seen >= target:
+                return bound
+        return 0
+
+class MetricsRegistry:
+    """Per-process request metrics; every gunicorn worker keeps its own."""
+
+    def __init__(self, n_plus_one_threshold=10):
+        self.n_plus_one_threshold = n_plus_one_threshold
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.endpoints = {}
+            self.n_plus_one_events = deque(maxlen=50)
+            self.started_at = datetime.now()
+
+    def record(self, endpoint, elapsed_ms, queries, db_ms, status, statements):
+        repeated = [(sql, n) for sql, n in statements.most_common(3) if n >= self.n_plus_one_threshold]
+        with self._lock:
+            stats = self.endpoints.setdefault(endpoint, EndpointStats())
+            stats.observe(elapsed_ms, queries, db_ms, status, repeated)
+            for sql, n in repeated:
+                self.n_plus_one_events.appendleft({'endpoint': endpoint, 'statement': sql[:300],
+                                                   'count': n, 'at': datetime.now()})
+        return repeated
+
+    def snapshot(self):
+        with self._lock:
+            return sorted(self.endpoints.items(), key=lambda item: item[1].total_ms, reverse=True), list(self.n_plus_one_events)
+
+    def prometheus_text(self):
+        """The registry in the Prometheus text exposition format."""
+        endpoints, _ = self.snapshot()
+        lines = [
+            '# HELP http_request_duration_seconds Request latency by endpoint.',
+            '# TYPE http_request_duration_seconds histogram',
+        ]
+        for name, stats in endpoints:
+            cumulative = 0
+            for bound, hits in zip(BUCKETS_MS, stats.buckets):
+                cumulative += hits
+                le = '+Inf' if bound == float('inf') else f'{bound / 1000:g}'
+                lines.append(f'http_request_duration_seconds_bucket{{endpoint="{name}",le="{le}"}} {cumulative}')
+            lines.append(f'http_request_duration_seconds_sum{{endpoint="{name}"}} {stats.total_ms / 1000:.6f}')
+            lines.append(f'http_request_duration_seconds_count{{endpoint="{name}"}} {stats.count}')
+
+        counters = (
+            ('http_responses_total', 'Responses by endpoint and status class.', 'counter'),
+            ('db_queries_total', 'SQL statements executed while serving the endpoint.', 'counter'),
+            ('db_query_seconds_total', 'Time spent in SQL while serving the endpoint.', 'counter'),
+            ('n_plus_one_requests_total', 'Requests that repeated one statement at least the N+1 threshold.', 'counter'),
+        )
+        for metric, help_text, kind in counters:
+            lines += [f'# HELP {metric} {help_text}', f'# TYPE {metric} {kind}']
+            for name, stats in endpoints:
+                if metric == 'http_responses_total':
+                    lines += [f'{metric}{{endpoint="{name}",code="{code}"}} {n}' for code, n in sorted(stats.statuses.items())]
+                elif metric == 'db_queries_total':
+                    lines.append(f'{metric}{{endpoint="{name}"}} {stats.queries}')
+                elif metric == 'db_query_seconds_total':
+                    lines.append(f'{metric}{{endpoint="{name}"}} {stats.db_ms / 1000:.6f}')
+                else:
+                    lines.append(f'{metric}{{endpoint="{name}"}} {stats.n_plus_one}')
+        return '\n'.join(lines) + '\n'
+
+# =========================================================
+# === SQLALCHEMY HOOKS (count statements of the current request) ===
+# =========================================================
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_start'].pop()
+    if not has_request_context():
+        return
+    current = g.get('_metrics')
+    if current is not None:
+        current['queries'] += 1
+        current['db_ms'] += (time.perf_counter() - started) * 1000
+        current['statements'][normalize_statement(statement)] += 1
+
+def _handle_error(context):
+    # The statement failed, so after_cursor_execute will not pop its start time
+    if context.connection is not None and context.connection.info.get('query_start'):
+        context.connection.info['query_start'].pop()
+
+_hooks_installed = False
+
+def _install_sql_hooks():
+    global _hooks_installed
+    if not _hooks_installed:
+        event.listen(Engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(Engine, 'after_cursor_execute', _after_cursor_execute)
+        event.listen(Engine, 'handle_error', _handle_error)
+        _hooks_installed = True
+
+# =========================================================
+# === FLASK MIDDLEWARE ===
+# =========================================================
+def init_instrumentation(app):
+    registry = MetricsRegistry(app.config['N_PLUS_ONE_THRESHOLD'])
+    app.extensions['metrics'] = registry
+    if not app.config['METRICS_ENABLED']:
+        return registry
+    _install_sql_hooks()
+
+    @app.before_request
+    def start_request_metrics():
+        g._metrics = {'start': time.perf_counter(), 'queries': 0, 'db_ms': 0.0,
+                      'statements': Counter(), 'status': 500}
+
+    @app.after_request
+    def note_response_status(response):
+        current = g.get('_metrics')
+        if current is not None:
+            current['status'] = response.status_code
+        return response
+
+    # Teardown runs after streamed responses finish, so their full time is counted
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        current = g.pop('_metrics', None)
+        if current is None:
+            return
+        endpoint = request.endpoint or 'unmatched'
+        elapsed_ms = (time.perf_counter() - current['start']) * 1000
+        repeated = registry.record(endpoint, elapsed_ms, current['queries'], current['db_ms'],
+                                   current['status'], current['statements'])
+        for sql, n in repeated:
+            app.logger.warning("Possible N+1 in %s: %d x %s", endpoint, n, sql[:200])
+
+    return registry
@@ -0,0 +1,79 @@
+from datetime import datetime
+import numpy as np
+from sqlalchemy import insert
+from models.models import db, LocationAudit
+
+def month_key(day):
+    return day.year * 100 + day.month
+
+def record_location(staff_id, latitude, longitude, distance_m, accepted):
+    """Appends one audit row and commits it on its own, so refused attempts are kept too."""
+    now = datetime.utcnow()
+    db.session.execute(insert(LocationAudit), [{
+        'month': month_key(now), 'staff_id': staff_id, 'submitted_at': now,
+        'latitude': latitude, 'longitude': longitude, 'distance_m': distance_m, 'accepted': accepted
+    }])
+    db.session.commit()
+
+def load_columns(start, end, staff_id=None):
+    """
+    Audit rows submitted between the dates as NumPy column arrays. Filters on
+    the month range first so only those index slices are read.
+    """
+    query = db.session.query(LocationAudit.staff_id, LocationAudit.submitted_at, LocationAudit.latitude,
+                             LocationAudit.longitude, LocationAudit.distance_m, LocationAudit.accepted)\
+        .filter(LocationAudit.month.between(month_key(start), month_key(end)),
+                LocationAudit.submitted_at >= datetime.combine(start, datetime.min.time()),
+                LocationAudit.submitted_at <= datetime.combine(end, datetime.max.time()))
+    if staff_id:
+        query = query.filter(LocationAudit.staff_id == staff_id)
+    rows = query.order_by(LocationAudit.staff_id, LocationAudit.submitted_at).all()
+    columns = list(zip(*rows)) or [[]] * 6
+    return {
+        'staff_id': np.array(columns[0], dtype=np.int64),
+        'submitted_at': np.array(columns[1], dtype='datetime64[s]'),
+        'latitude': np.array(columns[2], dtype=float),
+        'longitude': np.array(columns[3], dtype=float),
+        'distance_m': np.array([np.nan if d is None else d for d in columns[4]], dtype=float),
+        'accepted': np.array(columns[5], dtype=bool),
+    }
+
+def staff_outliers(columns, fences=None, spread_limit_m=500, mad_factor=5):
+    """
+    Per staff member: submissions, refused attempts, how many points sit more
+    than spread_limit_m and mad_factor MADs from their usual spot, and (when
+    fences are given) how many fall outside today's fences. Sorted worst first.
+    """
+    staff_ids = columns['staff_id']
+    if not len(staff_ids):
+        return []
+    outside_now = None
+    if fences is not None and not fences.empty:
+        inside, _, _ = fences.check_many(columns['latitude'], columns['longitude'])
+        outside_now = ~inside
+
+    report = []
+    # Rows are sorted by staff, so each member is one contiguous slice
+    boundaries = np.flatnonzero(np.diff(staff_ids)) + 1
+    for start, end in zip(np.r_[0, boundaries], np.r_[boundaries, len(staff_ids)]):
+        lat, lon = columns['latitude'][start:end], columns['longitude'][start:end]
+        # Distance in metres from the member's median location (local flat projection)
+        lat0, lon0 = np.median(lat), np.median(lon)
+        dy = (lat - lat0) * 111320.0
+        dx = (lon - lon0) * 111320.0 * np.cos(np.radians(lat0))
+        spread = np.hypot(dx, dy)
+        mad = np.median(spread) or 1.0
+        far = (spread > spread_limit_m) & (spread > mad_factor * mad)
+        distance = columns['distance_m'][start:end]
+        report.append({
+            'staff_id': int(staff_ids[start]),
+            'submissions': int(end - start),
+            'refused': int((~columns['accepted'][start:end]).sum()),
+            'far_from_usual': int(far.sum()),
+            'max_spread_m': float(spread.max()),
+            'max_outside_m': float(np.nanmax(distance)) if not np.isnan(distance).all() else None,
+            'outside_fences_now': int(outside_now[start:end].sum()) if outside_now is not None else None,
+            'last_far_at': str(columns['submitted_at'][start:end][far][-1]) if far.any() else None,
+        })
+    report.sort(key=lambda r: (r['refused'] + r['far_from_usual'] + (r['outside_fences_now'] or 0), r['max_spread_m']), reverse=True)
+    return report
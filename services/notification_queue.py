@@ -0,0 +1,176 @@
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import or_, and_, insert, update, bindparam
+from models.models import db, NotificationOutbox
+from services.sms_service import get_sms_sender, format_absent_line, format_absent_message
+
+# =========================================================
+# === 1. ENQUEUE (called by requests, after commit) ===
+# =========================================================
+def enqueue_absent_notifications(absentees, attendance_date, period, subject, time_str, batch_window=0):
+    """
+    Queues one outbox row per parent and day. Absences for a parent that still
+    has a pending message that day (other periods, siblings) are merged into it
+    with a conditional UPDATE; if the worker claimed that row meanwhile (or
+    another merge changed it) the lines go into a new row instead of being lost.
+    A fixed number of statements whatever the number of parents.
+    """
+    lines_by_parent = {}
+    for student in absentees:
+        if student.parent_contact:
+            lines_by_parent.setdefault(student.parent_contact, []).append(
+                format_absent_line(student.name, period, subject, time_str))
+    if not lines_by_parent:
+        return 0
+
+    pending = db.session.query(NotificationOutbox.id, NotificationOutbox.to_number, NotificationOutbox.details).filter(
+        NotificationOutbox.to_number.in_(list(lines_by_parent)),
+        NotificationOutbox.notify_date == attendance_date,
+        NotificationOutbox.status == 'pending'
+    ).all()
+    pending_by_parent = {row.to_number: row for row in pending}
+
+    merges, merged = [], set()
+    for to_number, lines in lines_by_parent.items():
+        row = pending_by_parent.get(to_number)
+        if row:
+            existing = row.details.split('\n')
+            merges.append({'row_id': row.id, 'old': row.details,
+                           'new': '\n'.join(existing + [l for l in lines if l not in existing])})
+    if merges:
+        # One executemany; a row claimed by the worker (or changed) meanwhile is left as it is
+        db.session.execute(update(NotificationOutbox.__table__)
+                           .where(NotificationOutbox.id == bindparam('row_id'),
+                                  NotificationOutbox.status == 'pending',
+                                  NotificationOutbox.details == bindparam('old'))
+                           .values(details=bindparam('new')), merges)
+        # Parents whose lines are now in their row; the rest get a new row below
+        for row in db.session.query(NotificationOutbox.to_number, NotificationOutbox.details)\
+                .filter(NotificationOutbox.id.in_([m['row_id'] for m in merges])):
+            if set(lines_by_parent[row.to_number]) <= set(row.details.split('\n')):
+                merged.add(row.to_number)
+
+    due_at = datetime.utcnow() + timedelta(seconds=batch_window)
+    new_rows = [{'to_number': to_number, 'notify_date': attendance_date,
+                 'details': '\n'.join(lines), 'next_attempt_at': due_at}
+                for to_number, lines in lines_by_parent.items() if to_number not in merged]
+    if new_rows:
+        db.session.execute(insert(NotificationOutbox), new_rows)
+    db.session.commit()
+    return len(lines_by_parent)
+
+# =========================================================
+# === 2. DISPATCH (background worker) ===
+# =========================================================
+class NotificationDispatcher:
+    """Drains the outbox with bounded concurrency and exponential backoff."""
+
+    def __init__(self, app, sender=None, max_workers=4, batch_size=50, max_attempts=5,
+                 base_backoff=30, lease_seconds=300, poll_interval=5):
+        self.app = app
+        self.sender = sender
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def _claim_batch(self):
+        """Marks up to batch_size due rows as ours; safe across processes."""
+        now = datetime.utcnow()
+        due = or_(
+            and_(NotificationOutbox.status == 'pending', NotificationOutbox.next_attempt_at <= now),
+            # A worker that died mid-send leaves rows in 'sending' past their lease
+            and_(NotificationOutbox.status == 'sending', NotificationOutbox.next_attempt_at <= now)
+        )
+        ids = [r.id for r in db.session.query(NotificationOutbox.id).filter(due)
+               .order_by(NotificationOutbox.next_attempt_at).limit(self.batch_size)]
+        if not ids:
+            return []
+
+        token = uuid.uuid4().hex
+        NotificationOutbox.query.filter(NotificationOutbox.id.in_(ids), due).update({
+            'status': 'sending',
+            'claim_token': token,
+            'next_attempt_at': now + timedelta(seconds=self.lease_seconds)
+        }, synchronize_session=False)
+        db.session.commit()
+        return NotificationOutbox.query.filter_by(claim_token=token, status='sending').all()
+
+    def _send(self, sender, to_number, body):
+        with self.app.app_context():
+            try:
+                return bool(sender(to_number, body)), None
+            except Exception as e:
+                return False, str(e)[:255]
+
+    def run_once(self):
+        """Sends one claimed batch. Returns the number of rows processed."""
+        with self.app.app_context():
+            rows = self._claim_batch()
+            if not rows:
+                return 0
+            sender = self.sender or get_sms_sender()
+            jobs = [(row, format_absent_message(row.notify_date.strftime('%d-%b-%Y'), row.details.split('\n')))
+                    for row in rows]
+
+            with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+                results = list(pool.map(lambda job: self._send(sender, job[0].to_number, job[1]), jobs))
+
+            now = datetime.utcnow()
+            for (row, _), (ok, error) in zip(jobs, results):
+                row.attempts += 1
+                row.claim_token = None
+                if ok:
+                    row.status, row.sent_at, row.last_error = 'sent', now, None
+                elif row.attempts >= self.max_attempts:
+                    row.status, row.last_error = 'failed', error or 'Send failed'
+                else:
+                    row.status, row.last_error = 'pending', error or 'Send failed'
+                    row.next_attempt_at = now + timedelta(seconds=self.base_backoff * 2 ** (row.attempts - 1))
+            db.session.commit()
+            return len(rows)
+
+    def notify(self):
+        """Wakes the worker thread so freshly queued messages go out immediately."""
+        self._wakeup.set()
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                processed = self.run_once()
+            except Exception as e:
+                print(f"!!! NOTIFICATION WORKER ERROR: {e} !!!")
+                processed = 0
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._loop, name='notification-dispatcher', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+def init_notification_worker(app):
+    """Creates the dispatcher from app config and starts it when enabled."""
+    dispatcher = NotificationDispatcher(
+        app,
+        max_workers=app.config['NOTIFICATION_MAX_WORKERS'],
+        batch_size=app.config['NOTIFICATION_BATCH_SIZE'],
+        max_attempts=app.config['NOTIFICATION_MAX_ATTEMPTS']
+    )
+    app.extensions['notification_dispatcher'] = dispatcher
+    if app.config['NOTIFICATION_WORKER_ENABLED']:
+        dispatcher.start()
+    return dispatcher
@@ -0,0 +1,174 @@
+import uuid
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy.exc import IntegrityError
+from models.models import db, AttendanceSession
+from services.attendance_service import ingest_period
+from services.notification_queue import enqueue_absent_notifications
+
+# Outcomes of begin_submission / record_sheet
+PROCEED, RECORDED, ALREADY_SUBMITTED, CONFLICT, REJECTED = 'proceed', 'recorded', 'already_submitted', 'conflict', 'rejected'
+
+def find_session(branch, semester, date, period):
+    """The claim row of a section period (one unique-key lookup), or None."""
+    return AttendanceSession.query.filter_by(branch=branch, semester=int(semester), date=date, period=int(period)).first()
+
+def _is_stale(session, claim_ttl):
+    return session.status == 'claimed' and session.claimed_at < datetime.utcnow() - timedelta(seconds=claim_ttl)
+
+def _take_over(session, staff_id, subject):
+    """Moves a stale claim to staff_id; conditional, so only one taker wins."""
+    token = uuid.uuid4().hex
+    taken = AttendanceSession.query.filter_by(id=session.id, status='claimed', token=session.token)\
+        .update({'staff_id': staff_id, 'subject': subject, 'token': token, 'claimed_at': datetime.utcnow()},
+                synchronize_session=False)
+    db.session.commit()
+    db.session.expire(session)
+    return taken == 1
+
+def _conflict_message(session):
+    who = session.staff.name if session.staff else 'another staff member'
+    if session.status == 'submitted':
+        return f'Attendance for {session.branch} (Sem {session.semester}) for period {session.period} has already been taken by {who}.'
+    return f'Attendance for {session.branch} (Sem {session.semester}) for period {session.period} is being taken by {who} right now.'
+
+def open_conflict(staff_id, branch, semester, date, period, claim_ttl=120):
+    """
+    Why a marking sheet should not be opened: the period was already submitted,
+    or someone else is submitting it right now. None otherwise. Reserves
+    nothing; the claim is only taken when the sheet is submitted.
+    """
+    session = find_session(branch, semester, date, period)
+    if session is None or (session.status == 'claimed' and (session.staff_id == staff_id or _is_stale(session, claim_ttl))):
+        return None
+    return _conflict_message(session)
+
+def claim_period(staff_id, branch, semester, date, period, subject, claim_ttl=120):
+    """
+    Claims a section period for staff_id with insert-or-fail, at submit time.
+    Returns (session, None) when the caller holds the claim (new, already the
+    caller's, or taken over from a submission that died claim_ttl seconds ago),
+    else (None, message).
+    """
+    session = AttendanceSession(branch=branch, semester=int(semester), date=date, period=int(period),
+                                subject=subject, staff_id=staff_id, token=uuid.uuid4().hex)
+    try:
+        with db.session.begin_nested():
+            db.session.add(session)
+        db.session.commit()
+        return session, None
+    except IntegrityError:
+        pass
+
+    existing = find_session(branch, semester, date, period)
+    if existing is None:
+        return None, 'Could not reserve this period. Please try again.'
+    if existing.status == 'claimed' and existing.staff_id == staff_id:
+        return existing, None
+    if _is_stale(existing, claim_ttl) and _take_over(existing, staff_id, subject):
+        return existing, None
+    return None, _conflict_message(existing)
+
+def begin_submission(staff_id, branch, semester, date, period, subject, claim_ttl=120, client_id=None):
+    """
+    Decides what a submitted sheet may do. Returns (outcome, message, session):
+    PROCEED with the claim the caller now holds, ALREADY_SUBMITTED for a retry of
+    a recorded sheet, or CONFLICT. Nothing is marked submitted here; that happens
+    in finish_submission once the rows are in.
+    """
+    if client_id and AttendanceSession.query.filter_by(client_id=client_id).first():
+        return ALREADY_SUBMITTED, None, None
+
+    session = find_session(branch, semester, date, period)
+    if session is None:
+        session, message = claim_period(staff_id, branch, semester, date, period, subject, claim_ttl)
+        if session is None:
+            return CONFLICT, message, None
+    elif session.status == 'submitted':
+        if session.staff_id == staff_id:
+            return ALREADY_SUBMITTED, None, None
+        return CONFLICT, _conflict_message(session), None
+    elif session.staff_id != staff_id:
+        if not (_is_stale(session, claim_ttl) and _take_over(session, staff_id, subject)):
+            return CONFLICT, _conflict_message(session), None
+    return PROCEED, None, session
+
+def finish_submission(session, staff_id, subject, client_id=None):
+    """
+    Flips the claim to 'submitted' in the caller's transaction, after its rows
+    were inserted. Row-locking conditional UPDATE: of two racing submits only
+    one sees 'claimed'. Returns False when the other one won.
+    """
+    flipped = AttendanceSession.query.filter_by(id=session.id, status='claimed', staff_id=staff_id)\
+        .update({'status': 'submitted', 'subject': subject, 'submitted_at': datetime.utcnow(), 'client_id': client_id},
+                synchronize_session=False)
+    return flipped == 1
+
+def release_claim(session, staff_id):
+    """Drops a claim that did not become a submission, so the period is free again."""
+    AttendanceSession.query.filter_by(id=session.id, status='claimed', staff_id=staff_id).delete(synchronize_session=False)
+    db.session.commit()
+
+def release_stale_claims(claim_ttl=120):
+    """
+    Deletes 'claimed' rows older than claim_ttl: submissions whose process died
+    between the claim and the commit. Returns how many were released.
+    """
+    cutoff = datetime.utcnow() - timedelta(seconds=claim_ttl)
+    released = AttendanceSession.query.filter(AttendanceSession.status == 'claimed', AttendanceSession.claimed_at < cutoff)\
+        .delete(synchronize_session=False)
+    db.session.commit()
+    return released
+
+def _lost_claim(staff_id, branch, semester, date, period):
+    """
+    Outcome when finish_submission found the claim no longer ours: our own
+    double-submit won (ALREADY_SUBMITTED), or someone else took the claim over
+    or submitted the period (CONFLICT with who it was).
+    """
+    current = find_session(branch, semester, date, period)
+    if current is None:
+        return CONFLICT, 'This class was released while it was being saved. Please submit it again.'
+    if current.status == 'submitted' and current.staff_id == staff_id:
+        return ALREADY_SUBMITTED, None
+    return CONFLICT, _conflict_message(current)
+
+def record_sheet(staff_id, form, date, period, subject, branch, semester, time_str, client_id=None):
+    """
+    The whole submission of one marking sheet (form or offline sync): claim
+    check, one multi-row INSERT, claim flipped to 'submitted', commit, then the
+    parents' SMS are queued. Returns (outcome, message) with outcome RECORDED,
+    ALREADY_SUBMITTED, CONFLICT or REJECTED (no valid marks). A claim that does
+    not end in a submission is released.
+    """
+    outcome, message, session = begin_submission(staff_id, branch, semester, date, period, subject,
+                                                 claim_ttl=current_app.config['ATTENDANCE_CLAIM_TTL'], client_id=client_id)
+    if outcome != PROCEED:
+        return outcome, message
+    try:
+        rows, absentees = ingest_period(staff_id, form, date, period, subject, branch, semester, session.id)
+        if not rows:
+            db.session.rollback()
+            release_claim(session, staff_id)
+            return REJECTED, 'No valid attendance marks were submitted for this class.'
+        if not finish_submission(session, staff_id, subject, client_id):
+            db.session.rollback()
+            return _lost_claim(staff_id, branch, semester, date, period)
+        db.session.commit()
+    except IntegrityError:
+        # Rows written outside the claim (e.g. by an older deployment): keep what is there
+        db.session.rollback()
+        release_claim(session, staff_id)
+        return ALREADY_SUBMITTED, None
+    except Exception:
+        db.session.rollback()
+        release_claim(session, staff_id)
+        raise
+
+    # Parents are notified by the background outbox worker, never inline
+    if absentees:
+        enqueue_absent_notifications(absentees, date, period, subject, time_str,
+                                     batch_window=current_app.config['NOTIFICATION_BATCH_WINDOW'])
+        dispatcher = current_app.extensions.get('notification_dispatcher')
+        if dispatcher: dispatcher.notify()
+    return RECORDED, None
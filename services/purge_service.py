@@ -0,0 +1,211 @@
+import threading
+import time
+from datetime import datetime, timedelta
+from models.models import db, Attendance, AttendanceArchive, Student, Staff, PurgeJob, SectionRollup
+from services.summary_service import delete_summaries, rebuild_summaries
+from services.dashboard_service import invalidate_department_snapshots
+from services.roster_cache import invalidate_rosters
+from services.rollup_service import delete_rollups, subtract_from_rollups, invalidate_trends
+from services.archive_service import copy_to_archive
+from services.user_cache import invalidate_user
+from services.period_service import release_stale_claims
+
+# =========================================================
+# === 1. QUEUEING (called by admin routes) ===
+# =========================================================
+def queue_purge(kind, target_id=None, target_label='', archive=False):
+    """Creates a purge job unless the same target already has one pending. Returns the job."""
+    job = PurgeJob.query.filter(PurgeJob.kind == kind, PurgeJob.target_id == target_id,
+                                PurgeJob.status.in_(['queued', 'running'])).first()
+    if job:
+        return job
+    job = PurgeJob(kind=kind, target_id=target_id, target_label=target_label, archive=archive)
+    db.session.add(job)
+    db.session.commit()
+    return job
+
+def pending_purge_targets(kind):
+    """Target ids with a queued/running job, so lists can mark them as 'being deleted'."""
+    return {tid for (tid,) in db.session.query(PurgeJob.target_id)
+            .filter(PurgeJob.kind == kind, PurgeJob.status.in_(['queued', 'running']))}
+
+# =========================================================
+# === 2. CHUNKED EXECUTION ===
+# =========================================================
+def _sources(job):
+    """
+    (model, condition) pairs the job deletes from, in order. Without the archive
+    option a student's already archived years go too; with it they are kept.
+    """
+    if job.kind == 'student':
+        sources = [(Attendance, Attendance.student_id == job.target_id)]
+        if not job.archive:
+            sources.append((AttendanceArchive, AttendanceArchive.student_id == job.target_id))
+    elif job.kind == 'staff':
+        sources = [(Attendance, Attendance.staff_id == job.target_id)]
+    else:  # all_students: every attendance row
+        sources = [(Attendance, Attendance.id.isnot(None))]
+        if not job.archive:
+            sources.append((AttendanceArchive, AttendanceArchive.id.isnot(None)))
+    return sources
+
+def _finish_target(job):
+    """
+    Removes the student/staff row(s) once their attendance is gone. Marks
+    submitted after the last chunk go in the same transaction, so the student
+    delete cannot fail on their foreign key.
+    """
+    if job.kind in ('student', 'all_students'):
+        live = Attendance.student_id == job.target_id if job.kind == 'student' else Attendance.id.isnot(None)
+        if job.archive:
+            late = [row_id for (row_id,) in db.session.query(Attendance.id).filter(live)]
+            if late:
+                copy_to_archive(late)
+        if job.kind == 'student':
+            # A deleted student's marks leave the charts, archived years included
+            if job.archive:
+                subtract_from_rollups(AttendanceArchive.__table__, AttendanceArchive.student_id == job.target_id)
+            else:
+                subtract_from_rollups(Attendance.__table__, live)
+        job.deleted += Attendance.query.filter(live).delete(synchronize_session=False)
+
+    if job.kind == 'student':
+        delete_summaries([job.target_id])
+        Student.query.filter_by(student_id=job.target_id).delete()
+    elif job.kind == 'staff':
+        if not job.archive:
+            # Their classes no longer exist anywhere (archived ones still count)
+            SectionRollup.query.filter_by(staff_id=job.target_id).delete(synchronize_session=False)
+        Staff.query.filter_by(staff_id=job.target_id).delete()
+    elif job.kind == 'all_students':
+        delete_summaries()
+        delete_rollups()
+        Student.query.delete()
+
+def run_purge_job(job, chunk_size=1000, pause=0.05):
+    """Deletes (and optionally archives) the job's attendance in short transactions."""
+    sources = _sources(job)
+    job.total = job.deleted + sum(db.session.query(db.func.count(model.id)).filter(condition).scalar()
+                                  for model, condition in sources)
+    db.session.commit()
+
+    for model, condition in sources:
+        while True:
+            chunk = db.session.query(model.id, model.student_id).filter(condition).order_by(model.id).limit(chunk_size).all()
+            if not chunk:
+                break
+            ids = [row.id for row in chunk]
+            if job.archive and model is Attendance:
+                copy_to_archive(ids)
+            elif job.kind == 'student':
+                # Archived copies are taken out of the rollups once, when the student goes
+                subtract_from_rollups(model.__table__, model.id.in_(ids))
+            model.query.filter(model.id.in_(ids)).delete(synchronize_session=False)
+            if job.kind == 'staff':
+                # Students keep their rows from other staff: recount them in the same transaction
+                rebuild_summaries({row.student_id for row in chunk if row.student_id})
+            job.deleted += len(ids)
+            job.updated_at = datetime.utcnow()
+            db.session.commit()
+            # Short pause between chunks so live submissions get the table
+            time.sleep(pause)
+
+    _finish_target(job)
+    job.status, job.finished_at, job.updated_at = 'done', datetime.utcnow(), datetime.utcnow()
+    db.session.commit()
+    invalidate_department_snapshots()
+    invalidate_trends()
+    if job.kind == 'staff':
+        invalidate_user(f'staff-{job.target_id}')
+    else:
+        invalidate_rosters()
+
+# =========================================================
+# === 3. BACKGROUND WORKER ===
+# =========================================================
+class PurgeWorker:
+    """
+    Runs queued purge jobs one at a time; any process may claim a job. When idle
+    it also deletes attendance claims left behind by submissions that died.
+    """
+
+    def __init__(self, app, chunk_size=1000, poll_interval=5, stale_after=600):
+        self.app = app
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = None
+        self._claims_checked_at = 0.0
+
+    def _claim(self):
+        # A 'running' job whose heartbeat stopped belongs to a dead process; resume it
+        stale = datetime.utcnow() - timedelta(seconds=self.stale_after)
+        candidates = PurgeJob.query.filter(
+            (PurgeJob.status == 'queued') | ((PurgeJob.status == 'running') & (PurgeJob.updated_at < stale))
+        ).order_by(PurgeJob.id).all()
+        for job in candidates:
+            claimed = PurgeJob.query.filter(PurgeJob.id == job.id, PurgeJob.status == job.status,
+                                            PurgeJob.updated_at == job.updated_at)\
+                .update({'status': 'running', 'updated_at': datetime.utcnow()}, synchronize_session=False)
+            db.session.commit()
+            if claimed:
+                return db.session.get(PurgeJob, job.id)
+        return None
+
+    def run_once(self):
+        """Claims and runs one job. Returns True if a job was processed."""
+        with self.app.app_context():
+            job = self._claim()
+            if job is None:
+                return False
+            try:
+                run_purge_job(job, chunk_size=self.chunk_size)
+            except Exception as e:
+                db.session.rollback()
+                job.status, job.error, job.finished_at = 'failed', str(e)[:255], datetime.utcnow()
+                db.session.commit()
+            return True
+
+    def expire_claims(self):
+        """Releases stale attendance claims, at most once per ATTENDANCE_CLAIM_TTL."""
+        claim_ttl = self.app.config['ATTENDANCE_CLAIM_TTL']
+        if time.monotonic() - self._claims_checked_at < claim_ttl:
+            return
+        self._claims_checked_at = time.monotonic()
+        with self.app.app_context():
+            release_stale_claims(claim_ttl)
+
+    def notify(self):
+        self._wakeup.set()
+
+    def _loop(self):
+        while not self._stopped.is_set():
+            try:
+                processed = self.run_once()
+                if not processed:
+                    self.expire_claims()
+            except Exception as e:
+                print(f"!!! PURGE WORKER ERROR: {e} !!!")
+                processed = False
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopped.clear()
+            self._thread = threading.Thread(target=self._loop, name='purge-worker', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+
+def init_purge_worker(app):
+    worker = PurgeWorker(app, chunk_size=app.config['PURGE_CHUNK_SIZE'])
+    app.extensions['purge_worker'] = worker
+    if app.config['PURGE_WORKER_ENABLED']:
+        worker.start()
+    return worker
@@ -0,0 +1,62 @@
+from datetime import timedelta
+from sqlalchemy import func, case, and_
+from models.models import db, Student, AttendanceSession
+from services.archive_service import attendance_source, model_for_date
+
+MAX_RANGE_DAYS = 366
+STREAM_BATCH = 500
+
+def _present_count(source):
+    return func.sum(case((source.c.status == 'Present', 1), else_=0))
+
+def clamp_range(start_date, end_date):
+    """Orders the dates and caps the range at one academic year."""
+    if start_date > end_date:
+        start_date, end_date = end_date, start_date
+    if (end_date - start_date).days > MAX_RANGE_DAYS:
+        start_date = end_date - timedelta(days=MAX_RANGE_DAYS)
+    return start_date, end_date
+
+def staff_sessions_report(staff_id, start_date, end_date, branch=None, semester=None, subject=None):
+    """
+    Streams one grouped row per class the staff member took in the range:
+    (date, period, subject, branch, semester, present, total). The section is
+    the one on the submitted attendance_session claim the rows were recorded
+    under, so promotions do not move past classes; rows older than the claims
+    use the student's current one. Rows are always scoped to staff_id and
+    fetched in batches of STREAM_BATCH.
+    """
+    source = attendance_source(start_date, end_date, staff_id=staff_id)
+    section_branch = func.coalesce(AttendanceSession.branch, Student.branch)
+    section_semester = func.coalesce(AttendanceSession.semester, Student.semester)
+    query = db.session.query(
+        source.c.date, source.c.period, source.c.subject,
+        section_branch.label('branch'), section_semester.label('semester'),
+        _present_count(source).label('present'),
+        func.count(source.c.id).label('total')
+    ).join(Student, source.c.student_id == Student.student_id)\
+     .outerjoin(AttendanceSession, and_(AttendanceSession.id == source.c.session_id,
+                                        AttendanceSession.status == 'submitted'))\
+     .filter(source.c.staff_id == staff_id, source.c.date.between(start_date, end_date))
+
+    if branch: query = query.filter(section_branch == branch)
+    if semester: query = query.filter(section_semester == semester)
+    if subject: query = query.filter(source.c.subject == subject)
+
+    query = query.group_by(source.c.date, source.c.period, source.c.subject, section_branch, section_semester)\
+                 .order_by(source.c.date.desc(), source.c.period.desc())
+    return query.yield_per(STREAM_BATCH)
+
+def staff_session_detail(staff_id, date, period):
+    """Student-level rows of one class, only if the caller took it."""
+    model = model_for_date(date)
+    return db.session.query(model.status, model.subject, model.timestamp, Student.name, Student.roll_no)\
+        .join(Student, model.student_id == Student.student_id)\
+        .filter(model.staff_id == staff_id, model.date == date, model.period == period)\
+        .order_by(Student.roll_no).all()
+
+def staff_report_filters(staff_id):
+    """Distinct subjects the staff member has taken (archived years included), for the filter dropdown."""
+    source = attendance_source(staff_id=staff_id)
+    return [s for (s,) in db.session.query(source.c.subject)
+            .filter(source.c.staff_id == staff_id).distinct().order_by(source.c.subject)]
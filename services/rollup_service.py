@@ -0,0 +1,148 @@
+from datetime import date, timedelta
+from flask import current_app
+from sqlalchemy import select, insert, update, delete, func, case, and_, bindparam
+from models.models import db, Student, AttendanceSession, SectionRollup
+from services.archive_service import attendance_source
+from utils.cache import TTLCache
+
+TREND_DAYS = 28
+WEEK_DAYS = 7
+
+_trends = TTLCache(maxsize=64)
+
+# =========================================================
+# === 1. INCREMENTAL UPDATE (called from ingest_period) ===
+# =========================================================
+def apply_rollup(rows, branch, semester):
+    """Adds one submitted sheet as one rollup row, in the caller's transaction."""
+    if not rows or not branch or not semester:
+        return
+    first = rows[0]
+    absent = sum(1 for r in rows if r['status'] == 'Absent')
+    db.session.execute(insert(SectionRollup), [{
+        'branch': branch, 'semester': int(semester), 'date': first['date'], 'period': first['period'],
+        'subject': first['subject'], 'staff_id': first['staff_id'],
+        'present': len(rows) - absent, 'absent': absent
+    }])
+
+# =========================================================
+# === 2. REBUILD FROM HISTORY (rebuild_section_rollups.py) ===
+# =========================================================
+def rebuild_rollups(start=None, end=None):
+    """
+    Recomputes rollups between the dates (all history when both are None) from
+    live and archived attendance. The section of a row is the one on the
+    submitted attendance_session claim it was recorded under, so promoted
+    students stay in the semester they were in that day; rows older than the
+    claims fall back to the student's current branch/semester (alumni without a
+    claim are skipped). Caller commits.
+    """
+    source = attendance_source(start, end)
+    claim = AttendanceSession.__table__
+    student = Student.__table__
+    branch = func.coalesce(claim.c.branch, student.c.branch)
+    semester = func.coalesce(claim.c.semester, student.c.semester)
+
+    query = select(
+        branch, semester, source.c.date, source.c.period, func.min(source.c.subject), func.min(source.c.staff_id),
+        func.sum(case((source.c.status == 'Present', 1), else_=0)),
+        func.sum(case((source.c.status == 'Absent', 1), else_=0))
+    ).select_from(
+        source.join(student, student.c.student_id == source.c.student_id)
+        .outerjoin(claim, and_(claim.c.id == source.c.session_id, claim.c.status == 'submitted'))
+    ).where(semester.isnot(None))
+    cleanup = delete(SectionRollup)
+    if start:
+        query, cleanup = query.where(source.c.date >= start), cleanup.where(SectionRollup.date >= start)
+    if end:
+        query, cleanup = query.where(source.c.date <= end), cleanup.where(SectionRollup.date <= end)
+    # One row per section period, matching the table's unique key
+    query = query.group_by(branch, semester, source.c.date, source.c.period)
+
+    db.session.execute(cleanup)
+    result = db.session.execute(insert(SectionRollup).from_select(
+        ['branch', 'semester', 'date', 'period', 'subject', 'staff_id', 'present', 'absent'], query))
+    _trends.invalidate()
+    return result.rowcount
+
+def subtract_from_rollups(source, condition):
+    """
+    Takes the attendance rows of `source` (the live or archive table) matching
+    the condition back out of their section rollups, before they are deleted.
+    Sections are resolved as in rebuild_rollups; a rollup left with no marks is
+    dropped. Caller commits.
+    """
+    claim = AttendanceSession.__table__
+    student = Student.__table__
+    branch = func.coalesce(claim.c.branch, student.c.branch)
+    semester = func.coalesce(claim.c.semester, student.c.semester)
+    counts = db.session.execute(select(
+        branch.label('r_branch'), semester.label('r_semester'),
+        source.c.date.label('r_date'), source.c.period.label('r_period'),
+        func.sum(case((source.c.status == 'Present', 1), else_=0)).label('r_present'),
+        func.sum(case((source.c.status == 'Absent', 1), else_=0)).label('r_absent')
+    ).select_from(
+        source.join(student, student.c.student_id == source.c.student_id)
+        .outerjoin(claim, and_(claim.c.id == source.c.session_id, claim.c.status == 'submitted'))
+    ).where(condition, semester.isnot(None))
+     .group_by(branch, semester, source.c.date, source.c.period)).mappings().all()
+    if not counts:
+        return
+
+    rollup = SectionRollup.__table__
+    db.session.execute(update(rollup).where(
+        rollup.c.branch == bindparam('r_branch'), rollup.c.semester == bindparam('r_semester'),
+        rollup.c.date == bindparam('r_date'), rollup.c.period == bindparam('r_period')
+    ).values(present=rollup.c.present - bindparam('r_present'),
+             absent=rollup.c.absent - bindparam('r_absent')), [dict(row) for row in counts])
+    db.session.execute(delete(rollup).where(
+        rollup.c.date.between(min(r['r_date'] for r in counts), max(r['r_date'] for r in counts)),
+        rollup.c.present <= 0, rollup.c.absent <= 0))
+    _trends.invalidate()
+
+def delete_rollups():
+    """Drops every rollup (used when all students are deleted). Caller commits."""
+    SectionRollup.query.delete(synchronize_session=False)
+    _trends.invalidate()
+
+def invalidate_trends():
+    _trends.invalidate()
+
+# =========================================================
+# === 3. READ PATH (HOD dashboard / admin HOD details) ===
+# =========================================================
+def _department_filter(dept):
+    """Same scope as department_student_filter, on the rollup's own columns."""
+    if dept == 'General':
+        return SectionRollup.semester <= 4
+    return SectionRollup.branch == dept
+
+def _percentage(present, absent):
+    total = (present or 0) + (absent or 0)
+    return round(present / total * 100, 1) if total else None
+
+def _build_trends(dept, today):
+    start, week_start = today - timedelta(days=TREND_DAYS - 1), today - timedelta(days=WEEK_DAYS - 1)
+    daily = db.session.query(SectionRollup.date, func.sum(SectionRollup.present), func.sum(SectionRollup.absent))\
+        .filter(_department_filter(dept), SectionRollup.date.between(start, today))\
+        .group_by(SectionRollup.date).order_by(SectionRollup.date).all()
+    sections = db.session.query(SectionRollup.branch, SectionRollup.semester,
+                                func.sum(SectionRollup.present), func.sum(SectionRollup.absent))\
+        .filter(_department_filter(dept), SectionRollup.date.between(week_start, today))\
+        .group_by(SectionRollup.branch, SectionRollup.semester).all()
+    week = sorted(((f'{b} Sem {s}', _percentage(p, a)) for b, s, p, a in sections), key=lambda item: item[1])
+    return {
+        'trend_labels': [d.strftime('%d %b') for d, _, _ in daily],
+        'trend_data': [_percentage(p, a) for _, p, a in daily],
+        'week_labels': [label for label, _ in week],
+        'week_data': [pct for _, pct in week],
+    }
+
+def department_trends(dept, today=None):
+    """
+    Daily attendance % of the department for the last TREND_DAYS days and each
+    section's % this week (lowest first), from the rollup table only.
+    """
+    today = today or date.today()
+    return _trends.get_or_set((dept, today), lambda: _build_trends(dept, today),
+                              ttl=current_app.config.get('DASHBOARD_CACHE_TTL', 60))
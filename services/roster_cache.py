@@ -0,0 +1,61 @@
+import uuid
+from collections import namedtuple
+from flask import current_app
+from models.models import db, Student, Setting
+from utils.cache import TTLCache
+
+# Bumped by every student write; other processes compare it before trusting their copy
+VERSION_KEY = 'roster_version'
+
+# What the marking sheet needs per student, nothing more
+RosterEntry = namedtuple('RosterEntry', 'student_id roll_no name')
+
+_rosters = TTLCache(maxsize=512)
+_catalogue = TTLCache(maxsize=1)
+
+def _read_version():
+    row = db.session.query(Setting.setting_value).filter_by(setting_key=VERSION_KEY).first()
+    return row[0] if row else None
+
+def _cached(cache, key, build):
+    """
+    Returns the cached value if it was built under the current version stamp,
+    otherwise rebuilds it. Costs one indexed lookup instead of a student scan.
+    """
+    version = _read_version()
+    hit = cache.get(key)
+    if hit is not None and hit[0] == version:
+        return hit[1]
+    value = build()
+    cache.set(key, (version, value), ttl=current_app.config.get('ROSTER_CACHE_TTL', 3600))
+    return value
+
+def get_roster(branch, semester):
+    """The section's students ordered by roll number, as (student_id, roll_no, name) tuples."""
+    def build():
+        rows = db.session.query(Student.student_id, Student.roll_no, Student.name)\
+            .filter(Student.branch == branch, Student.semester == int(semester))\
+            .order_by(Student.roll_no).all()
+        return tuple(RosterEntry(*row) for row in rows)
+    return _cached(_rosters, (branch, int(semester)), build)
+
+def get_catalogue():
+    """(branches, semesters) that currently have students, for the dashboard dropdowns."""
+    def build():
+        pairs = db.session.query(Student.branch, Student.semester)\
+            .filter(Student.semester.isnot(None)).distinct().all()
+        return tuple(sorted({b for b, _ in pairs})), tuple(sorted({s for _, s in pairs}))
+    return _cached(_catalogue, 'all', build)
+
+def invalidate_rosters():
+    """
+    Call after committing any student insert/update/delete. Drops this process's
+    copies and writes a new stamp so other processes rebuild on their next read.
+    """
+    _rosters.invalidate()
+    _catalogue.invalidate()
+    stamp = uuid.uuid4().hex
+    updated = Setting.query.filter_by(setting_key=VERSION_KEY).update({'setting_value': stamp})
+    if not updated:
+        db.session.add(Setting(setting_key=VERSION_KEY, setting_value=stamp))
+    db.session.commit()
@@ -0,0 +1,44 @@
+from sqlalchemy import func
+from models.models import db, Student, Semester
+
+FINAL_SEMESTER = 6
+
+def promote_cohort(branch, semester_num):
+    """
+    Moves one branch/semester cohort on with a single UPDATE: to the next
+    semester, or to alumni (semester None) after the final one. Caller commits.
+    Returns (promoted, graduated).
+    """
+    cohort = Student.query.filter(Student.branch == branch, Student.semester == semester_num)
+    if semester_num < FINAL_SEMESTER:
+        return cohort.update({Student.semester: Student.semester + 1}, synchronize_session=False), 0
+    if semester_num == FINAL_SEMESTER:
+        return 0, cohort.update({Student.semester: None}, synchronize_session=False)
+    return 0, 0
+
+def promotion_plan():
+    """Dry run of promote_all: [(branch, semester, students, action)] from one grouped query."""
+    rows = db.session.query(Student.branch, Student.semester, func.count(Student.student_id))\
+        .filter(Student.semester.between(1, FINAL_SEMESTER))\
+        .group_by(Student.branch, Student.semester)\
+        .order_by(Student.branch, Student.semester).all()
+    return [(branch, sem, count, 'Graduate' if sem == FINAL_SEMESTER else f'Promote to Sem {sem + 1}')
+            for branch, sem, count in rows]
+
+def promote_all():
+    """
+    End-of-term rollover for every branch in one transaction: final-semester
+    students graduate first, then every other cohort moves up by one.
+    Active Semester records are closed. Returns (promoted, graduated).
+    """
+    try:
+        graduated = Student.query.filter(Student.semester == FINAL_SEMESTER)\
+            .update({Student.semester: None}, synchronize_session=False)
+        promoted = Student.query.filter(Student.semester.between(1, FINAL_SEMESTER - 1))\
+            .update({Student.semester: Student.semester + 1}, synchronize_session=False)
+        Semester.query.filter_by(is_active=True).update({Semester.is_active: False}, synchronize_session=False)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+    return promoted, graduated
@@ -0,0 +1,111 @@
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Optional, Tuple
+from flask import current_app
+from models.models import db, Setting
+
+VERSION_KEY = 'settings_version'
+# Attendance dated before this day lives in attendance_archive (set by archive_attendance.py)
+ARCHIVE_BEFORE_KEY = 'attendance_archive_before'
+
+@dataclass(frozen=True)
+class CollegeSettings:
+    """Parsed, read-only view of the `settings` table."""
+    raw: dict = field(default_factory=dict)
+    geolocation_enabled: bool = False
+    college_latitude: Optional[float] = None
+    college_longitude: Optional[float] = None
+    allowed_radius_meters: Optional[int] = None
+    branches: Tuple[str, ...] = ('General',)
+    archive_before: Optional[date] = None
+    version: Optional[str] = None
+
+    @property
+    def geolocation_configured(self):
+        return None not in (self.college_latitude, self.college_longitude, self.allowed_radius_meters)
+
+def _to_float(value):
+    try: return float(value)
+    except (TypeError, ValueError): return None
+
+def _to_int(value):
+    try: return int(float(value))
+    except (TypeError, ValueError): return None
+
+def _to_date(value):
+    try: return datetime.strptime(value, '%Y-%m-%d').date()
+    except (TypeError, ValueError): return None
+
+def parse_branches(value):
+    """Split the comma string, strip whitespace and always include General."""
+    branches = [b.strip() for b in (value or '').split(',') if b.strip()]
+    # Ensure 'General' always exists for First Year/Science staff
+    if "General" not in branches:
+        branches.append("General")
+    return tuple(sorted(branches))
+
+def _build(raw):
+    return CollegeSettings(
+        raw=raw,
+        # schema.sql seeds 'true', the settings form saves '1'. Before the geofence
+        # release only 'true' was honoured, so a check enabled from the form was off.
+        geolocation_enabled=raw.get('geolocation_enabled') in ('true', '1'),
+        college_latitude=_to_float(raw.get('college_latitude')),
+        college_longitude=_to_float(raw.get('college_longitude')),
+        allowed_radius_meters=_to_int(raw.get('allowed_radius_meters')),
+        branches=parse_branches(raw.get('college_branches')),
+        archive_before=_to_date(raw.get(ARCHIVE_BEFORE_KEY)),
+        version=raw.get(VERSION_KEY)
+    )
+
+# --- In-process cache ---
+_lock = threading.Lock()
+_cached = None
+_checked_at = 0.0
+
+def _read_version():
+    row = db.session.query(Setting.setting_value).filter_by(setting_key=VERSION_KEY).first()
+    return row[0] if row else None
+
+def get_settings():
+    """
+    Returns the cached CollegeSettings. Within the TTL no query is made; after it,
+    only the version stamp is read and the table is reloaded if it changed.
+    """
+    global _cached, _checked_at
+    ttl = current_app.config.get('SETTINGS_CACHE_TTL', 300)
+    now = time.monotonic()
+    with _lock:
+        cached, checked_at = _cached, _checked_at
+    if cached is not None and now - checked_at < ttl:
+        return cached
+
+    if cached is not None and _read_version() == cached.version:
+        with _lock:
+            _checked_at = now
+        return cached
+
+    raw = {s.setting_key: s.setting_value for s in Setting.query.all()}
+    fresh = _build(raw)
+    with _lock:
+        _cached, _checked_at = fresh, now
+    return fresh
+
+def invalidate_settings():
+    """Drops this process's cache; other processes notice the new stamp after their TTL."""
+    global _cached
+    with _lock:
+        _cached = None
+
+def bump_settings_version():
+    """Writes a new version stamp; the caller commits and then calls invalidate_settings()."""
+    stamp = uuid.uuid4().hex
+    row = Setting.query.filter_by(setting_key=VERSION_KEY).first()
+    if row:
+        row.setting_value = stamp
+    else:
+        db.session.add(Setting(setting_key=VERSION_KEY, setting_value=stamp))
+    return stamp
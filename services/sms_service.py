@@ -1,6 +1,21 @@
+import random
+import threading
+import time
 from flask import current_app
 from twilio.rest import Client
 
+# Twilio clients hold an HTTP session, so one is shared per credential pair
+_client_cache = {}
+_client_lock = threading.Lock()
+
+def _get_twilio_client(account_sid, auth_token):
+    with _client_lock:
+        client = _client_cache.get((account_sid, auth_token))
+        if client is None:
+            client = Client(account_sid, auth_token)
+            _client_cache[(account_sid, auth_token)] = client
+        return client
+
 def _send_twilio_sms(to_number, message_body):
     """A unified internal function to send any SMS message using the Twilio API."""
     try:
@@ -15,7 +30,7 @@ def _send_twilio_sms(to_number, message_body):
         if not to_number.startswith('+'):
             to_number = f'+91{to_number}'
 
-        client = Client(account_sid, auth_token)
+        client = _get_twilio_client(account_sid, auth_token)
         
         message = client.messages.create(
             body=message_body,
@@ -30,20 +45,60 @@ def _send_twilio_sms(to_number, message_body):
         print(f"!!! TWILIO SMS FAILED. Error: {e} !!!")
         return False
 
+class FakeSmsSink:
+    """Local stand-in for Twilio that records messages instead of sending them."""
+
+    def __init__(self, latency=0.0, failure_rate=0.0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.messages = []
+        self._lock = threading.Lock()
+
+    def __call__(self, to_number, message_body):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.failure_rate and random.random() < self.failure_rate:
+            return False
+        with self._lock:
+            self.messages.append((to_number, message_body))
+        return True
+
+_fake_sink = FakeSmsSink()
+
+def get_sms_sender():
+    """Returns the configured sender callable: (to_number, message_body) -> bool."""
+    if current_app.config.get('SMS_BACKEND') == 'fake':
+        return _fake_sink
+    return _send_twilio_sms
+
 def send_otp_sms(to_number, otp):
     """Formats and sends an OTP message via Twilio."""
     print(f"--- Attempting to send OTP to {to_number} via Twilio ---")
     message = f"Your OTP for Attendance Management is: {otp}. It is valid for 10 minutes."
-    return _send_twilio_sms(to_number, message)
+    return get_sms_sender()(to_number, message)
+
+def format_absent_line(student_name, period, subject, time_str):
+    """One absence, as stored in the notification outbox."""
+    return f"{student_name}: period {period} ({subject}) at approx {time_str}"
+
+def format_absent_message(date_str, lines):
+    """Builds the parent SMS for one or more absences on the same day."""
+    if len(lines) == 1:
+        student_name, detail = lines[0].split(': ', 1)
+        return (
+            f"Attendance Alert: Your ward, {student_name}, was marked ABSENT "
+            f"for {detail} on {date_str}. "
+            f"- Attendance Mgmt"
+        )
+    return (
+        f"Attendance Alert: Your ward was marked ABSENT on {date_str} for "
+        + "; ".join(lines) + ". - Attendance Mgmt"
+    )
 
 def send_absent_notification_sms(to_number, student_name, date_str, period, subject, time_str):
     """Formats and sends a custom absentee notification via Twilio."""
     print(f"--- Attempting to send ABSENT notification to {to_number} via Twilio ---")
     
     # The time_str passed here is now in IST format (e.g., "10:30 AM")
-    message = (
-        f"Attendance Alert: Your ward, {student_name}, was marked ABSENT "
-        f"for period {period} ({subject}) on {date_str} at approx {time_str}. "
-        f"- Attendance Mgmt"
-    )
-    return _send_twilio_sms(to_number, message)
\ No newline at end of file
+    message = format_absent_message(date_str, [format_absent_line(student_name, period, subject, time_str)])
+    return get_sms_sender()(to_number, message)
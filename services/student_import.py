@@ -0,0 +1,144 @@
+import csv
+import io
+from dataclasses import dataclass, field
+from sqlalchemy import insert, update
+from models.models import db, Student
+from services.settings_service import get_settings
+from services.dashboard_service import invalidate_department_snapshots
+from services.roster_cache import invalidate_rosters
+from utils.validators import is_valid_name, is_valid_indian_phone
+
+BATCH_SIZE = 500
+LOOKUP_CHUNK = 1000
+COLUMNS = ('name', 'roll_no', 'branch', 'semester', 'parent_contact')
+
+@dataclass
+class ImportResult:
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    # (row number in the file, roll number, message)
+    errors: list = field(default_factory=list)
+
+# =========================================================
+# === 1. READING CSV / XLSX ===
+# =========================================================
+def _normalize_header(value):
+    return str(value or '').strip().lower().replace(' ', '_').replace('.', '')
+
+def _clean(value):
+    if value is None:
+        return ''
+    # Excel hands back numbers for phone/semester columns
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value).strip()
+
+def read_rows(stream, filename):
+    """Yields (row_number, dict) from a CSV or XLSX upload; row 1 is the header."""
+    if filename.lower().endswith('.xlsx'):
+        from openpyxl import load_workbook
+        sheet = load_workbook(stream, read_only=True, data_only=True).active
+        rows = sheet.iter_rows(values_only=True)
+    else:
+        text = stream if isinstance(stream, io.TextIOBase) else io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+        rows = csv.reader(text)
+
+    header = [_normalize_header(h) for h in next(rows, [])]
+    for row_number, values in enumerate(rows, start=2):
+        record = {key: _clean(value) for key, value in zip(header, values)}
+        if any(record.values()):
+            yield row_number, record
+
+# =========================================================
+# === 2. VALIDATION ===
+# =========================================================
+def validate_row(record, branches):
+    """
+    Returns (cleaned mapping, None) or (None, error message). `branches` maps the
+    lower-cased configured branches (college_branches) to their spelling, the
+    same choices add_student offers.
+    """
+    missing = [c for c in COLUMNS if not record.get(c)]
+    if missing:
+        return None, f"Missing {', '.join(missing)}."
+    ok, message = is_valid_name(record['name'])
+    if not ok: return None, message
+    ok, message = is_valid_indian_phone(record['parent_contact'])
+    if not ok: return None, message
+    if len(record['roll_no']) > 20:
+        return None, "Roll Number must be at most 20 characters."
+    if len(record['branch']) > 50:
+        return None, "Branch must be at most 50 characters."
+    branch = branches.get(record['branch'].lower())
+    if branch is None:
+        return None, f"Unknown branch '{record['branch']}'. Add it to the college branches in Settings first."
+    try:
+        semester = int(record['semester'])
+    except ValueError:
+        return None, "Semester must be a number."
+    if not 1 <= semester <= 6:
+        return None, "Semester must be between 1 and 6."
+    return {
+        'name': record['name'],
+        'roll_no': record['roll_no'],
+        'branch': branch,
+        'semester': semester,
+        'parent_contact': record['parent_contact']
+    }, None
+
+# =========================================================
+# === 3. BATCHED UPSERT ===
+# =========================================================
+def _existing_ids(roll_nos):
+    """roll_no -> student_id for every roll number already registered (set-based, chunked)."""
+    found = {}
+    for i in range(0, len(roll_nos), LOOKUP_CHUNK):
+        chunk = roll_nos[i:i + LOOKUP_CHUNK]
+        found.update(db.session.query(Student.roll_no, Student.student_id).filter(Student.roll_no.in_(chunk)))
+    return found
+
+def import_students(rows, update_existing=True, batch_size=BATCH_SIZE):
+    """
+    Validates every row, looks up roll-number collisions in bulk, then inserts
+    new students and (optionally) updates existing ones in committed batches.
+    If a batch fails, the batches before it stay saved (the error is raised);
+    the roster and dashboard caches are refreshed either way.
+    """
+    result = ImportResult()
+    branches = {b.lower(): b for b in get_settings().branches}
+    valid, seen = [], {}
+    for row_number, record in rows:
+        mapping, error = validate_row(record, branches)
+        if error:
+            result.errors.append((row_number, record.get('roll_no', ''), error))
+        elif mapping['roll_no'] in seen:
+            result.errors.append((row_number, mapping['roll_no'], f"Duplicate of row {seen[mapping['roll_no']]} in this file."))
+        else:
+            seen[mapping['roll_no']] = row_number
+            valid.append(mapping)
+
+    existing = _existing_ids([m['roll_no'] for m in valid])
+    to_insert = [m for m in valid if m['roll_no'] not in existing]
+    to_update = [dict(m, student_id=existing[m['roll_no']]) for m in valid if m['roll_no'] in existing]
+    if not update_existing:
+        result.skipped = len(to_update)
+        to_update = []
+
+    try:
+        for i in range(0, len(to_insert), batch_size):
+            db.session.execute(insert(Student), to_insert[i:i + batch_size])
+            db.session.commit()
+            result.inserted += len(to_insert[i:i + batch_size])
+        for i in range(0, len(to_update), batch_size):
+            db.session.execute(update(Student), to_update[i:i + batch_size])
+            db.session.commit()
+            result.updated += len(to_update[i:i + batch_size])
+    except Exception:
+        db.session.rollback()
+        raise
+    finally:
+        if result.inserted or result.updated:
+            invalidate_department_snapshots()
+            invalidate_rosters()
+    return result
@@ -0,0 +1,128 @@
+from datetime import datetime
+from sqlalchemy import select, insert, update, delete, func, case, literal, bindparam
+from models.models import db, Attendance, Student, StudentAttendanceSummary, StudentSubjectSummary
+from services.archive_service import attendance_source
+
+CHUNK_SIZE = 500
+
+def _present_count(source=Attendance.__table__):
+    return func.sum(case((source.c.status == 'Present', 1), else_=0))
+
+def _chunks(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), CHUNK_SIZE):
+        yield ids[i:i + CHUNK_SIZE]
+
+# =========================================================
+# === 1. REBUILD FROM RAW ATTENDANCE ===
+# =========================================================
+def _rebuild_chunk(student_ids):
+    summary, subject_summary = StudentAttendanceSummary.__table__, StudentSubjectSummary.__table__
+    # Percentages cover the whole history, archived years included
+    source = attendance_source()
+    now = datetime.utcnow()
+
+    if student_ids is None:
+        db.session.execute(delete(summary))
+        db.session.execute(delete(subject_summary))
+        # The archive keeps rows of deleted students; they get no summary
+        filters = [source.c.student_id.in_(select(Student.student_id))]
+    else:
+        db.session.execute(delete(summary).where(summary.c.student_id.in_(student_ids)))
+        db.session.execute(delete(subject_summary).where(subject_summary.c.student_id.in_(student_ids)))
+        filters = [source.c.student_id.in_(student_ids)]
+
+    db.session.execute(insert(summary).from_select(
+        ['student_id', 'total', 'present', 'updated_at'],
+        select(source.c.student_id, func.count(source.c.id), _present_count(source), literal(now))
+        .where(source.c.student_id.isnot(None), *filters)
+        .group_by(source.c.student_id)
+    ))
+    db.session.execute(insert(subject_summary).from_select(
+        ['student_id', 'subject', 'total', 'present'],
+        select(source.c.student_id, source.c.subject, func.count(source.c.id), _present_count(source))
+        .where(source.c.student_id.isnot(None), *filters)
+        .group_by(source.c.student_id, source.c.subject)
+    ))
+
+def rebuild_summaries(student_ids=None):
+    """Recomputes summaries from raw attendance (all students when ids is None). Caller commits."""
+    if student_ids is None:
+        _rebuild_chunk(None)
+        return
+    for chunk in _chunks(student_ids):
+        _rebuild_chunk(chunk)
+
+def delete_summaries(student_ids=None):
+    """Removes summaries ahead of deleting students. Caller commits."""
+    for model in (StudentAttendanceSummary, StudentSubjectSummary):
+        query = model.query
+        if student_ids is not None:
+            query = query.filter(model.student_id.in_(student_ids))
+        query.delete(synchronize_session=False)
+
+# =========================================================
+# === 2. INCREMENTAL UPDATE (called after each submission) ===
+# =========================================================
+def apply_submission(rows):
+    """
+    Adds one submitted period (the mappings written by ingest_period) to the
+    summaries. Students without a summary yet are rebuilt from raw attendance,
+    which already includes the rows just inserted in this transaction.
+    """
+    if not rows:
+        return
+    summary, subject_summary = StudentAttendanceSummary.__table__, StudentSubjectSummary.__table__
+    student_ids = [r['student_id'] for r in rows]
+    existing = {sid for (sid,) in db.session.query(StudentAttendanceSummary.student_id)
+                .filter(StudentAttendanceSummary.student_id.in_(student_ids))}
+    missing = [sid for sid in student_ids if sid not in existing]
+    if missing:
+        rebuild_summaries(missing)
+
+    deltas = [{'b_student_id': r['student_id'], 'b_subject': r['subject'],
+               'b_present': 1 if r['status'] == 'Present' else 0}
+              for r in rows if r['student_id'] in existing]
+    if not deltas:
+        return
+
+    db.session.execute(
+        update(summary).where(summary.c.student_id == bindparam('b_student_id')).values(
+            total=summary.c.total + 1,
+            present=summary.c.present + bindparam('b_present'),
+            updated_at=datetime.utcnow()),
+        deltas)
+
+    # Per-subject rows: one submission always carries a single subject
+    subjects = {d['b_subject'] for d in deltas}
+    has_subject = set(db.session.query(StudentSubjectSummary.student_id, StudentSubjectSummary.subject).filter(
+        StudentSubjectSummary.student_id.in_(list(existing)), StudentSubjectSummary.subject.in_(subjects)))
+    to_update = [d for d in deltas if (d['b_student_id'], d['b_subject']) in has_subject]
+    to_insert = [{'student_id': d['b_student_id'], 'subject': d['b_subject'], 'total': 1, 'present': d['b_present']}
+                 for d in deltas if (d['b_student_id'], d['b_subject']) not in has_subject]
+    if to_update:
+        db.session.execute(
+            update(subject_summary).where(
+                subject_summary.c.student_id == bindparam('b_student_id'),
+                subject_summary.c.subject == bindparam('b_subject')
+            ).values(total=subject_summary.c.total + 1, present=subject_summary.c.present + bindparam('b_present')),
+            to_update)
+    if to_insert:
+        db.session.execute(insert(subject_summary), to_insert)
+
+# =========================================================
+# === 3. READ PATH ===
+# =========================================================
+def get_student_summary(student_id):
+    """Returns (total, present, percentage) from the summary row, or raw counts if it is missing."""
+    row = db.session.get(StudentAttendanceSummary, student_id)
+    if row:
+        return row.total, row.present, row.percentage
+    source = attendance_source(student_id=student_id)
+    total, present = db.session.query(func.count(source.c.id), _present_count(source))\
+        .filter(source.c.student_id == student_id).one()
+    present = present or 0
+    return total, present, (present / total * 100) if total else 0
+
+def get_subject_summaries(student_id):
+    return StudentSubjectSummary.query.filter_by(student_id=student_id).order_by(StudentSubjectSummary.subject).all()
@@ -0,0 +1,192 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+import uuid
+from flask import current_app, url_for
+from models.models import db, Admin, Staff, HOD
+
+CHUNK_SIZE = 64 * 1024
+PROFILE_DIR = 'images/profiles'
+TIMETABLE_DIR = 'uploads/timetables'
+THUMB_DIR = 'thumbs'
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+# Longest side in pixels: navbar/list avatars and the timetable preview
+AVATAR_SIZE = 128
+PREVIEW_SIZE = 1024
+
+# =========================================================
+# === 1. STREAMED, CONTENT-HASHED SAVES ===
+# =========================================================
+def static_path(folder, filename=''):
+    return os.path.join(current_app.static_folder, folder, filename)
+
+def save_upload(file, folder):
+    """
+    Streams an uploaded file to disk in chunks while hashing it and stores it as
+    <sha256>.<ext>, so identical uploads share one file and every new upload
+    gets a new URL. Returns the stored filename.
+    """
+    ext = file.filename.rsplit('.', 1)[1].lower()
+    target_dir = static_path(folder)
+    os.makedirs(target_dir, exist_ok=True)
+
+    digest = hashlib.sha256()
+    temp_path = os.path.join(target_dir, f'.upload-{uuid.uuid4().hex}.part')
+    try:
+        with open(temp_path, 'wb') as out:
+            for chunk in iter(lambda: file.stream.read(CHUNK_SIZE), b''):
+                digest.update(chunk)
+                out.write(chunk)
+        filename = f'{digest.hexdigest()[:32]}.{ext}'
+        final_path = os.path.join(target_dir, filename)
+        if os.path.exists(final_path):
+            os.remove(temp_path)  # Same content already stored
+        else:
+            os.replace(temp_path, final_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    return filename
+
+def referenced_files():
+    """{folder: set of filenames} still pointed to by a user row."""
+    profiles = set()
+    for model in (Admin, Staff, HOD):
+        profiles.update(name for (name,) in db.session.query(model.profile_image) if name)
+    timetables = {name for (name,) in db.session.query(Staff.timetable_file) if name}
+    return {PROFILE_DIR: profiles, TIMETABLE_DIR: timetables}
+
+def remove_upload(folder, filename):
+    """Deletes a stored file and its thumbnails unless another user still references it. Caller commits first."""
+    if not filename or filename == 'default.png' or filename in referenced_files()[folder]:
+        return False
+    stem = filename.rsplit('.', 1)[0]
+    thumbs = static_path(folder, THUMB_DIR)
+    paths = [static_path(folder, filename)]
+    if os.path.isdir(thumbs):
+        paths += [os.path.join(thumbs, t) for t in os.listdir(thumbs) if t.startswith(f'{stem}_')]
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+    return True
+
+# =========================================================
+# === 2. THUMBNAILS (background worker) ===
+# =========================================================
+def thumbnail_name(filename, size):
+    return f"{THUMB_DIR}/{filename.rsplit('.', 1)[0]}_{size}.webp"
+
+def make_thumbnail(source, target, size):
+    """Resizes an image to fit size x size and writes it as WebP."""
+    from PIL import Image
+
+    with Image.open(source) as image:
+        image.thumbnail((size, size))
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        temp = f'{target}.{uuid.uuid4().hex}.part'
+        image.save(temp, 'WEBP', quality=80, method=4)
+        os.replace(temp, target)
+
+class ThumbnailWorker:
+    """Generates thumbnails off the request thread; duplicate requests are ignored."""
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def request(self, source, target, size):
+        with self._lock:
+            if target in self._pending:
+                return
+            self._pending.add(target)
+        self._queue.put((source, target, size))
+
+    def _process(self, source, target, size):
+        try:
+            if os.path.exists(source) and not os.path.exists(target):
+                make_thumbnail(source, target, size)
+        except Exception as e:
+            # Unreadable image or Pillow missing: pages keep using the original
+            print(f"!!! THUMBNAIL ERROR ({os.path.basename(source)}): {e} !!!")
+        finally:
+            with self._lock:
+                self._pending.discard(target)
+
+    def run_pending(self):
+        """Processes everything queued on the calling thread (scripts, benchmarks)."""
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except queue.Empty:
+                return
+            self._process(*job)
+
+    def _loop(self):
+        while True:
+            self._process(*self._queue.get())
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._loop, name='thumbnail-worker', daemon=True)
+            self._thread.start()
+
+def thumbnail_url(folder, filename, size=AVATAR_SIZE):
+    """
+    URL of the WebP thumbnail if it exists, otherwise of the original (and the
+    thumbnail is queued, so it is ready on a later view).
+    """
+    thumb = thumbnail_name(filename, size)
+    if filename.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS:
+        if os.path.exists(static_path(folder, thumb)):
+            return url_for('static', filename=f'{folder}/{thumb}')
+        worker = current_app.extensions.get('thumbnail_worker')
+        if worker and os.path.exists(static_path(folder, filename)):
+            worker.request(static_path(folder, filename), static_path(folder, thumb), size)
+    return url_for('static', filename=f'{folder}/{filename}')
+
+def queue_thumbnails(folder, filename, sizes=(AVATAR_SIZE,)):
+    """Called right after an upload so thumbnails are usually ready by the next page."""
+    worker = current_app.extensions.get('thumbnail_worker')
+    if worker and filename.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS:
+        for size in sizes:
+            worker.request(static_path(folder, filename), static_path(folder, thumbnail_name(filename, size)), size)
+
+def init_upload_worker(app):
+    worker = ThumbnailWorker()
+    app.extensions['thumbnail_worker'] = worker
+    app.add_template_global(thumbnail_url)
+    if app.config['THUMBNAIL_WORKER_ENABLED']:
+        worker.start()
+    return worker
+
+# =========================================================
+# === 3. ORPHAN CLEANUP (cleanup_uploads.py) ===
+# =========================================================
+def find_orphans(min_age_seconds=3600):
+    """Stored files and thumbnails no user row points to, skipping very recent files."""
+    now = time.time()
+    orphans = []
+    for folder, keep in referenced_files().items():
+        directory = static_path(folder)
+        if not os.path.isdir(directory):
+            continue
+        keep_stems = {name.rsplit('.', 1)[0] for name in keep}
+        for name in os.listdir(directory):
+            path = os.path.join(directory, name)
+            if os.path.isfile(path) and name not in keep and not name.startswith('default.') \
+                    and now - os.path.getmtime(path) > min_age_seconds:
+                orphans.append(path)
+        thumbs = os.path.join(directory, THUMB_DIR)
+        if os.path.isdir(thumbs):
+            for name in os.listdir(thumbs):
+                path = os.path.join(thumbs, name)
+                if name.rsplit('_', 1)[0] not in keep_stems and now - os.path.getmtime(path) > min_age_seconds:
+                    orphans.append(path)
+    return orphans
@@ -0,0 +1,163 @@
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from types import MappingProxyType
+from flask import current_app
+from models.models import db, Admin, Staff, HOD, Setting
+from utils.cache import TTLCache
+
+USER_MODELS = {'admin': Admin, 'staff': Staff, 'hod': HOD}
+# Never copied into the cache
+SECRET_FIELDS = {'password', 'otp_hash', 'otp_expiry'}
+# Bumped by every account change; next to it each changed user gets its own
+# 'user_version:staff-3' stamp, so other processes drop only that user
+VERSION_KEY = 'user_cache_version'
+USER_VERSION_PREFIX = 'user_version:'
+
+_users = TTLCache(maxsize=1024)
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Read-only copy of the columns a logged-in user's pages need."""
+    model: type
+    key: str  # the Flask-Login id, e.g. 'staff-3'
+    pk: int
+    fields: MappingProxyType
+
+# --- Stamps last read by this process ---
+_lock = threading.Lock()
+_stamps = (None, {})  # (VERSION_KEY stamp, {user_version key: stamp})
+_checked_at = 0.0
+
+def _check_stamps():
+    """
+    Within USER_CACHE_CHECK_INTERVAL no query is made; after it only the global
+    stamp is read, and when it moved the per-user stamps are read and the users
+    whose stamp changed are dropped. Everyone else stays cached.
+    """
+    global _stamps, _checked_at
+    now = time.monotonic()
+    with _lock:
+        if now - _checked_at < current_app.config.get('USER_CACHE_CHECK_INTERVAL', 10):
+            return
+        _checked_at = now
+        version, user_stamps = _stamps
+
+    row = db.session.query(Setting.setting_value).filter_by(setting_key=VERSION_KEY).first()
+    current = row[0] if row else None
+    if current == version:
+        return
+    fresh = dict(db.session.query(Setting.setting_key, Setting.setting_value)
+                 .filter(Setting.setting_key.startswith(USER_VERSION_PREFIX)))
+    for setting_key, stamp in fresh.items():
+        if user_stamps.get(setting_key) != stamp:
+            _users.invalidate(setting_key[len(USER_VERSION_PREFIX):])
+    with _lock:
+        _stamps = (current, fresh)
+
+def _write_stamp(setting_key, stamp):
+    updated = Setting.query.filter_by(setting_key=setting_key).update({'setting_value': stamp})
+    if not updated:
+        db.session.add(Setting(setting_key=setting_key, setting_value=stamp))
+
+def _snapshot(key, user):
+    fields = {c.key: getattr(user, c.key) for c in user.__table__.columns if c.key not in SECRET_FIELDS}
+    return UserSnapshot(
+        model=type(user),
+        key=key,
+        pk=db.inspect(user).identity[0],
+        fields=MappingProxyType(fields)
+    )
+
+class CachedUser:
+    """
+    What `current_user` is on most requests: answers from the snapshot and only
+    loads the real row when an attribute outside it is read, or one is set.
+    It reports the model as its class, so isinstance(current_user, Staff) works.
+    """
+    __slots__ = ('_snapshot', '_instance')
+
+    def __init__(self, snapshot, instance=None):
+        object.__setattr__(self, '_snapshot', snapshot)
+        object.__setattr__(self, '_instance', instance)
+
+    @property
+    def __class__(self):
+        return self._snapshot.model
+
+    # --- Flask-Login interface (no query needed) ---
+    is_authenticated = True
+    is_active = True
+    is_anonymous = False
+
+    def get_id(self):
+        return self._snapshot.key
+
+    def _load(self):
+        if self._instance is None:
+            object.__setattr__(self, '_instance', db.session.get(self._snapshot.model, self._snapshot.pk))
+        return self._instance
+
+    def __getattr__(self, name):
+        if self._instance is not None:
+            return getattr(self._instance, name)
+        if name in self._snapshot.fields:
+            return self._snapshot.fields[name]
+        # Unknown names (e.g. Staff has no email) fail without touching the database
+        if name.startswith('__') or not hasattr(self._snapshot.model, name):
+            raise AttributeError(name)
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        # Local copy only; the route calls invalidate_user() once it has committed
+        setattr(self._load(), name, value)
+        _users.invalidate(self._snapshot.key)
+
+    def __eq__(self, other):
+        return hasattr(other, 'get_id') and self.get_id() == other.get_id()
+
+    def __hash__(self):
+        return hash(self._snapshot.key)
+
+    def __repr__(self):
+        return f'<CachedUser {self._snapshot.key}>'
+
+def load_cached_user(user_id_string):
+    """
+    Flask-Login user_loader: a CachedUser from the per-process cache. A hit costs
+    no query (see _check_stamps); the user row is queried only on a miss.
+    """
+    try:
+        user_type, user_id = user_id_string.split('-')
+        user_id = int(user_id)
+        model = USER_MODELS[user_type]
+    except (ValueError, AttributeError, KeyError):
+        return None
+
+    key = f'{user_type}-{user_id}'
+    _check_stamps()
+    snapshot = _users.get(key)
+    if snapshot is not None:
+        return CachedUser(snapshot)
+
+    user = db.session.get(model, user_id)
+    if user is None:
+        return None
+    snapshot = _snapshot(key, user)
+    _users.set(key, snapshot, ttl=current_app.config.get('USER_CACHE_TTL', 300))
+    return CachedUser(snapshot, user)
+
+def invalidate_user(user):
+    """
+    Call after committing a change to an account (a model instance, CachedUser or
+    'staff-3' style id). Drops this process's copy and writes new stamps, so
+    other processes reload that user within USER_CACHE_CHECK_INTERVAL: a
+    password change or a deleted account is not honoured from a stale snapshot.
+    """
+    key = user if isinstance(user, str) else user.get_id()
+    _users.invalidate(key)
+    stamp = uuid.uuid4().hex
+    _write_stamp(USER_VERSION_PREFIX + key, stamp)
+    _write_stamp(VERSION_KEY, stamp)
+    db.session.commit()
@@ -0,0 +1,69 @@
+import hashlib
+import os
+import threading
+from flask import request
+from flask_login import current_user
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+NO_STORE = 'no-cache, no-store, must-revalidate, post-check=0, pre-check=0'
+
+_versions = {}
+_lock = threading.Lock()
+
+def asset_version(static_folder, filename):
+    """
+    Short content hash of a static file, recomputed only when its size or
+    mtime changes. Returns None for files that do not exist.
+    """
+    path = os.path.join(static_folder, filename)
+    try:
+        stat = os.stat(path)
+    except (OSError, ValueError):
+        return None
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    with _lock:
+        cached = _versions.get(path)
+    if cached and cached[0] == stamp:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(65536), b''):
+            digest.update(block)
+    version = digest.hexdigest()[:12]
+    with _lock:
+        _versions[path] = (stamp, version)
+    return version
+
+def init_static_caching(app):
+    """
+    Fingerprints every url_for('static', ...) with ?v=<content hash> and sets
+    Cache-Control per response: fingerprinted assets are immutable for a year,
+    other static hits revalidate by ETag, authenticated pages are never stored.
+    """
+    @app.url_defaults
+    def add_asset_version(endpoint, values):
+        if endpoint == 'static' and 'v' not in values and values.get('filename'):
+            version = asset_version(app.static_folder, values['filename'])
+            if version:
+                values['v'] = version
+
+    @app.after_request
+    def set_cache_headers(response):
+        if request.endpoint == 'static':
+            version = request.args.get('v')
+            if version and response.status_code == 200 and version == asset_version(app.static_folder, request.view_args['filename']):
+                response.headers['Cache-Control'] = IMMUTABLE
+            else:
+                # Stale or missing fingerprint: let the browser revalidate with the ETag
+                response.headers['Cache-Control'] = 'no-cache'
+            return response
+
+        if current_user.is_authenticated:
+            response.headers['Cache-Control'] = NO_STORE
+            response.headers['Pragma'] = 'no-cache'
+            response.headers['Expires'] = '0'
+        else:
+            # Public pages (login, parent view) may be kept but must be revalidated
+            response.headers['Cache-Control'] = 'private, no-cache'
+        return response